@@ -0,0 +1,481 @@
+"""
+Benchmark do pipeline com currículos Lattes sintéticos.
+
+Gera HTMLs no formato da página do Lattes (identificação, endereço, linhas de
+pesquisa, projetos, áreas, artigo-completo, textos em revistas, trabalhos em
+anais com a âncora TrabalhosPublicadosAnaisCongresso e orientações), com
+coautores sorteados entre os próprios pesquisadores do corpus para que o
+preenchimento de IDs tenha trabalho. Para cada tamanho de corpus, cada etapa
+roda num processo novo e informa tempo, currículos por segundo e pico de
+memória (ru_maxrss do processo):
+
+    parse           LattesParser em cada HTML + gravação do JSON
+    preenchimento   índice de nomes (collect_corpus_index) + fill_missing_ids
+    pln             processar_corpus do pln.py (pulada se o spaCy ou o modelo faltarem)
+
+Na etapa parse também são mostrados o total, o p50 e o p95 do tempo de cada
+extrator (LattesParser.estatisticas) no maior corpus; com --memoria, também o
+pico de memória de cada um (tracemalloc). --campos mede a extração seletiva
+(parse(campos=...)), como nos jobs que só atualizam o índice de nomes.
+
+Uso:
+    python benchmark.py [--tamanhos 50 200 800] [--etapas parse preenchimento pln]
+                        [--backend bs4] [--artigos 20] [--resultados resultados.json]
+"""
+
+import argparse
+import multiprocessing
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import json_io
+
+PRENOMES = [
+    'Ana', 'Bruno', 'Carla', 'Daniel', 'Eduarda', 'Fábio', 'Gabriela', 'Heitor', 'Isabela', 'João',
+    'Larissa', 'Marcelo', 'Natália', 'Otávio', 'Paula', 'Rafael', 'Sônia', 'Tiago', 'Vanessa', 'Wagner',
+]
+SOBRENOMES = [
+    'Silva', 'Santos', 'Oliveira', 'Souza', 'Rodrigues', 'Ferreira', 'Alves', 'Pereira', 'Lima', 'Gomes',
+    'Costa', 'Ribeiro', 'Martins', 'Carvalho', 'Almeida', 'Lopes', 'Soares', 'Fernandes', 'Vieira', 'Barbosa',
+    'Rocha', 'Dias', 'Nascimento', 'Andrade', 'Moreira', 'Nunes', 'Marques', 'Machado', 'Mendes', 'Freitas',
+]
+AREAS = [
+    'Grande área: Ciências Exatas e da Terra / Área: Ciência da Computação / Subárea: Banco de Dados.',
+    'Grande área: Ciências Exatas e da Terra / Área: Ciência da Computação / Subárea: Sistemas de Computação/Especialidade: Arquitetura.',
+    'Grande área: Ciências Exatas e da Terra / Área: Matemática / Subárea: Probabilidade e Estatística.',
+    'Grande área: Engenharias / Área: Engenharia Elétrica / Subárea: Telecomunicações.',
+    'Grande área: Ciências Biológicas / Área: Genética.',
+]
+PALAVRAS = [
+    'análise', 'modelo', 'dados', 'redes', 'aprendizado', 'sistemas', 'distribuídos', 'otimização',
+    'algoritmos', 'avaliação', 'desempenho', 'grafos', 'linguagem', 'natural', 'processamento', 'sinais',
+    'imagens', 'genômica', 'proteínas', 'estatística', 'bayesiana', 'computação', 'paralela', 'energia',
+]
+TIPOS_ANAIS = [
+    'Trabalhos completos publicados em anais de congressos',
+    'Resumos expandidos publicados em anais de congressos',
+    'Resumos publicados em anais de congressos',
+]
+ETAPAS = ('parse', 'preenchimento', 'pln')
+
+
+def id_lattes(indice):
+    return f"{indice:016d}"
+
+
+def pesquisador(indice):
+    """Nome completo e nome de citação do pesquisador `indice` (alguns nomes se repetem de propósito)."""
+    prenome = PRENOMES[indice % len(PRENOMES)]
+    sobrenome = SOBRENOMES[(indice // len(PRENOMES)) % len(SOBRENOMES)]
+    meio = SOBRENOMES[(indice * 7 + 3) % len(SOBRENOMES)]
+    return f"{prenome} {meio} {sobrenome}", f"{sobrenome.upper()}, {prenome[0]}. {meio[0]}."
+
+
+def _celula(classe, conteudo):
+    return f'<div class="layout-cell {classe}"><div class="layout-cell-pad-5">{conteudo}</div></div>\n'
+
+
+def _rotulo(texto):
+    return (
+        '<div class="layout-cell layout-cell-3 text-align-right">'
+        f'<div class="layout-cell-pad-5 text-align-right"><b>{texto}</b></div></div>\n'
+    )
+
+
+def _secao(ancora, titulo, conteudo):
+    return (
+        f'<div class="title-wrapper"><a name="{ancora}"></a><h1>{titulo}</h1>'
+        f'<div class="layout-cell layout-cell-12 data-cell">\n{"".join(conteudo)}</div></div>\n'
+    )
+
+
+def _frase(sorteio, palavras):
+    return ' '.join(sorteio.choice(PALAVRAS) for _ in range(palavras)).capitalize()
+
+
+def gerar_html(indice, total, artigos=20, trabalhos=10, orientacoes=6, projetos=4):
+    """HTML sintético de um currículo; a quantidade de cada seção varia em torno do valor pedido."""
+    sorteio = random.Random(indice)
+    nome, citacao = pesquisador(indice)
+    prenome, meio, sobrenome = nome.split()
+
+    def quantidade(media):
+        return sorteio.randint(media // 2, media + media // 2) if media else 0
+
+    def coautores():
+        outros = sorteio.sample(range(total), min(total, sorteio.randint(1, 4)))
+        nomes = [pesquisador(outro)[1] for outro in outros if outro != indice]
+        if sorteio.random() < 0.3:
+            nomes.append(f"{sorteio.choice(SOBRENOMES).upper()}, {sorteio.choice('ABCDEFGHIJ')}.")
+        posicao = sorteio.randint(0, len(nomes))
+        return nomes[:posicao] + [f"<b>{citacao}</b>"] + nomes[posicao:]
+
+    partes = ['<html><head><title>Currículo do Sistema de Currículos Lattes</title></head><body><div class="main-content">']
+    partes.append(
+        f'<div class="infpessoa"><h2 class="nome">{nome}</h2><ul class="informacoes-autor"><li>ID Lattes: '
+        f'<span style="font-weight: bold; color: #326C99;">{id_lattes(indice)}</span></li></ul></div>\n'
+    )
+    partes.append(_secao('Identificacao', 'Identificação', [
+        _rotulo('Nome em citações bibliográficas'),
+        _celula('layout-cell-9', f'{citacao};{sobrenome}, {prenome};{sobrenome.upper()}, {prenome.upper()}'),
+    ]))
+    partes.append(_secao('Endereco', 'Endereço', [
+        _rotulo('Endereço Profissional'),
+        _celula(
+            'layout-cell-9',
+            'Universidade Federal, Departamento de Computação.<br class="clear" />Rodovia Km 235'
+            '<br class="clear" />13565-905 - São Carlos, SP - Brasil<br class="clear" />Telefone: (16) 3351 8232',
+        ),
+    ]))
+
+    linhas = []
+    for posicao in range(quantidade(3) or 1):
+        linhas += [_rotulo(f'{posicao + 1}.'), _celula('layout-cell-9', _frase(sorteio, 4))]
+    partes.append(_secao('LinhaPesquisa', 'Linhas de pesquisa', linhas))
+
+    celulas = []
+    for posicao in range(quantidade(projetos)):
+        inicio = sorteio.randint(2000, 2022)
+        fim = 'Atual' if sorteio.random() < 0.3 else str(inicio + sorteio.randint(1, 4))
+        celulas += [
+            _rotulo(f'{inicio} - {fim}'),
+            _celula('layout-cell-9', f'{_frase(sorteio, 6)}.'),
+            _rotulo('&nbsp;'),
+            _celula('layout-cell-9', f'Descrição: {_frase(sorteio, 30)}.<br class="clear" />Situação: Em andamento; Natureza: Pesquisa.'),
+        ]
+    partes.append(_secao('ProjetosPesquisa', 'Projetos de pesquisa', celulas))
+
+    celulas = []
+    for posicao, area in enumerate(sorteio.sample(AREAS, sorteio.randint(1, 3))):
+        celulas += [_rotulo(f'{posicao + 1}.'), _celula('layout-cell-9', area)]
+    partes.append(_secao('AreasAtuacao', 'Áreas de atuação', celulas))
+
+    producoes = ['<div class="inst_back"><b>Produção bibliográfica</b></div>\n']
+    producoes.append(
+        '<div class="cita-artigos"><b><a name="ArtigosCompletos"></a>Artigos completos publicados em periódicos</b></div>\n'
+        '<div id="artigos-completos">\n'
+    )
+    for posicao in range(quantidade(artigos)):
+        ano = sorteio.randint(1995, 2024)
+        doi = ''
+        if sorteio.random() < 0.7:
+            doi = (
+                f'<a class="icone-producao icone-doi" href="http://dx.doi.org/10.{sorteio.randint(1000, 9999)}/'
+                f'bench.{indice}.{posicao}" target="_blank"><img src="doi.png" /></a>'
+            )
+        producoes.append(
+            '<div class="artigo-completo">'
+            f'<div class="layout-cell layout-cell-1 text-align-right"><div class="layout-cell-pad-5 text-align-right"><b>{posicao + 1}.</b></div></div>'
+            '<div class="layout-cell layout-cell-11"><div class="layout-cell-pad-5"><span class="citado" cvuri=""></span>'
+            f'{"; ".join(coautores())} . {_frase(sorteio, 8)}. Revista {sorteio.choice(PALAVRAS).title()}, '
+            f'v. {sorteio.randint(1, 60)}, p. {sorteio.randint(1, 300)}-{sorteio.randint(301, 600)}, '
+            f'<span data-tipo-ordenacao="ano">{ano}</span>.{doi}'
+            f'<span class="informacao-artigo" data-tipo-ordenacao="ano">{ano}</span></div></div></div>\n'
+        )
+    producoes.append('</div>\n')
+
+    producoes.append('<div class="cita-artigos"><b><a name="TextosJornaisRevistas"></a>Textos em jornais de notícias/revistas</b></div>\n')
+    for posicao in range(quantidade(2)):
+        producoes += [
+            _celula('layout-cell-1', f'<b>{posicao + 1}.</b>'),
+            _celula('layout-cell-11', f'{citacao} {_frase(sorteio, 6)}. Jornal, {sorteio.randint(2000, 2024)}.'),
+        ]
+    for tipo in TIPOS_ANAIS:
+        producoes.append(f'<div class="cita-artigos"><b><a name="TrabalhosPublicadosAnaisCongresso"></a>{tipo}</b></div>\n')
+        for posicao in range(quantidade(trabalhos)):
+            producoes += [
+                _celula('layout-cell-1', f'<b>{posicao + 1}.</b>'),
+                _celula(
+                    'layout-cell-11',
+                    f'{"; ".join(coautores())}. {_frase(sorteio, 8)}. In: Congresso de {sorteio.choice(PALAVRAS).title()}, '
+                    f'{sorteio.randint(1995, 2024)}.',
+                ),
+            ]
+    producoes.append('<div class="inst_back"><b>Produção técnica</b></div>\n')
+    partes.append(_secao('ProducoesCientificas', 'Produções', producoes))
+
+    celulas = []
+    for ancora, rotulo in [('Orientacaoemandamento', 'Início: '), ('Orientacoesconcluidas', '')]:
+        celulas.append(
+            f'<div class="inst_back"><b>Orientações e supervisões</b></div>\n<a name="{ancora}"></a>\n'
+            '<div class="cita-artigos"><b>Dissertação de mestrado</b></div>\n'
+        )
+        for posicao in range(quantidade(orientacoes)):
+            aluno = pesquisador(sorteio.randrange(total))[0] if sorteio.random() < 0.3 else (
+                f'{sorteio.choice(PRENOMES)} {sorteio.choice(SOBRENOMES)}'
+            )
+            celulas += [
+                _celula('layout-cell-1', f'<b>{posicao + 1}.</b>'),
+                _celula(
+                    'layout-cell-11',
+                    f'{aluno}. {_frase(sorteio, 7)}. {rotulo}{sorteio.randint(2000, 2024)}. '
+                    'Dissertação (Mestrado em Computação) - Universidade Federal.',
+                ),
+            ]
+    partes.append(_secao('Orientacoes', 'Orientações', celulas))
+    partes.append('<div class="title-wrapper"><a name="Eventos"></a><h1>Eventos</h1></div>\n')
+    partes.append('</div></body></html>')
+    return ''.join(partes)
+
+
+def gerar_corpus(pasta, total, **tamanhos):
+    """Grava `total` HTMLs em `pasta` (um arquivo por ID Lattes, como em curriculos/) e devolve os caminhos."""
+    pasta = Path(pasta)
+    pasta.mkdir(parents=True, exist_ok=True)
+    caminhos = []
+    for indice in range(total):
+        caminho = pasta / id_lattes(indice)
+        caminho.write_text(gerar_html(indice, total, **tamanhos), encoding='utf-8')
+        caminhos.append(caminho)
+    return caminhos
+
+
+def etapa_parse(pasta, opcoes):
+    from parser import analisar, resumir_estatisticas, salvar_json
+
+    # JSONs parciais ficam à parte: as outras etapas precisam dos currículos completos
+    saida = Path(pasta) / ('json_parcial' if opcoes['campos'] else 'json')
+    saida.mkdir(exist_ok=True)
+    estatisticas = []
+    caminhos = sorted((Path(pasta) / 'html').iterdir())
+    for caminho in caminhos:
+        dados, estatistica = analisar(
+            caminho.read_text(encoding='utf-8'), opcoes['backend'], medir_memoria=opcoes['memoria'],
+            campos=opcoes['campos'],
+        )
+        salvar_json(dados, saida)
+        estatisticas.append(estatistica)
+    return len(caminhos), resumir_estatisticas(estatisticas)
+
+
+def etapa_preenchimento(pasta, opcoes):
+    from filling_idlattes import CollaboratorMatcher, build_resolver, collect_corpus_index, fill_missing_ids
+
+    json_files = json_io.listar_jsons(Path(pasta) / 'preenchimento')
+    inicio = time.perf_counter()
+    entries, features = collect_corpus_index(json_files)
+    matcher = CollaboratorMatcher(entries)
+    resolver = build_resolver(matcher, features)
+    indice = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    resumo = fill_missing_ids(json_files, matcher, Path(pasta) / 'preenchimento.csv', resolver=resolver)
+    return len(json_files), {
+        'indice de nomes': indice,
+        'preenchimento': time.perf_counter() - inicio,
+        'ids preenchidos': resumo['filled'],
+    }
+
+
+class EtapaIndisponivel(Exception):
+    """A etapa não pode rodar neste ambiente (spaCy ou modelo ausentes)."""
+
+
+def etapa_pln(pasta, opcoes):
+    try:
+        import pln
+    except ImportError as exc:
+        raise EtapaIndisponivel(f"{type(exc).__name__}: {exc}") from exc
+    try:
+        nlp = pln.obter_modelo(perfil=opcoes['perfil_pln'])
+    except OSError as exc:
+        # spacy.load levanta OSError quando o modelo não está instalado
+        raise EtapaIndisponivel(f"{type(exc).__name__}: {exc}") from exc
+    inicio = time.perf_counter()
+    tokens = 0
+    curriculos = 0
+    for _, secoes in pln.processar_corpus(json_io.listar_jsons(Path(pasta) / 'json'), nlp):
+        curriculos += 1
+        tokens += sum(len(doc) for docs in secoes.values() for doc in docs)
+    return curriculos, {'processamento': time.perf_counter() - inicio, 'tokens': tokens}
+
+
+FUNCOES_ETAPAS = {
+    'parse': etapa_parse,
+    'preenchimento': etapa_preenchimento,
+    'pln': etapa_pln,
+}
+
+
+def _pico_rss_mb():
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+
+def _executar_etapa(conn, etapa, pasta, opcoes):
+    # Processo novo por etapa: o pico de memória medido é só o desta etapa
+    try:
+        inicio = time.perf_counter()
+        arquivos, detalhes = FUNCOES_ETAPAS[etapa](pasta, opcoes)
+        segundos = time.perf_counter() - inicio
+        conn.send(("resultado", {
+            'arquivos': arquivos,
+            'segundos': segundos,
+            'pico_rss_mb': _pico_rss_mb(),
+            'detalhes': detalhes,
+        }))
+    except EtapaIndisponivel as exc:
+        conn.send(("indisponivel", str(exc)))
+    except Exception as exc:
+        conn.send(("erro", f"{type(exc).__name__}: {exc}"))
+    finally:
+        conn.close()
+
+
+def medir(etapa, pasta, opcoes):
+    contexto = multiprocessing.get_context('spawn')
+    receptor, emissor = contexto.Pipe(duplex=False)
+    processo = contexto.Process(target=_executar_etapa, args=(emissor, etapa, str(pasta), opcoes))
+    processo.start()
+    emissor.close()
+    try:
+        tipo, conteudo = receptor.recv()
+    except EOFError:
+        tipo, conteudo = "erro", f"processo terminou com código {processo.exitcode}"
+    processo.join()
+    if tipo == "resultado":
+        return conteudo
+    if tipo == "erro":
+        raise RuntimeError(f"Etapa {etapa} falhou: {conteudo}")
+    return {'indisponivel': conteudo}
+
+
+def preparar_corpus(pasta, total, etapas, opcoes):
+    """Gera os HTMLs e, se a etapa parse não os produzir, os JSONs completos que as outras etapas leem."""
+    gerar_corpus(pasta / 'html', total, **opcoes['tamanhos'])
+    if ('parse' not in etapas or opcoes['campos']) and ({'preenchimento', 'pln'} & set(etapas)):
+        from parser import converter_curriculos
+
+        resumo = converter_curriculos(sorted((pasta / 'html').iterdir()), pasta / 'json', backend=opcoes['backend'])
+        if resumo['falhas']:
+            raise RuntimeError(f"Falha ao gerar os JSONs: {resumo['falhas'][0]}")
+
+
+def executar(tamanhos, etapas, opcoes):
+    resultados = []
+    for total in tamanhos:
+        pasta = Path(tempfile.mkdtemp(prefix=f'benchmark_{total}_'))
+        try:
+            preparar_corpus(pasta, total, etapas, opcoes)
+            for etapa in ETAPAS:
+                if etapa not in etapas:
+                    continue
+                if etapa == 'preenchimento':
+                    # O preenchimento altera os JSONs; a etapa pln continua lendo os originais
+                    shutil.copytree(pasta / 'json', pasta / 'preenchimento')
+                resultado = medir(etapa, pasta, opcoes)
+                resultado.update(etapa=etapa, tamanho=total)
+                resultados.append(resultado)
+                imprimir_linha(resultado)
+        finally:
+            shutil.rmtree(pasta, ignore_errors=True)
+    return resultados
+
+
+def imprimir_linha(resultado):
+    if 'indisponivel' in resultado:
+        print(f"{resultado['etapa']:14} | {resultado['tamanho']:10} | indisponível ({resultado['indisponivel']})")
+        return
+    print(
+        f"{resultado['etapa']:14} | {resultado['tamanho']:10} | {resultado['segundos']:9.2f} | "
+        f"{resultado['arquivos'] / resultado['segundos']:11.1f} | {resultado['pico_rss_mb']:12.1f}"
+    )
+
+
+def imprimir_extratores(resultado):
+    from parser import tabela_estatisticas
+
+    print(f"\nPassos do parse ({resultado['tamanho']} currículos):")
+    print(tabela_estatisticas(resultado['detalhes']))
+
+
+def main():
+    argumentos = argparse.ArgumentParser(
+        description="Mede parse, preenchimento de IDs e PLN em corpora sintéticos de tamanho crescente."
+    )
+    argumentos.add_argument(
+        "--tamanhos",
+        type=int,
+        nargs="+",
+        default=[50, 200, 800],
+        help="Quantidades de currículos a gerar (padrão: 50 200 800).",
+    )
+    argumentos.add_argument(
+        "--etapas",
+        nargs="+",
+        choices=ETAPAS,
+        default=list(ETAPAS),
+        help="Etapas medidas (padrão: todas).",
+    )
+    argumentos.add_argument(
+        "--backend",
+        choices=["bs4", "lxml"],
+        default="bs4",
+        help="Motor de parsing do LattesParser (padrão: bs4).",
+    )
+    argumentos.add_argument("--artigos", type=int, default=20, help="Média de artigos por currículo (padrão: 20).")
+    argumentos.add_argument(
+        "--trabalhos",
+        type=int,
+        default=10,
+        help="Média de trabalhos por tipo de anais de congresso (padrão: 10).",
+    )
+    argumentos.add_argument(
+        "--orientacoes",
+        type=int,
+        default=6,
+        help="Média de orientações concluídas e em andamento (padrão: 6).",
+    )
+    argumentos.add_argument("--projetos", type=int, default=4, help="Média de projetos por currículo (padrão: 4).")
+    argumentos.add_argument(
+        "--perfil-pln",
+        default="lemas",
+        help="Perfil do modelo spaCy na etapa pln (padrão: lemas).",
+    )
+    argumentos.add_argument(
+        "--campos",
+        nargs="+",
+        help="Na etapa parse, extrai só estes campos do currículo (padrão: todos).",
+    )
+    argumentos.add_argument(
+        "--memoria",
+        action="store_true",
+        help="Mede também o pico de memória de cada extrator com o tracemalloc (parse bem mais lento).",
+    )
+    argumentos.add_argument(
+        "--resultados",
+        help="Arquivo JSON onde gravar as medições, para comparar execuções.",
+    )
+    args = argumentos.parse_args()
+
+    opcoes = {
+        'backend': args.backend,
+        'perfil_pln': args.perfil_pln,
+        'memoria': args.memoria,
+        'campos': args.campos,
+        'tamanhos': {
+            'artigos': args.artigos,
+            'trabalhos': args.trabalhos,
+            'orientacoes': args.orientacoes,
+            'projetos': args.projetos,
+        },
+    }
+    print(f"{'etapa':14} | {'currículos':>10} | {'tempo (s)':>9} | {'currículos/s':>11} | {'pico RSS (MB)':>12}")
+    resultados = executar(sorted(args.tamanhos), args.etapas, opcoes)
+
+    medidas_parse = [resultado for resultado in resultados if resultado['etapa'] == 'parse' and 'detalhes' in resultado]
+    if medidas_parse:
+        imprimir_extratores(medidas_parse[-1])
+
+    if args.resultados:
+        json_io.gravar(args.resultados, {'opcoes': opcoes, 'resultados': resultados}, indentar=True)
+
+
+if __name__ == "__main__":
+    main()
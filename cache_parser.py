@@ -0,0 +1,103 @@
+"""
+Cache persistente dos resultados do LattesParser.
+
+Cada entrada é identificada pelo ID Lattes, pelo hash do HTML e pela versão
+do parser (VERSAO_PARSER em parser.py). Se o HTML baixado não mudou e o parser
+é o mesmo, o JSON guardado é reaproveitado e parse() não é executado.
+
+O cache é um arquivo SQLite em modo WAL, o que permite que os processos do
+pool consultem o cache enquanto o processo principal grava novas entradas.
+"""
+
+import hashlib
+import sqlite3
+import time
+
+import json_io
+
+
+def hash_conteudo(html_content):
+    return hashlib.sha1(html_content.encode('utf-8')).hexdigest()
+
+
+class CacheParser:
+
+    def __init__(self, caminho, versao, somente_leitura=False):
+        self.caminho = str(caminho)
+        self.versao = str(versao)
+        self.somente_leitura = somente_leitura
+
+        if somente_leitura:
+            self.conexao = sqlite3.connect(f"file:{self.caminho}?mode=ro", uri=True)
+        else:
+            self.conexao = sqlite3.connect(self.caminho)
+            self.conexao.execute("PRAGMA journal_mode=WAL")
+            self.conexao.execute(
+                """
+                CREATE TABLE IF NOT EXISTS curriculos (
+                    id_lattes TEXT PRIMARY KEY,
+                    hash_html TEXT NOT NULL,
+                    versao TEXT NOT NULL,
+                    dados TEXT NOT NULL,
+                    tamanho INTEGER NOT NULL,
+                    criado_em REAL NOT NULL,
+                    usado_em REAL NOT NULL
+                )
+                """
+            )
+            self.conexao.commit()
+
+    def buscar(self, id_lattes, hash_html):
+        """Devolve os dados guardados ou None se o HTML ou a versão do parser mudaram."""
+        linha = self.conexao.execute(
+            "SELECT dados FROM curriculos WHERE id_lattes = ? AND hash_html = ? AND versao = ?",
+            (id_lattes, hash_html, self.versao),
+        ).fetchone()
+        return json_io.loads(linha[0]) if linha else None
+
+    def guardar(self, id_lattes, hash_html, dados):
+        texto = json_io.dumps(dados).decode('utf-8')
+        agora = time.time()
+        self.conexao.execute(
+            "INSERT OR REPLACE INTO curriculos VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (id_lattes, hash_html, self.versao, texto, len(texto.encode('utf-8')), agora, agora),
+        )
+
+    def registrar_uso(self, ids_lattes):
+        agora = time.time()
+        self.conexao.executemany(
+            "UPDATE curriculos SET usado_em = ? WHERE id_lattes = ?",
+            [(agora, id_lattes) for id_lattes in ids_lattes],
+        )
+
+    def remover_expirados(self, max_idade_dias):
+        """Remove as entradas que não são usadas há mais de `max_idade_dias`."""
+        limite = time.time() - max_idade_dias * 86400
+        cursor = self.conexao.execute("DELETE FROM curriculos WHERE usado_em < ?", (limite,))
+        return cursor.rowcount
+
+    def limitar_tamanho(self, max_bytes):
+        """Remove as entradas usadas há mais tempo até o total de dados caber em `max_bytes`."""
+        total = self.conexao.execute("SELECT COALESCE(SUM(tamanho), 0) FROM curriculos").fetchone()[0]
+        if total <= max_bytes:
+            return 0
+
+        removidos = []
+        for id_lattes, tamanho in self.conexao.execute(
+            "SELECT id_lattes, tamanho FROM curriculos ORDER BY usado_em"
+        ).fetchall():
+            if total <= max_bytes:
+                break
+            removidos.append((id_lattes,))
+            total -= tamanho
+
+        self.conexao.executemany("DELETE FROM curriculos WHERE id_lattes = ?", removidos)
+        return len(removidos)
+
+    def commit(self):
+        if not self.somente_leitura:
+            self.conexao.commit()
+
+    def close(self):
+        self.commit()
+        self.conexao.close()
@@ -0,0 +1,447 @@
+"""
+Coleta dos currículos Lattes: obtém o HTML de uma lista de IDs (baixando-o
+ou lendo-o da pasta local) e o entrega ao parser, sobrepondo E/S e análise.
+
+Os downloads rodam no asyncio. Um semáforo limita as requisições simultâneas.
+Erros de rede, 429 e 5xx geram novas tentativas com espera exponencial e
+jitter, e o Retry-After é respeitado. O urllib é bloqueante, então cada
+requisição e cada leitura ou gravação de arquivo roda numa thread
+(asyncio.to_thread). Os HTMLs obtidos entram numa asyncio.Queue limitada, e as
+tarefas que a consomem mandam o parse para um ProcessPoolExecutor e gravam o
+JSON. Os próximos currículos são baixados enquanto os anteriores são analisados.
+
+ServidorLocal serve por HTTP, em 127.0.0.1, uma pasta de HTMLs salvos, com
+atraso e falhas opcionais. Ele permite testar a coleta sem acessar o Lattes.
+
+Uso:
+    python coletor.py coletar --ids ids.txt [--url URL] [--html curriculos] [--saida curriculos_json]
+    python coletor.py servir [--pasta curriculos] [--porta 8000] [--falhas 1] [--atraso 0.05]
+
+Exemplo contra o servidor local:
+    python coletor.py servir --pasta curriculos --porta 8000 --falhas 1 &
+    python coletor.py coletar --ids ids.txt --url 'http://127.0.0.1:8000/{id_lattes}' --html /tmp/html
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import parser
+
+logger = logging.getLogger(__name__)
+
+URL_PADRAO = 'http://lattes.cnpq.br/{id_lattes}'
+AGENTE = 'iniciacao-cientifica-coletor/1.0'
+
+# Respostas que costumam passar com uma nova tentativa
+STATUS_TEMPORARIOS = {408, 425, 429, 500, 502, 503, 504}
+
+
+def _baixar(url, tempo_limite):
+    # Executado numa thread: o urllib bloqueia
+    requisicao = urllib.request.Request(url, headers={'User-Agent': AGENTE})
+    with urllib.request.urlopen(requisicao, timeout=tempo_limite) as resposta:
+        conteudo = resposta.read()
+        codificacao = resposta.headers.get_content_charset() or 'utf-8'
+    return conteudo.decode(codificacao, errors='replace')
+
+
+def _temporario(erro):
+    # HTTPError é subclasse de URLError: o status decide antes
+    if isinstance(erro, urllib.error.HTTPError):
+        return erro.code in STATUS_TEMPORARIOS
+    return isinstance(erro, (urllib.error.URLError, TimeoutError, ConnectionError))
+
+
+def _espera(erro, tentativa, espera):
+    atraso = espera * 2 ** (tentativa - 1) * random.uniform(0.5, 1.5)
+    if isinstance(erro, urllib.error.HTTPError):
+        pedido = (erro.headers.get('Retry-After') or '').strip()
+        if pedido.isdigit():
+            atraso = max(atraso, int(pedido))
+    return atraso
+
+
+async def baixar(url, semaforo, tentativas=4, espera=0.5, tempo_limite=30):
+    """
+    Baixa `url` com até `tentativas` tentativas e devolve (html, tentativas
+    usadas). Erros permanentes (404, por exemplo) são relançados na hora.
+    """
+    for tentativa in range(1, tentativas + 1):
+        try:
+            async with semaforo:
+                return await asyncio.to_thread(_baixar, url, tempo_limite), tentativa
+        except Exception as erro:
+            if tentativa == tentativas or not _temporario(erro):
+                raise
+            atraso = _espera(erro, tentativa, espera)
+            logger.info("%s: %s; nova tentativa em %.2fs.", url, erro, atraso)
+            # A espera fica fora do semáforo, para não segurar a vaga de outra requisição
+            await asyncio.sleep(atraso)
+
+
+def _gravar_html(caminho, html):
+    # Atômico, como o json_io.gravar: o parser nunca lê um HTML pela metade
+    caminho = Path(caminho)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    temporario = caminho.with_name(f".{caminho.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        temporario.write_text(html, encoding='utf-8')
+        os.replace(temporario, caminho)
+    except BaseException:
+        temporario.unlink(missing_ok=True)
+        raise
+
+
+async def obter_html(id_lattes, semaforo, url=URL_PADRAO, pasta_html=None, baixar_de_novo=False, **opcoes):
+    """
+    Devolve (html, origem, tentativas) do currículo `id_lattes`. O HTML vem
+    de <pasta_html>/<id_lattes> quando o arquivo existe, e é baixado de `url`
+    nos outros casos (ou sempre, com `baixar_de_novo`). Um HTML baixado é
+    salvo na pasta. `url` None desativa o download. `opcoes` vai para baixar().
+    """
+    caminho = Path(pasta_html) / id_lattes if pasta_html else None
+    if caminho is not None and not baixar_de_novo and caminho.is_file():
+        return await asyncio.to_thread(caminho.read_text, encoding='utf-8'), 'local', 0
+    if url is None:
+        raise FileNotFoundError(f"{caminho or id_lattes} não existe e o download está desativado")
+
+    html, tentativas = await baixar(url.format(id_lattes=id_lattes), semaforo, **opcoes)
+    if caminho is not None:
+        await asyncio.to_thread(_gravar_html, caminho, html)
+    return html, 'baixado', tentativas
+
+
+async def coletar(
+    ids,
+    pasta_saida,
+    url=URL_PADRAO,
+    pasta_html=None,
+    concorrencia=8,
+    workers=None,
+    backend='bs4',
+    tentativas=4,
+    espera=0.5,
+    tempo_limite=30,
+    baixar_de_novo=False,
+    pendentes=32,
+    indentar=False,
+    extensao='.json',
+):
+    """
+    Obtém e converte os currículos de `ids` e grava um JSON por currículo em
+    `pasta_saida`, como o parser.py. Devolve o resumo, no formato do
+    converter_curriculos() e com as contagens da coleta.
+
+    No máximo `concorrencia` requisições HTTP ficam abertas ao mesmo tempo. A
+    fila entre a coleta e o parse tem no máximo `pendentes` HTMLs, o que
+    limita a memória quando o download é mais rápido que a análise. O parse
+    roda em `workers` processos (padrão: número de CPUs).
+    """
+    pasta_saida = Path(pasta_saida)
+    pasta_saida.mkdir(parents=True, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+
+    resumo = {
+        'total': len(ids),
+        'convertidos': 0,
+        'falhas': [],
+        'baixados': 0,
+        'locais': 0,
+        'novas_tentativas': 0,
+    }
+    estatisticas = []
+    semaforo = asyncio.Semaphore(concorrencia)
+    fila = asyncio.Queue(maxsize=pendentes)
+    restantes = iter(ids)
+    opcoes = {'tentativas': tentativas, 'espera': espera, 'tempo_limite': tempo_limite}
+
+    async def coletor():
+        # Vaga do semáforo ociosa durante a espera de uma nova tentativa: há
+        # mais coletores que vagas para que outro currículo a aproveite
+        for id_lattes in restantes:
+            try:
+                html, origem, usadas = await obter_html(
+                    id_lattes, semaforo, url, pasta_html, baixar_de_novo, **opcoes
+                )
+            except Exception as e:
+                resumo['falhas'].append((id_lattes, f"{type(e).__name__}: {e}"))
+                continue
+            resumo['baixados' if origem == 'baixado' else 'locais'] += 1
+            resumo['novas_tentativas'] += max(usadas - 1, 0)
+            await fila.put((id_lattes, html))
+
+    async def analisador(executor):
+        laco = asyncio.get_running_loop()
+        while True:
+            item = await fila.get()
+            if item is None:
+                return
+            id_lattes, html = item
+            try:
+                dados, estatistica = await laco.run_in_executor(executor, parser.analisar, html, backend)
+                await asyncio.to_thread(parser.salvar_json, dados, pasta_saida, indentar, extensao)
+            except Exception as e:
+                resumo['falhas'].append((id_lattes, f"{type(e).__name__}: {e}"))
+                continue
+            resumo['convertidos'] += 1
+            estatisticas.append(estatistica)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        analisadores = [asyncio.create_task(analisador(executor)) for _ in range(workers)]
+        try:
+            await asyncio.gather(*(coletor() for _ in range(2 * concorrencia)))
+            for _ in analisadores:
+                await fila.put(None)
+            await asyncio.gather(*analisadores)
+        finally:
+            for tarefa in analisadores:
+                tarefa.cancel()
+
+    resumo['estatisticas'] = parser.resumir_estatisticas(estatisticas)
+    return resumo
+
+
+class _ManipuladorCurriculos(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        servidor = self.server.servidor_local
+        id_lattes = self.path.split('?', 1)[0].strip('/')
+        with servidor._trava:
+            servidor.requisicoes[id_lattes] += 1
+            numero = servidor.requisicoes[id_lattes]
+        if servidor.atraso:
+            time.sleep(servidor.atraso)
+
+        if numero <= servidor.falhas:
+            self.send_error(503, "Falha simulada")
+            return
+        caminho = servidor.pasta / id_lattes
+        # Só nomes simples de arquivo: nada de subpastas nem '..'
+        if not id_lattes or Path(id_lattes).name != id_lattes or id_lattes.startswith('.') or not caminho.is_file():
+            self.send_error(404, "Currículo não encontrado")
+            return
+
+        conteudo = caminho.read_bytes()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(conteudo)))
+        self.end_headers()
+        self.wfile.write(conteudo)
+
+    def log_message(self, formato, *args):
+        logger.debug("%s %s", self.address_string(), formato % args)
+
+
+class ServidorLocal:
+    """
+    Servidor HTTP em 127.0.0.1 que responde GET /<id_lattes> com o arquivo
+    <pasta>/<id_lattes> (404 se ele não existir). Substitui o Lattes nos
+    testes da coleta. As `falhas` primeiras requisições de cada ID recebem 503, e
+    toda resposta espera `atraso` segundos. Assim se simula um servidor lento
+    e instável.
+
+    Uso:
+        with ServidorLocal('curriculos', falhas=1) as servidor:
+            resumo = asyncio.run(coletar(ids, 'saida', url=servidor.url, espera=0.01))
+        servidor.requisicoes  # Counter de requisições por ID
+
+    Com `porta` 0 o sistema escolhe uma porta livre.
+    """
+
+    def __init__(self, pasta, porta=0, falhas=0, atraso=0.0):
+        self.pasta = Path(pasta)
+        self.falhas = falhas
+        self.atraso = atraso
+        self.requisicoes = Counter()
+        self._trava = threading.Lock()
+        self._http = ThreadingHTTPServer(('127.0.0.1', porta), _ManipuladorCurriculos)
+        self._http.daemon_threads = True
+        self._http.servidor_local = self
+        self._thread = None
+
+    @property
+    def porta(self):
+        return self._http.server_address[1]
+
+    @property
+    def url(self):
+        """Modelo de URL para coletar()."""
+        return f"http://127.0.0.1:{self.porta}/{{id_lattes}}"
+
+    def iniciar(self):
+        self._thread = threading.Thread(target=self._http.serve_forever, name="ServidorLocal", daemon=True)
+        self._thread.start()
+        return self
+
+    def parar(self):
+        self._http.shutdown()
+        self._http.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, tipo, valor, rastro):
+        self.parar()
+
+
+def main():
+    argumentos = argparse.ArgumentParser(
+        description="Baixa (ou lê) os HTMLs dos currículos Lattes e os converte em JSON, sobrepondo E/S e parse."
+    )
+    argumentos.add_argument(
+        "--log",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        default="WARNING",
+        help="Nível das mensagens; INFO inclui as novas tentativas (padrão: WARNING).",
+    )
+    comandos = argumentos.add_subparsers(dest="comando", required=True)
+
+    coleta = comandos.add_parser("coletar", help="Obtém e converte os currículos de uma lista de IDs.")
+    coleta.add_argument("--ids", required=True, help="Arquivo com um ID Lattes por linha.")
+    coleta.add_argument(
+        "--url",
+        default=URL_PADRAO,
+        help=f"Modelo de URL do currículo, com {{id_lattes}} (padrão: {URL_PADRAO}).",
+    )
+    coleta.add_argument(
+        "--sem-download",
+        action="store_true",
+        help="Só lê os HTMLs já presentes em --html; os ausentes contam como falha.",
+    )
+    coleta.add_argument(
+        "--html",
+        default="curriculos",
+        help="Pasta dos HTMLs: os existentes são lidos e os baixados são salvos nela (padrão: curriculos).",
+    )
+    coleta.add_argument(
+        "--baixar-de-novo",
+        action="store_true",
+        help="Baixa todos os currículos, mesmo os que já estão em --html.",
+    )
+    coleta.add_argument(
+        "--saida",
+        default="curriculos_json",
+        help="Pasta onde os JSONs serão gravados (padrão: curriculos_json).",
+    )
+    coleta.add_argument(
+        "--concorrencia",
+        type=int,
+        default=8,
+        help="Máximo de requisições HTTP simultâneas (padrão: 8).",
+    )
+    coleta.add_argument(
+        "--tentativas",
+        type=int,
+        default=4,
+        help="Tentativas por currículo em erros temporários (rede, 429, 5xx) (padrão: 4).",
+    )
+    coleta.add_argument(
+        "--espera",
+        type=float,
+        default=0.5,
+        help="Espera base, em segundos, antes da segunda tentativa; dobra a cada nova tentativa (padrão: 0.5).",
+    )
+    coleta.add_argument(
+        "--tempo-limite",
+        type=float,
+        default=30,
+        help="Tempo limite de cada requisição, em segundos (padrão: 30).",
+    )
+    coleta.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Número de processos de parse (padrão: número de CPUs).",
+    )
+    coleta.add_argument(
+        "--backend",
+        choices=sorted(parser.BACKENDS),
+        default="bs4",
+        help="Motor de parsing: bs4 (BeautifulSoup) ou lxml (padrão: bs4).",
+    )
+    coleta.add_argument(
+        "--estatisticas",
+        action="store_true",
+        help="Mostra ao final o tempo de cada extrator no lote (total, p50 e p95).",
+    )
+
+    servidor = comandos.add_parser("servir", help="Serve uma pasta de HTMLs salvos como um Lattes local.")
+    servidor.add_argument(
+        "--pasta",
+        default="curriculos",
+        help="Pasta com os HTMLs, um arquivo por ID Lattes (padrão: curriculos).",
+    )
+    servidor.add_argument("--porta", type=int, default=8000, help="Porta em 127.0.0.1 (padrão: 8000).")
+    servidor.add_argument(
+        "--falhas",
+        type=int,
+        default=0,
+        help="Responde 503 às primeiras N requisições de cada ID (padrão: 0).",
+    )
+    servidor.add_argument(
+        "--atraso",
+        type=float,
+        default=0.0,
+        help="Atraso de cada resposta, em segundos (padrão: 0).",
+    )
+    args = argumentos.parse_args()
+    logging.basicConfig(level=args.log, format="%(levelname)s %(name)s: %(message)s")
+
+    if args.comando == "servir":
+        with ServidorLocal(args.pasta, args.porta, args.falhas, args.atraso) as servidor_local:
+            print(f"Servindo {args.pasta} em {servidor_local.url} (Ctrl+C para parar)")
+            try:
+                threading.Event().wait()
+            except KeyboardInterrupt:
+                pass
+        return
+
+    ids = parser.ler_ids(args.ids)
+    if not ids:
+        raise SystemExit(f"Nenhum ID em {args.ids}")
+
+    inicio = time.perf_counter()
+    resumo = asyncio.run(
+        coletar(
+            ids,
+            args.saida,
+            url=None if args.sem_download else args.url,
+            pasta_html=args.html,
+            concorrencia=max(1, args.concorrencia),
+            workers=args.workers,
+            backend=args.backend,
+            tentativas=max(1, args.tentativas),
+            espera=args.espera,
+            tempo_limite=args.tempo_limite,
+            baixar_de_novo=args.baixar_de_novo,
+        )
+    )
+
+    print(f"Concluído em {time.perf_counter() - inicio:.2f}s.")
+    print(f"Total: {resumo['total']} | Convertidos: {resumo['convertidos']} | Falhas: {len(resumo['falhas'])}")
+    print(
+        f"Baixados: {resumo['baixados']} | Lidos de {args.html}: {resumo['locais']}"
+        f" | Novas tentativas: {resumo['novas_tentativas']}"
+    )
+    for id_lattes, erro in resumo['falhas']:
+        print(f"  {id_lattes}: {erro}")
+
+    if args.estatisticas and resumo['estatisticas']:
+        print()
+        print(parser.tabela_estatisticas(resumo['estatisticas']))
+
+
+if __name__ == "__main__":
+    main()
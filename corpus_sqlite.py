@@ -0,0 +1,348 @@
+"""
+Corpus de currículos num único arquivo SQLite, em tabelas normalizadas.
+
+Alternativa à pasta com um JSON por currículo (parser.py --formato sqlite).
+Cada currículo é dividido em:
+
+    pesquisadores   uma linha por currículo; listas de textos em colunas JSON
+    artigos         listaPB (uma linha por artigo)
+    colaboradores   colaboradores de cada artigo
+    projetos        projetos de pesquisa
+    orientacoes     orientações concluídas e em andamento
+
+curriculos(campos=...) remonta os dicts no mesmo formato dos JSONs lendo só as
+colunas e tabelas dos campos pedidos; as tabelas são lidas em ordem de
+id_lattes e juntas numa única passada, sem uma consulta por currículo.
+
+A coluna `chaves` guarda as chaves do currículo na ordem original e `nulos`
+as seções guardadas em tabelas cujo valor era None, para que um campo ausente,
+um None e uma lista vazia voltem como eram: json_io.dumps do currículo lido é
+igual ao do gravado (ver paridade_sqlite.py). Dentro dos itens, uma
+orientação com id_lattes None volta sem a chave id_lattes.
+"""
+
+import sqlite3
+from itertools import groupby
+from operator import itemgetter
+
+import json_io
+
+# Ordem das chaves nos JSONs gravados pelo parser
+ORDEM_CAMPOS = [
+    '_id',
+    'nome_completo',
+    'endereco',
+    'area_de_atuacao',
+    'listaPB',
+    'producao_revistas',
+    'trabalhos_completos',
+    'resumos_expandidos',
+    'resumos_publicados',
+    'orientacoes_concluidas',
+    'orientacoes_em_andamento',
+    'projetos',
+    'listaNomesCitacao',
+    'linhas_pesquisa',
+]
+# Campos guardados em colunas de texto simples e em colunas JSON da tabela pesquisadores
+CAMPOS_TEXTO = ('nome_completo', 'endereco')
+CAMPOS_JSON = (
+    'area_de_atuacao',
+    'producao_revistas',
+    'trabalhos_completos',
+    'resumos_expandidos',
+    'resumos_publicados',
+    'listaNomesCitacao',
+    'linhas_pesquisa',
+)
+SECOES_ORIENTACAO = ('orientacoes_concluidas', 'orientacoes_em_andamento')
+# Campos guardados em tabelas próprias, que não distinguem None de lista vazia
+CAMPOS_TABELA = ('listaPB', 'projetos', *SECOES_ORIENTACAO)
+# Colunas acrescentadas depois da primeira versão da tabela pesquisadores
+COLUNAS_NOVAS = ('chaves', 'nulos')
+
+
+def _por_pesquisador(cursor):
+    # Linhas ordenadas por id_lattes (primeira coluna) -> função que devolve as linhas de um id;
+    # os ids precisam ser pedidos em ordem crescente, como na leitura de pesquisadores
+    grupos = groupby(cursor, key=itemgetter(0))
+    atual = next(grupos, None)
+
+    def linhas_de(id_lattes):
+        nonlocal atual
+        while atual is not None and atual[0] < id_lattes:
+            atual = next(grupos, None)
+        if atual is None or atual[0] != id_lattes:
+            return []
+        linhas = list(atual[1])
+        atual = next(grupos, None)
+        return linhas
+
+    return linhas_de
+
+
+class CorpusSQLite:
+
+    def __init__(self, caminho):
+        self.caminho = str(caminho)
+        self.conexao = sqlite3.connect(self.caminho)
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        colunas_json = ", ".join(f"{campo} TEXT" for campo in CAMPOS_JSON)
+        self.conexao.executescript(
+            f"""
+            CREATE TABLE IF NOT EXISTS pesquisadores (
+                id_lattes TEXT PRIMARY KEY,
+                nome_completo TEXT,
+                endereco TEXT,
+                {colunas_json},
+                outros TEXT,
+                chaves TEXT,
+                nulos TEXT
+            );
+            CREATE TABLE IF NOT EXISTS artigos (
+                id_lattes TEXT NOT NULL,
+                posicao INTEGER NOT NULL,
+                doi TEXT,
+                titulo TEXT,
+                texto_completo TEXT,
+                PRIMARY KEY (id_lattes, posicao)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS colaboradores (
+                id_lattes TEXT NOT NULL,
+                artigo INTEGER NOT NULL,
+                posicao INTEGER NOT NULL,
+                nome TEXT,
+                id_colaborador TEXT,
+                PRIMARY KEY (id_lattes, artigo, posicao)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS projetos (
+                id_lattes TEXT NOT NULL,
+                posicao INTEGER NOT NULL,
+                periodo TEXT,
+                titulo TEXT,
+                PRIMARY KEY (id_lattes, posicao)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS orientacoes (
+                id_lattes TEXT NOT NULL,
+                secao TEXT NOT NULL,
+                posicao INTEGER NOT NULL,
+                aluno TEXT,
+                titulo TEXT,
+                ano TEXT,
+                id_orientando TEXT,
+                PRIMARY KEY (id_lattes, secao, posicao)
+            ) WITHOUT ROWID;
+            """
+        )
+        # Corpus gravado antes de `chaves` e `nulos`: as linhas antigas voltam na ordem de ORDEM_CAMPOS
+        existentes = {linha[1] for linha in self.conexao.execute("PRAGMA table_info(pesquisadores)")}
+        for coluna in COLUNAS_NOVAS:
+            if coluna not in existentes:
+                self.conexao.execute(f"ALTER TABLE pesquisadores ADD COLUMN {coluna} TEXT")
+        self.conexao.commit()
+
+    def __len__(self):
+        return self.conexao.execute("SELECT COUNT(*) FROM pesquisadores").fetchone()[0]
+
+    def gravar(self, dados):
+        """Grava (ou substitui) um currículo no formato dos JSONs do parser."""
+        id_lattes = dados.get('_id')
+        if not id_lattes:
+            raise ValueError("Currículo sem '_id'; não é possível gravá-lo no corpus.")
+
+        self.remover(id_lattes)
+        outros = {chave: valor for chave, valor in dados.items() if chave not in ORDEM_CAMPOS}
+        nulos = [campo for campo in CAMPOS_TABELA if campo in dados and dados[campo] is None]
+        colunas = ('id_lattes', *CAMPOS_TEXTO, *CAMPOS_JSON, 'outros', *COLUNAS_NOVAS)
+        self.conexao.execute(
+            f"INSERT INTO pesquisadores ({', '.join(colunas)}) VALUES ({', '.join('?' * len(colunas))})",
+            (
+                id_lattes,
+                *(dados.get(campo) for campo in CAMPOS_TEXTO),
+                *(json_io.dumps(dados[campo]).decode('utf-8') if campo in dados else None for campo in CAMPOS_JSON),
+                json_io.dumps(outros).decode('utf-8') if outros else None,
+                json_io.dumps(list(dados)).decode('utf-8'),
+                json_io.dumps(nulos).decode('utf-8') if nulos else None,
+            ),
+        )
+
+        artigos = dados.get('listaPB') or []
+        self.conexao.executemany(
+            "INSERT INTO artigos VALUES (?, ?, ?, ?, ?)",
+            [
+                (id_lattes, posicao, artigo.get('doi'), artigo.get('titulo'), artigo.get('texto_completo'))
+                for posicao, artigo in enumerate(artigos)
+            ],
+        )
+        self.conexao.executemany(
+            "INSERT INTO colaboradores VALUES (?, ?, ?, ?, ?)",
+            [
+                (id_lattes, posicao, indice, colaborador.get('nome'), colaborador.get('id_lattes'))
+                for posicao, artigo in enumerate(artigos)
+                for indice, colaborador in enumerate(artigo.get('colaboradores') or [])
+            ],
+        )
+        self.conexao.executemany(
+            "INSERT INTO projetos VALUES (?, ?, ?, ?)",
+            [
+                (id_lattes, posicao, projeto.get('periodo'), projeto.get('titulo'))
+                for posicao, projeto in enumerate(dados.get('projetos') or [])
+            ],
+        )
+        self.conexao.executemany(
+            "INSERT INTO orientacoes VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    id_lattes, secao, posicao, orientacao.get('aluno'), orientacao.get('titulo'),
+                    orientacao.get('ano'), orientacao.get('id_lattes'),
+                )
+                for secao in SECOES_ORIENTACAO
+                for posicao, orientacao in enumerate(dados.get(secao) or [])
+            ],
+        )
+
+    def remover(self, id_lattes):
+        for tabela in ('pesquisadores', 'artigos', 'colaboradores', 'projetos', 'orientacoes'):
+            self.conexao.execute(f"DELETE FROM {tabela} WHERE id_lattes = ?", (id_lattes,))
+
+    def linhas_de_ids(self, dados):
+        """
+        Linhas de UPDATE com os id_lattes de colaboradores e orientandos de um
+        currículo: (colaboradores, orientacoes), para gravar_ids.
+        """
+        id_lattes = dados['_id']
+        colaboradores = [
+            (colaborador.get('id_lattes'), id_lattes, posicao, indice)
+            for posicao, artigo in enumerate(dados.get('listaPB') or [])
+            for indice, colaborador in enumerate(artigo.get('colaboradores') or [])
+        ]
+        orientacoes = [
+            (orientacao.get('id_lattes'), id_lattes, secao, posicao)
+            for secao in SECOES_ORIENTACAO
+            for posicao, orientacao in enumerate(dados.get(secao) or [])
+        ]
+        return colaboradores, orientacoes
+
+    def gravar_ids(self, colaboradores, orientacoes):
+        """Atualiza só os id_lattes preenchidos (linhas de linhas_de_ids), sem regravar o currículo."""
+        self.conexao.executemany(
+            "UPDATE colaboradores SET id_colaborador = ? WHERE id_lattes = ? AND artigo = ? AND posicao = ?",
+            colaboradores,
+        )
+        self.conexao.executemany(
+            "UPDATE orientacoes SET id_orientando = ? WHERE id_lattes = ? AND secao = ? AND posicao = ?",
+            orientacoes,
+        )
+
+    def curriculos(self, campos=None, id_lattes=None):
+        """
+        Gera os currículos em ordem de id_lattes, como dicts no formato dos JSONs.
+
+        Com `campos`, só esses campos (e o '_id') são lidos: as demais colunas
+        e tabelas nem são consultadas. Com `id_lattes`, só esse currículo.
+        """
+        campos = ORDEM_CAMPOS if campos is None else [
+            campo for campo in ORDEM_CAMPOS if campo == '_id' or campo in campos
+        ]
+        colunas = [campo for campo in campos if campo in CAMPOS_TEXTO or campo in CAMPOS_JSON]
+        extras = campos is ORDEM_CAMPOS
+        filtro, parametros = ("WHERE id_lattes = ?", (id_lattes,)) if id_lattes is not None else ("", ())
+
+        def consultar(colunas_sql, tabela, ordem):
+            return self.conexao.execute(
+                f"SELECT {colunas_sql} FROM {tabela} {filtro} ORDER BY {ordem}", parametros
+            )
+
+        pesquisadores = consultar(
+            ", ".join(['id_lattes', *colunas, *COLUNAS_NOVAS, *(['outros'] if extras else [])]),
+            'pesquisadores',
+            'id_lattes',
+        )
+
+        artigos = colaboradores = projetos = orientacoes = None
+        if 'listaPB' in campos:
+            artigos = _por_pesquisador(consultar(
+                "id_lattes, posicao, doi, titulo, texto_completo", 'artigos', 'id_lattes, posicao'
+            ))
+            colaboradores = _por_pesquisador(consultar(
+                "id_lattes, artigo, nome, id_colaborador", 'colaboradores', 'id_lattes, artigo, posicao'
+            ))
+        if 'projetos' in campos:
+            projetos = _por_pesquisador(consultar("id_lattes, periodo, titulo", 'projetos', 'id_lattes, posicao'))
+        if any(secao in campos for secao in SECOES_ORIENTACAO):
+            orientacoes = _por_pesquisador(consultar(
+                "id_lattes, secao, aluno, titulo, ano, id_orientando", 'orientacoes', 'id_lattes, secao, posicao'
+            ))
+
+        for linha in pesquisadores:
+            id_lattes = linha[0]
+            valores = dict(zip([*colunas, *COLUNAS_NOVAS], linha[1:]))
+            chaves = json_io.loads(valores['chaves']) if valores['chaves'] else None
+            nulos = json_io.loads(valores['nulos']) if valores['nulos'] else ()
+            # As duas seções de orientação vêm da mesma consulta
+            por_secao = self._montar_orientacoes(orientacoes(id_lattes)) if orientacoes else {}
+            dados = {}
+            for campo in campos:
+                if campo == '_id':
+                    dados['_id'] = id_lattes
+                elif chaves is not None and campo not in chaves:
+                    continue
+                elif campo in nulos:
+                    dados[campo] = None
+                elif campo in CAMPOS_TEXTO:
+                    # Com `chaves`, NULL é um None gravado; sem ela, um campo ausente
+                    if valores[campo] is not None or chaves is not None:
+                        dados[campo] = valores[campo]
+                elif campo in CAMPOS_JSON:
+                    if valores[campo] is not None:
+                        dados[campo] = json_io.loads(valores[campo])
+                elif campo == 'listaPB':
+                    dados['listaPB'] = self._montar_artigos(artigos(id_lattes), colaboradores(id_lattes))
+                elif campo == 'projetos':
+                    dados['projetos'] = [
+                        {'periodo': periodo, 'titulo': titulo} for _, periodo, titulo in projetos(id_lattes)
+                    ]
+                elif campo in SECOES_ORIENTACAO:
+                    dados[campo] = por_secao.get(campo, [])
+
+            if extras and linha[-1]:
+                dados.update(json_io.loads(linha[-1]))
+            if chaves is not None:
+                dados = {chave: dados[chave] for chave in chaves if chave in dados}
+            yield dados
+
+    def ler(self, id_lattes, campos=None):
+        """Um único currículo (ou None)."""
+        return next(self.curriculos(campos, id_lattes), None)
+
+    @staticmethod
+    def _montar_artigos(artigos, colaboradores):
+        por_artigo = {}
+        for _, artigo, nome, id_colaborador in colaboradores:
+            por_artigo.setdefault(artigo, []).append({'nome': nome, 'id_lattes': id_colaborador})
+        return [
+            {
+                'doi': doi,
+                'titulo': titulo,
+                'colaboradores': por_artigo.get(posicao, []),
+                'texto_completo': texto_completo,
+            }
+            for _, posicao, doi, titulo, texto_completo in artigos
+        ]
+
+    @staticmethod
+    def _montar_orientacoes(linhas):
+        secoes = {}
+        for _, secao, aluno, titulo, ano, id_orientando in linhas:
+            orientacao = {'aluno': aluno, 'titulo': titulo, 'ano': ano}
+            if id_orientando is not None:
+                orientacao['id_lattes'] = id_orientando
+            secoes.setdefault(secao, []).append(orientacao)
+        return secoes
+
+    def commit(self):
+        self.conexao.commit()
+
+    def close(self):
+        self.commit()
+        self.conexao.close()
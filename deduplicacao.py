@@ -0,0 +1,200 @@
+"""
+Deduplicação dos artigos (listaPB) entre currículos.
+
+O mesmo artigo aparece na listaPB de cada coautor, cada vez com o seu
+texto_completo. Numa única passada pelos JSONs, cada artigo é casado com um
+artigo canônico primeiro pelo DOI e, se não houver DOI, pelo hash do título
+normalizado (sem acentos, caixa e pontuação). Um título só casa com um artigo
+canônico de DOI diferente se um dos dois não tiver DOI, e só se o ano de
+publicação ou pelo menos um colaborador coincidir. O título que o parser grava
+quando não consegue dividir a citação não é usado. Os colaboradores de todas
+as ocorrências são unidos pelo id_lattes (ou pelo nome normalizado).
+
+Saída:
+    artigos.jsonl     um artigo canônico por linha
+    ocorrencias.csv   id_lattes do currículo, posição na listaPB, id do artigo canônico
+
+Uso:
+    python deduplicacao.py [--entrada curriculos_json] [--saida artigos_dedup]
+"""
+
+import argparse
+import csv
+import hashlib
+from pathlib import Path
+
+import json_io
+from filling_idlattes import normalizar_nome
+from normalizacao import ANO, TERMO, TITULO_NAO_IDENTIFICADO, normalizar_doi, remover_acentos
+
+
+def hash_titulo(titulo):
+    """Hash curto do título normalizado; '' quando o título não tem palavras ou não foi identificado."""
+    if not titulo or titulo == TITULO_NAO_IDENTIFICADO:
+        return ''
+    palavras = TERMO.findall(remover_acentos(titulo).lower())
+    if not palavras:
+        return ''
+    return hashlib.blake2b(' '.join(palavras).encode('utf-8'), digest_size=8).hexdigest()
+
+
+def ano_publicacao(texto_completo):
+    """Último ano da citação, como em grafo_coautoria; '' se não houver."""
+    anos = ANO.findall(texto_completo or '')
+    return anos[-1] if anos else ''
+
+
+def _chaves_colaboradores(colaboradores):
+    chaves = set()
+    for colaborador in colaboradores:
+        id_lattes = (colaborador.get('id_lattes') or '').strip()
+        if id_lattes:
+            chaves.add(id_lattes)
+        chave_nome = normalizar_nome((colaborador.get('nome') or '').strip())
+        if chave_nome:
+            chaves.add(chave_nome)
+    return chaves
+
+
+class DeduplicadorArtigos:
+
+    def __init__(self):
+        self.artigos = []
+        self.por_doi = {}
+        # Hash do título -> artigos canônicos com esse título (homônimos de anos e autores diferentes)
+        self.por_titulo = {}
+        # Chaves dos colaboradores já unidos em cada artigo canônico
+        self._autores = []
+        # Anos de publicação vistos em cada artigo canônico
+        self._anos = []
+
+    def adicionar(self, artigo, id_curriculo=''):
+        """Casa um item da listaPB com um artigo canônico (criando-o se preciso) e devolve o id dele."""
+        doi = normalizar_doi(artigo.get('doi'))
+        titulo = hash_titulo(artigo.get('titulo'))
+        ano = ano_publicacao(artigo.get('texto_completo'))
+        colaboradores = artigo.get('colaboradores') or []
+
+        indice = self.por_doi.get(doi) if doi else None
+        if indice is None and titulo:
+            indice = self._casar_titulo(titulo, doi, ano, _chaves_colaboradores(colaboradores))
+
+        if indice is None:
+            indice = len(self.artigos)
+            self.artigos.append(
+                {
+                    'id': indice,
+                    'doi': doi,
+                    'titulo': artigo.get('titulo', ''),
+                    'hash_titulo': titulo,
+                    'texto_completo': artigo.get('texto_completo', ''),
+                    'colaboradores': [],
+                    'curriculos': [],
+                }
+            )
+            self._autores.append({})
+            self._anos.append(set())
+
+        canonico = self.artigos[indice]
+        if doi and not canonico['doi']:
+            canonico['doi'] = doi
+        if doi:
+            self.por_doi.setdefault(doi, indice)
+        if titulo and indice not in self.por_titulo.setdefault(titulo, []):
+            self.por_titulo[titulo].append(indice)
+        if ano:
+            self._anos[indice].add(ano)
+        if id_curriculo and id_curriculo not in canonico['curriculos']:
+            canonico['curriculos'].append(id_curriculo)
+        self._unir_colaboradores(indice, colaboradores)
+        return indice
+
+    def _casar_titulo(self, titulo, doi, ano, chaves):
+        # Só o título não basta: o ano ou algum colaborador também precisa coincidir
+        for candidato in self.por_titulo.get(titulo, ()):
+            if doi and self.artigos[candidato]['doi']:
+                continue
+            if (ano and ano in self._anos[candidato]) or not chaves.isdisjoint(self._autores[candidato]):
+                return candidato
+        return None
+
+    def _unir_colaboradores(self, indice, colaboradores):
+        autores = self._autores[indice]
+        lista = self.artigos[indice]['colaboradores']
+        for colaborador in colaboradores:
+            nome = (colaborador.get('nome') or '').strip()
+            id_lattes = (colaborador.get('id_lattes') or '').strip()
+            chave_nome = normalizar_nome(nome)
+
+            # Um colaborador já visto pelo id ou pelo nome: só completa o id_lattes que faltava
+            posicao = autores.get(id_lattes) if id_lattes else None
+            if posicao is None:
+                posicao = autores.get(chave_nome)
+            if posicao is None:
+                posicao = len(lista)
+                lista.append({'nome': nome, 'id_lattes': id_lattes})
+            elif id_lattes and not lista[posicao]['id_lattes']:
+                lista[posicao]['id_lattes'] = id_lattes
+
+            if id_lattes:
+                autores.setdefault(id_lattes, posicao)
+            if chave_nome:
+                autores.setdefault(chave_nome, posicao)
+
+
+def deduplicar(caminhos_json, pasta_saida):
+    """Lê cada JSON uma vez, grava artigos.jsonl e ocorrencias.csv e devolve o resumo."""
+    pasta_saida = Path(pasta_saida)
+    pasta_saida.mkdir(parents=True, exist_ok=True)
+
+    deduplicador = DeduplicadorArtigos()
+    ocorrencias = 0
+    with open(pasta_saida / 'ocorrencias.csv', 'w', encoding='utf-8', newline='') as arquivo_csv:
+        escritor = csv.writer(arquivo_csv)
+        escritor.writerow(['id_lattes', 'posicao_listaPB', 'artigo'])
+        for caminho in caminhos_json:
+            dados = json_io.carregar(caminho)
+            id_curriculo = dados.get('_id') or Path(caminho).stem
+            for posicao, artigo in enumerate(dados.get('listaPB') or [], start=1):
+                escritor.writerow([id_curriculo, posicao, deduplicador.adicionar(artigo, id_curriculo)])
+                ocorrencias += 1
+
+    with open(pasta_saida / 'artigos.jsonl', 'wb') as arquivo:
+        for artigo in deduplicador.artigos:
+            arquivo.write(json_io.dumps(artigo) + b'\n')
+
+    return {
+        'ocorrencias': ocorrencias,
+        'artigos': len(deduplicador.artigos),
+        'com_doi': sum(1 for artigo in deduplicador.artigos if artigo['doi']),
+    }
+
+
+def main():
+    argumentos = argparse.ArgumentParser(
+        description="Deduplica os artigos da listaPB entre currículos (DOI e título normalizado)."
+    )
+    argumentos.add_argument(
+        "--entrada",
+        default="curriculos_json",
+        help="Pasta com os JSONs gerados pelo parser (padrão: curriculos_json).",
+    )
+    argumentos.add_argument(
+        "--saida",
+        default="artigos_dedup",
+        help="Pasta onde gravar artigos.jsonl e ocorrencias.csv (padrão: artigos_dedup).",
+    )
+    args = argumentos.parse_args()
+
+    caminhos = json_io.listar_jsons(args.entrada)
+    if not caminhos:
+        raise SystemExit(f"Nenhum JSON encontrado em {args.entrada}")
+
+    resumo = deduplicar(caminhos, args.saida)
+    print(
+        "Ocorrências: {ocorrencias} | artigos únicos: {artigos} | com DOI: {com_doi}".format(**resumo)
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -3,18 +3,29 @@ Preenchedor de IDs: preenche id_lattes ausentes em colaboradores de producoes
 com base na lista de nomes de citacao presente nos JSONs.
 
 Uso:
-	python filling_idlattes.py --folder <pasta-jsons> [--log filled_idlattes_log.csv]
+	python filling_idlattes.py --folder <pasta-jsons> [--log filled_idlattes_log.csv] [--workers N]
 
 O script le todos os JSONs da pasta informada, tenta preencher id_lattes
 quando existe correspondencia unica, e registra cada preenchimento em CSV.
+Com --corpus-db, le e grava direto no corpus SQLite gerado por
+`parser.py --formato sqlite`, apenas com as colunas usadas aqui.
+
+Nomes que casam com mais de um id_lattes sao desempatados com evidencias do
+proprio corpus (DOI, coautores em comum, areas de atuacao); a coluna
+"evidence" do log registra o motivo. Use --no-disambiguation para desligar.
 """
 
 import argparse
 import csv
-import json
-import re
+import multiprocessing
+import shutil
+import sqlite3
 from pathlib import Path
 
+import json_io
+from corpus_sqlite import CorpusSQLite
+from normalizacao import NAO_ALFANUMERICO, normalizar_doi, remover_acentos, remover_espacos
+
 def normalizar_nome(nome: str) -> str:
     """
     Padroniza o nome para facilitar o cruzamento:
@@ -25,153 +36,803 @@ def normalizar_nome(nome: str) -> str:
         return ""
     
     nome_padronizado = nome.upper()
-    nome_padronizado = re.sub(r'\s+', '', nome_padronizado)
+    nome_padronizado = remover_espacos(nome_padronizado)
     
     return nome_padronizado
 
 
 def load_json(path: Path) -> dict:
-	with path.open("r", encoding="utf-8") as handle:
-		return json.load(handle)
+	return json_io.carregar(path)
+
+
+def write_json(path: Path, data: dict) -> bool:
+	# Compacto, com a mesma compressao do arquivo lido (pela extensao) e atomico;
+	# devolve False quando o arquivo ja tinha exatamente esses bytes
+	return json_io.gravar(path, data)
+
 
+def name_entries(data: dict):
+	"""Gera os pares (nome, id_lattes) com que um JSON contribui para o indice."""
+	id_lattes = (data.get("_id") or "").strip()
+	full_name = (data.get("nome_completo") or "").strip()
+	if full_name and id_lattes:
+		yield full_name, id_lattes
+	
+	for raw_name in data.get("listaNomesCitacao", []):
+		key = (raw_name or "").strip()
+		if not key or not id_lattes:
+			continue
 
-def write_json(path: Path, data: dict) -> None:
-	with path.open("w", encoding="utf-8") as handle:
-		json.dump(data, handle, ensure_ascii=False, indent=2)
-		handle.write("\n")
+		yield key, id_lattes
+
+
+def add_to_name_index(name_to_ids: dict[str, set[str]], data: dict) -> None:
+	for name, id_lattes in name_entries(data):
+		chave_normalizada = normalizar_nome(name)
+		name_to_ids.setdefault(chave_normalizada, set()).add(id_lattes)
 
 
 def build_name_index(json_files: list[Path]) -> dict[str, set[str]]:
 	name_to_ids: dict[str, set[str]] = {}
+	for path in json_files:
+		add_to_name_index(name_to_ids, load_json(path))
+	return name_to_ids
+
+
+def collect_name_entries(json_files: list[Path]) -> set[tuple[str, str]]:
+	entries: set[tuple[str, str]] = set()
+	for path in json_files:
+		entries.update(name_entries(load_json(path)))
+	return entries
+
+
+def researcher_features(data: dict) -> dict[str, set[str]]:
+	"""
+	Evidencias de um pesquisador usadas para desempatar nomes ambiguos:
+	coautores (chave de normalizar_nome), areas/subareas de atuacao e DOIs
+	dos artigos do proprio curriculo.
+	"""
+	coauthors = set()
+	dois = set()
+	for item in data.get("listaPB") or []:
+		doi = normalizar_doi(item.get("doi"))
+		if doi:
+			dois.add(doi)
+		for collaborator in item.get("colaboradores") or []:
+			key = normalizar_nome((collaborator.get("nome") or "").strip())
+			if key:
+				coauthors.add(key)
+
+	areas = set()
+	for area, subareas in (data.get("area_de_atuacao") or {}).items():
+		for value in (area, *subareas):
+			if value:
+				areas.add(remover_acentos(value).upper())
+
+	return {"coauthors": coauthors, "areas": areas, "dois": dois}
+
+
+def merge_features(features: dict[str, dict[str, set[str]]], id_lattes: str, new: dict[str, set[str]]) -> None:
+	current = features.setdefault(id_lattes, {"coauthors": set(), "areas": set(), "dois": set()})
+	for kind, values in new.items():
+		current[kind].update(values)
+
+
+def collect_corpus_index(json_files: list[Path]) -> tuple[set[tuple[str, str]], dict[str, dict[str, set[str]]]]:
+	"""Le cada JSON uma vez e devolve as entradas de nome e as evidencias por pesquisador."""
+	entries: set[tuple[str, str]] = set()
+	features: dict[str, dict[str, set[str]]] = {}
 	for path in json_files:
 		data = load_json(path)
+		entries.update(name_entries(data))
 		id_lattes = (data.get("_id") or "").strip()
-		full_name = (data.get("nome_completo") or "").strip()
-		if full_name and id_lattes:
-			chave_normalizada = normalizar_nome(full_name)
-			name_to_ids.setdefault(chave_normalizada, set()).add(id_lattes)
-		
-		for raw_name in data.get("listaNomesCitacao", []):
-			key = (raw_name or "").strip()
-			if not key or not id_lattes:
+		if id_lattes:
+			merge_features(features, id_lattes, researcher_features(data))
+	return entries, features
+
+
+# Particulas ignoradas na comparacao de nomes ("Maria DA Silva", "SILVA, M. DE")
+NAME_PARTICLES = {"DE", "DA", "DO", "DAS", "DOS", "E", "DI", "DEL", "DU", "VAN", "VON"}
+
+
+def _name_tokens(text: str) -> list[str]:
+	return [token for token in NAO_ALFANUMERICO.sub(" ", text).split() if token not in NAME_PARTICLES]
+
+
+def name_variants(name: str) -> list[tuple[str, tuple[str, ...]]]:
+	"""
+	Formas (sobrenome, prenomes) de um nome, sem acentos nem pontuacao:
+	- "GONZALEZ, S. M."            -> [("GONZALEZ", ("S", "M"))]
+	- "Sahudy Montenegro Gonzalez" -> [("GONZALEZ", ("SAHUDY", "MONTENEGRO")),
+	                                   ("MONTENEGRO GONZALEZ", ("SAHUDY",))]
+	"""
+	text = remover_acentos(name).upper()
+	if "," in text:
+		surname_part, _, given_part = text.partition(",")
+		surname = " ".join(_name_tokens(surname_part))
+		given = tuple(_name_tokens(given_part.replace(",", " ")))
+		return [(surname, given)] if surname and given else []
+
+	tokens = _name_tokens(text)
+	if len(tokens) < 2:
+		return []
+
+	variants = [(tokens[-1], tuple(tokens[:-1]))]
+	if len(tokens) > 2:
+		# Sobrenome composto, comum nas citacoes ("MONTENEGRO GONZALEZ, S.")
+		variants.append((" ".join(tokens[-2:]), tuple(tokens[:-2])))
+	return variants
+
+
+# Peso de uma inicial da consulta que casa com um prenome do candidato (S / SAHUDY)
+INITIAL_WEIGHT = 0.85
+# Peso de um prenome da consulta que o candidato so tem como inicial (JORGE / J):
+# a inicial nao confirma o nome, entao sozinha fica abaixo do threshold padrao
+UNCONFIRMED_NAME_WEIGHT = 0.8
+
+
+def is_initials_only(given: tuple[str, ...]) -> bool:
+	return all(len(token) == 1 for token in given)
+
+
+def given_names_score(query: tuple[str, ...], candidate: tuple[str, ...]) -> float:
+	"""
+	Compara os prenomes na ordem: nome igual vale 1.0, inicial da consulta
+	compativel com o nome do candidato vale INITIAL_WEIGHT e nome da consulta
+	que o candidato so tem como inicial vale UNCONFIRMED_NAME_WEIGHT. O total e
+	dividido pelo numero de prenomes da lista menor, com uma pequena penalidade
+	quando a outra tem prenomes a mais (citacoes costumam omitir o nome do meio).
+	"""
+	total = 0.0
+	start = 0
+	for token in query:
+		for position in range(start, len(candidate)):
+			other = candidate[position]
+			if token == other:
+				weight = 1.0
+			elif len(token) == 1 and token[0] == other[0]:
+				weight = INITIAL_WEIGHT
+			elif len(other) == 1 and token[0] == other[0]:
+				weight = UNCONFIRMED_NAME_WEIGHT
+			else:
 				continue
+			total += weight
+			start = position + 1
+			break
+	shorter, longer = sorted((len(query), len(candidate)))
+	return total / shorter * (0.9 + 0.1 * shorter / longer)
 
-			chave_normalizada = normalizar_nome(key)
-			name_to_ids.setdefault(chave_normalizada, set()).add(id_lattes)
-	return name_to_ids
 
+class CollaboratorMatcher:
+	"""
+	Casa nomes de colaboradores com id_lattes.
 
-def fill_missing_ids(
-    json_files: list[Path],
-    name_to_ids: dict[str, set[str]],
-    log_path: Path,
-) -> dict:
-    summary = {
+	Primeiro tenta a chave exata de normalizar_nome. Se ela nao existir e o modo
+	fuzzy estiver ativo, procura o nome sem acentos/pontuacao num indice de
+	blocos (sobrenome, inicial do primeiro prenome) e so compara o nome com os
+	candidatos do proprio bloco. Sao aceitos os ids com pontuacao >= threshold;
+	ids a menos de AMBIGUITY_MARGIN do melhor contam como empate (ambiguo).
+
+	Se o nome so tem iniciais ("GONZALEZ, S."), os candidatos tambem sao
+	comparados pelas iniciais: "S. M." e "SILVIA MARIA" empatam, em vez de a
+	forma abreviada que o corpus tiver guardado vencer sozinha. Se o nome traz
+	prenomes por extenso e um id tem forma por extenso no bloco, mas nenhuma
+	compativel ("JORGE" contra "JOAO DA SILVA"), as formas so com iniciais
+	desse id ("SILVA, J.") nao contam.
+
+	>>> matcher = CollaboratorMatcher({("João da Silva", "3"), ("SILVA, J.", "3")})
+	>>> matcher.match("SILVA, Jorge")[0], matcher.match("SILVA, Jorge M.")[0]
+	(set(), set())
+	>>> matcher.match("SILVA, João Marcos")[0], matcher.match("SILVA, J.")[0]
+	({'3'}, {'3'})
+
+	(python -m doctest filling_idlattes.py)
+	"""
+
+	AMBIGUITY_MARGIN = 0.05
+
+	def __init__(self, entries, threshold: float = 0.85, fuzzy: bool = True) -> None:
+		self.threshold = threshold
+		self.fuzzy = fuzzy
+		self.name_to_ids: dict[str, set[str]] = {}
+		self.blocks: dict[tuple[str, str], set[tuple[tuple[str, ...], str]]] = {}
+
+		for name, id_lattes in entries:
+			self.name_to_ids.setdefault(normalizar_nome(name), set()).add(id_lattes)
+			if fuzzy:
+				for surname, given in name_variants(name):
+					self.blocks.setdefault((surname, given[0][0]), set()).add((given, id_lattes))
+
+	@classmethod
+	def from_name_index(cls, name_to_ids: dict[str, set[str]]) -> "CollaboratorMatcher":
+		# Indice antigo (so chaves normalizadas): apenas correspondencia exata
+		matcher = cls((), fuzzy=False)
+		matcher.name_to_ids = name_to_ids
+		return matcher
+
+	def ambiguous_ids(self) -> set[str]:
+		"""Ids que dividem uma chave ou um bloco com outro id; so eles podem precisar de desempate."""
+		ids: set[str] = set()
+		for candidates in self.name_to_ids.values():
+			if len(candidates) > 1:
+				ids.update(candidates)
+		for block in self.blocks.values():
+			block_ids = {id_lattes for _, id_lattes in block}
+			if len(block_ids) > 1:
+				ids.update(block_ids)
+		return ids
+
+	def match(self, name: str) -> tuple[set[str], float, bool]:
+		"""Devolve (ids candidatos, pontuacao, se a correspondencia foi exata)."""
+		ids = self.name_to_ids.get(normalizar_nome(name))
+		if ids:
+			return ids, 1.0, True
+		if not self.fuzzy:
+			return set(), 0.0, False
+
+		best: dict[str, float] = {}
+		# Nome por extenso: melhor pontuacao de cada id separada por formas por extenso e so com iniciais
+		full: dict[str, float] = {}
+		initials: dict[str, float] = {}
+		for surname, given in name_variants(name):
+			initials_only = is_initials_only(given)
+			for candidate, id_lattes in self.blocks.get((surname, given[0][0]), ()):
+				if initials_only:
+					score = given_names_score(given, tuple(token[0] for token in candidate))
+					best[id_lattes] = max(score, best.get(id_lattes, 0.0))
+					continue
+				scores = initials if is_initials_only(candidate) else full
+				scores[id_lattes] = max(given_names_score(given, candidate), scores.get(id_lattes, 0.0))
+
+		for id_lattes in full.keys() | initials.keys():
+			if id_lattes in full and full[id_lattes] < self.threshold:
+				# As formas por extenso do id contradizem o nome: as iniciais dele nao bastam
+				score = full[id_lattes]
+			else:
+				score = max(full.get(id_lattes, 0.0), initials.get(id_lattes, 0.0))
+			best[id_lattes] = max(score, best.get(id_lattes, 0.0))
+
+		top = max(best.values(), default=0.0)
+		if top < self.threshold:
+			return set(), top, False
+		return {id_lattes for id_lattes, score in best.items() if score >= top - self.AMBIGUITY_MARGIN}, top, False
+
+
+class AmbiguityResolver:
+	"""
+	Desempata nomes que casam com mais de um id_lattes usando o proprio corpus:
+	- o DOI do artigo aparece no curriculo do candidato (DOI_WEIGHT);
+	- coautores do artigo (incluindo o dono do curriculo) que tambem sao
+	  coautores do candidato (um ponto cada);
+	- areas de atuacao em comum com o dono do curriculo (AREA_WEIGHT cada).
+	O candidato so vence se tiver pontuacao positiva e maior que a dos demais.
+	"""
+
+	DOI_WEIGHT = 3.0
+	AREA_WEIGHT = 0.5
+
+	def __init__(self, features: dict[str, dict[str, set[str]]]) -> None:
+		self.features = features
+
+	def resolve(
+		self,
+		candidates: set[str],
+		doi: str = "",
+		coauthor_keys: set[str] = frozenset(),
+		areas: set[str] = frozenset(),
+	) -> tuple[str | None, str]:
+		"""Devolve (id vencedor ou None, descricao da evidencia do vencedor)."""
+		scored = []
+		for id_lattes in candidates:
+			feature = self.features.get(id_lattes)
+			if not feature:
+				continue
+
+			score = 0.0
+			evidence = []
+			if doi and doi in feature["dois"]:
+				score += self.DOI_WEIGHT
+				evidence.append(f"doi={doi}")
+			shared_coauthors = coauthor_keys & feature["coauthors"]
+			if shared_coauthors:
+				score += len(shared_coauthors)
+				evidence.append(f"coauthors={len(shared_coauthors)}")
+			shared_areas = areas & feature["areas"]
+			if shared_areas:
+				score += self.AREA_WEIGHT * len(shared_areas)
+				evidence.append(f"areas={len(shared_areas)}")
+			scored.append((score, id_lattes, evidence))
+
+		if not scored:
+			return None, ""
+		scored.sort(key=lambda entry: (-entry[0], entry[1]))
+		best_score, best_id, best_evidence = scored[0]
+		if best_score <= 0 or (len(scored) > 1 and scored[1][0] >= best_score):
+			return None, ""
+		return best_id, f"score={best_score:g}; " + "; ".join(best_evidence)
+
+
+def build_resolver(
+	matcher: CollaboratorMatcher, features: dict[str, dict[str, set[str]]]
+) -> AmbiguityResolver:
+	# So os ids que podem empatar precisam de evidencias (reduz o que vai para os workers)
+	ambiguous = matcher.ambiguous_ids()
+	return AmbiguityResolver({id_lattes: features[id_lattes] for id_lattes in ambiguous if id_lattes in features})
+
+
+class NameIndexStore:
+	"""
+	Indice nome -> id_lattes persistido em SQLite junto com o mtime e o tamanho
+	de cada JSON. update() so rele os arquivos novos ou alterados e remove as
+	entradas dos arquivos que sumiram da pasta.
+	"""
+
+	def __init__(self, db_path: Path) -> None:
+		self.connection = sqlite3.connect(str(db_path))
+		self.connection.executescript(
+			"""
+			CREATE TABLE IF NOT EXISTS files (
+				path TEXT PRIMARY KEY,
+				mtime_ns INTEGER NOT NULL,
+				size INTEGER NOT NULL
+			);
+			CREATE TABLE IF NOT EXISTS names (
+				path TEXT NOT NULL,
+				name_key TEXT NOT NULL,
+				name TEXT NOT NULL,
+				id_lattes TEXT NOT NULL
+			);
+			CREATE INDEX IF NOT EXISTS names_path ON names (path);
+			CREATE TABLE IF NOT EXISTS features (
+				path TEXT NOT NULL,
+				id_lattes TEXT NOT NULL,
+				kind TEXT NOT NULL,
+				value TEXT NOT NULL
+			);
+			CREATE INDEX IF NOT EXISTS features_path ON features (path);
+			"""
+		)
+
+	def _stored_stats(self) -> dict[str, tuple[int, int]]:
+		rows = self.connection.execute("SELECT path, mtime_ns, size FROM files")
+		return {path: (mtime_ns, size) for path, mtime_ns, size in rows}
+
+	def _forget(self, path: str) -> None:
+		self.connection.execute("DELETE FROM names WHERE path = ?", (path,))
+		self.connection.execute("DELETE FROM features WHERE path = ?", (path,))
+		self.connection.execute("DELETE FROM files WHERE path = ?", (path,))
+
+	def update(self, json_files: list[Path]) -> dict:
+		stored = self._stored_stats()
+		stats = {"reread": 0, "removed": 0, "unchanged": 0}
+
+		current = {}
+		for path in json_files:
+			file_stat = path.stat()
+			current[str(path)] = (path, (file_stat.st_mtime_ns, file_stat.st_size))
+
+		for path in stored.keys() - current.keys():
+			self._forget(path)
+			stats["removed"] += 1
+
+		for key, (path, file_stat) in current.items():
+			if stored.get(key) == file_stat:
+				stats["unchanged"] += 1
+				continue
+
+			data = load_json(path)
+			self._forget(key)
+			self.connection.executemany(
+				"INSERT INTO names VALUES (?, ?, ?, ?)",
+				[(key, normalizar_nome(name), name, id_lattes) for name, id_lattes in name_entries(data)],
+			)
+			id_lattes = (data.get("_id") or "").strip()
+			if id_lattes:
+				self.connection.executemany(
+					"INSERT INTO features VALUES (?, ?, ?, ?)",
+					[
+						(key, id_lattes, kind, value)
+						for kind, values in researcher_features(data).items()
+						for value in values
+					],
+				)
+			self.connection.execute("INSERT INTO files VALUES (?, ?, ?)", (key, *file_stat))
+			stats["reread"] += 1
+
+		self.connection.commit()
+		return stats
+
+	def entries(self) -> set[tuple[str, str]]:
+		return set(self.connection.execute("SELECT DISTINCT name, id_lattes FROM names"))
+
+	def features(self, ids: set[str] | None = None) -> dict[str, dict[str, set[str]]]:
+		"""Evidencias por pesquisador; com `ids`, so as desses pesquisadores sao lidas do banco."""
+		query = "SELECT id_lattes, kind, value FROM features"
+		if ids is not None:
+			self.connection.execute("CREATE TEMP TABLE IF NOT EXISTS wanted_ids (id_lattes TEXT PRIMARY KEY)")
+			self.connection.execute("DELETE FROM wanted_ids")
+			self.connection.executemany("INSERT OR IGNORE INTO wanted_ids VALUES (?)", [(id_lattes,) for id_lattes in ids])
+			query += " WHERE id_lattes IN (SELECT id_lattes FROM wanted_ids)"
+
+		features: dict[str, dict[str, set[str]]] = {}
+		for id_lattes, kind, value in self.connection.execute(query):
+			merge_features(features, id_lattes, {kind: {value}})
+		return features
+
+	def name_index(self) -> dict[str, set[str]]:
+		name_to_ids: dict[str, set[str]] = {}
+		for name_key, id_lattes in self.connection.execute("SELECT name_key, id_lattes FROM names"):
+			name_to_ids.setdefault(name_key, set()).add(id_lattes)
+		return name_to_ids
+
+	def refresh_stats(self, paths: list[Path]) -> None:
+		# O preenchimento so altera id_lattes de colaboradores, que nao entram no
+		# indice; os arquivos regravados nao precisam ser relidos na proxima execucao.
+		rows = []
+		for path in paths:
+			file_stat = path.stat()
+			rows.append((file_stat.st_mtime_ns, file_stat.st_size, str(path)))
+		self.connection.executemany("UPDATE files SET mtime_ns = ?, size = ? WHERE path = ?", rows)
+		self.connection.commit()
+
+	def close(self) -> None:
+		self.connection.close()
+
+
+def new_summary() -> dict:
+    return {
         "files_processed": 0,
         "collaborators_missing": 0,
         "filled": 0,
+        "filled_fuzzy": 0,
+        "resolved": 0,
         "ambiguous": 0,
         "no_match": 0,
         "files_updated": 0,
+        "files_unchanged": 0,
     }
+
+
+LOG_HEADER = [
+    "json_file",
+    "section",
+    "title",
+    "collaborator_name",
+    "filled_id_lattes",
+    "match_score",
+    "evidence",
+]
+
+
+def owner_name_keys(data: dict) -> set[str]:
+    """Chaves de normalizar_nome do dono do curriculo (nome completo e nomes de citacao)."""
+    names = [data.get("nome_completo") or "", *(data.get("listaNomesCitacao") or [])]
+    return {normalizar_nome(name.strip()) for name in names if name and name.strip()}
+
+
+def fill_document(
+    path: Path,
+    data: dict,
+    matcher: CollaboratorMatcher,
+    writer,
+    summary: dict,
+    resolver: AmbiguityResolver | None = None,
+) -> bool:
+    """Preenche os id_lattes de um JSON já carregado; devolve True se algo mudou."""
+    changed = False
+    summary["files_processed"] += 1
+
+    # Contexto do dono do curriculo, usado apenas para desempatar nomes ambiguos
+    owner_keys = owner_name_keys(data) if resolver is not None else set()
+    owner_areas = researcher_features(data)["areas"] if resolver is not None else set()
+
+    def choose(ids: set[str], doi: str = "", coauthor_keys: set[str] = frozenset()) -> tuple[str | None, str]:
+        if len(ids) == 1:
+            return next(iter(ids)), ""
+        if len(ids) > 1 and resolver is not None:
+            return resolver.resolve(ids, doi, coauthor_keys | owner_keys, owner_areas)
+        return None, ""
+
+    # 1. Processar os coautores nos artigos (listaPB)
+    for item_index, item in enumerate(data.get("listaPB", []), start=1):
+        collaborators = item.get("colaboradores", [])
+        doi = normalizar_doi(item.get("doi")) if resolver is not None else ""
+        for collaborator in collaborators:
+            current_id = (collaborator.get("id_lattes") or "").strip()
+            if current_id:
+                continue
+
+            summary["collaborators_missing"] += 1
+            key = (collaborator.get("nome", "") or "").strip()
+            if not key:
+                summary["no_match"] += 1
+                continue
+
+            ids, score, exact = matcher.match(key)
+            coauthor_keys = set()
+            if len(ids) > 1 and resolver is not None:
+                coauthor_keys = {
+                    normalizar_nome((other.get("nome") or "").strip())
+                    for other in collaborators
+                    if other is not collaborator and (other.get("nome") or "").strip()
+                }
+            filled_id, evidence = choose(ids, doi, coauthor_keys)
+
+            if filled_id:
+                collaborator["id_lattes"] = filled_id
+                summary["filled"] += 1
+                if not exact:
+                    summary["filled_fuzzy"] += 1
+                if evidence:
+                    summary["resolved"] += 1
+                changed = True
+                writer.writerow(
+                    [
+                        path.name,
+                        f"listaPB[{item_index}]",
+                        item.get("titulo", ""),
+                        key,
+                        filled_id,
+                        f"{score:.3f}",
+                        evidence,
+                    ]
+                )
+            elif len(ids) > 1:
+                summary["ambiguous"] += 1
+            else:
+                summary["no_match"] += 1
+
+    # 2. Processar os alunos nas orientações
+    secoes_de_orientacao = ["orientacoes_concluidas", "orientacoes_em_andamento"]
+    for section_name in secoes_de_orientacao:
+        for item_index, item in enumerate(data.get(section_name, []), start=1):
+            current_id = (item.get("id_lattes") or "").strip()
+            if current_id:
+                continue
+
+            summary["collaborators_missing"] += 1
+            key = (item.get("aluno", "") or "").strip()
+            if not key:
+                summary["no_match"] += 1
+                continue
+
+            ids, score, exact = matcher.match(key)
+            # O orientador e coautor natural do aluno: o contexto e o proprio dono do curriculo
+            filled_id, evidence = choose(ids)
+
+            if filled_id:
+                item["id_lattes"] = filled_id # Injeta a chave no dicionário
+                summary["filled"] += 1
+                if not exact:
+                    summary["filled_fuzzy"] += 1
+                if evidence:
+                    summary["resolved"] += 1
+                changed = True
+                writer.writerow(
+                    [
+                        path.name,
+                        f"{section_name}[{item_index}]",
+                        item.get("titulo", ""),
+                        key,
+                        filled_id,
+                        f"{score:.3f}",
+                        evidence,
+                    ]
+                )
+            elif len(ids) > 1:
+                summary["ambiguous"] += 1
+            else:
+                summary["no_match"] += 1
+
+    if changed:
+        summary["files_updated"] += 1
+    return changed
+
+
+def fill_missing_ids(
+    json_files: list[Path],
+    matcher: CollaboratorMatcher | dict[str, set[str]],
+    log_path: Path,
+    written: list[Path] | None = None,
+    resolver: AmbiguityResolver | None = None,
+) -> dict:
+    if not isinstance(matcher, CollaboratorMatcher):
+        matcher = CollaboratorMatcher.from_name_index(matcher)
+    summary = new_summary()
     
-    with log_path.open("w", encoding="utf-8", newline="") as handle:
+    # A gravacao do arquivo anterior corre numa thread enquanto o proximo e lido e preenchido
+    with log_path.open("w", encoding="utf-8", newline="") as handle, json_io.GravadorAssincrono() as saver:
         writer = csv.writer(handle)
-        writer.writerow(
-            [
-                "json_file",
-                "section",
-                "title",
-                "collaborator_name",
-                "filled_id_lattes",
-            ]
-        )
+        writer.writerow(LOG_HEADER)
 
         for path in json_files:
             data = load_json(path)
-            changed = False
-            summary["files_processed"] += 1
-
-            # 1. Processar os coautores nos artigos (listaPB)
-            for item_index, item in enumerate(data.get("listaPB", []), start=1):
-                for collaborator in item.get("colaboradores", []):
-                    current_id = (collaborator.get("id_lattes") or "").strip()
-                    if current_id:
-                        continue
-
-                    summary["collaborators_missing"] += 1
-                    key = (collaborator.get("nome", "") or "").strip()
-                    if not key:
-                        summary["no_match"] += 1
-                        continue
-
-                    # NORMALIZA antes de buscar no dicionário!
-                    chave_busca = normalizar_nome(key)
-                    ids = name_to_ids.get(chave_busca, set())
-                    
-                    if len(ids) == 1:
-                        filled_id = next(iter(ids))
-                        collaborator["id_lattes"] = filled_id
-                        summary["filled"] += 1
-                        changed = True
-                        writer.writerow(
-                            [
-                                path.name,
-                                f"listaPB[{item_index}]",
-                                item.get("titulo", ""),
-                                key,
-                                filled_id,
-                            ]
-                        )
-                    elif len(ids) > 1:
-                        summary["ambiguous"] += 1
-                    else:
-                        summary["no_match"] += 1
-
-            # 2. Processar os alunos nas orientações
-            secoes_de_orientacao = ["orientacoes_concluidas", "orientacoes_em_andamento"]
-            for section_name in secoes_de_orientacao:
-                for item_index, item in enumerate(data.get(section_name, []), start=1):
-                    current_id = (item.get("id_lattes") or "").strip()
-                    if current_id:
-                        continue
-
-                    summary["collaborators_missing"] += 1
-                    key = (item.get("aluno", "") or "").strip()
-                    if not key:
-                        summary["no_match"] += 1
-                        continue
-
-                    # NORMALIZA antes de buscar no dicionário!
-                    chave_busca = normalizar_nome(key)
-                    ids = name_to_ids.get(chave_busca, set())
-                    
-                    if len(ids) == 1:
-                        filled_id = next(iter(ids))
-                        item["id_lattes"] = filled_id # Injeta a chave no dicionário
-                        summary["filled"] += 1
-                        changed = True
-                        writer.writerow(
-                            [
-                                path.name,
-                                f"{section_name}[{item_index}]",
-                                item.get("titulo", ""),
-                                key,
-                                filled_id,
-                            ]
-                        )
-                    elif len(ids) > 1:
-                        summary["ambiguous"] += 1
-                    else:
-                        summary["no_match"] += 1
-
-            if changed:
-                write_json(path, data)
-                summary["files_updated"] += 1
+            if fill_document(path, data, matcher, writer, summary, resolver):
+                saver.enviar(path, data)
 
+    summary["files_unchanged"] = len(saver.inalterados)
+    if written is not None:
+        written.extend(saver.gravados)
     return summary
 
 
+# Campos do corpus SQLite lidos pelo indice de nomes, pelas evidencias e pelo preenchimento
+CORPUS_FIELDS = (
+	"nome_completo",
+	"area_de_atuacao",
+	"listaPB",
+	"orientacoes_concluidas",
+	"orientacoes_em_andamento",
+	"listaNomesCitacao",
+)
+
+
+def fill_missing_ids_corpus(
+	corpus: CorpusSQLite,
+	log_path: Path,
+	threshold: float = 0.85,
+	fuzzy: bool = True,
+	disambiguate: bool = True,
+) -> dict:
+	"""
+	Versao de collect_corpus_index + fill_missing_ids para o corpus SQLite.
+
+	Sao duas passadas de leitura (indice e preenchimento) com projecao de
+	colunas; so os id_lattes preenchidos sao gravados de volta, ao final.
+	"""
+	entries: set[tuple[str, str]] = set()
+	features: dict[str, dict[str, set[str]]] = {}
+	for data in corpus.curriculos(CORPUS_FIELDS):
+		entries.update(name_entries(data))
+		merge_features(features, data["_id"], researcher_features(data))
+
+	matcher = CollaboratorMatcher(entries, threshold, fuzzy)
+	resolver = build_resolver(matcher, features) if disambiguate else None
+	summary = new_summary()
+	collaborator_rows = []
+	orientation_rows = []
+	with log_path.open("w", encoding="utf-8", newline="") as handle:
+		writer = csv.writer(handle)
+		writer.writerow(LOG_HEADER)
+		for data in corpus.curriculos(CORPUS_FIELDS):
+			if fill_document(Path(data["_id"]), data, matcher, writer, summary, resolver):
+				collaborators, orientations = corpus.linhas_de_ids(data)
+				collaborator_rows.extend(collaborators)
+				orientation_rows.extend(orientations)
+
+	# As atualizacoes ficam para depois da leitura para nao alterar as tabelas durante a consulta
+	corpus.gravar_ids(collaborator_rows, orientation_rows)
+	corpus.commit()
+	return summary
+
+
+def _shard_worker(shard: list[Path], conn, log_shard: Path) -> None:
+	# Processo de um shard: carrega cada JSON uma única vez e o mantém em memória
+	# entre a fase 1 (índice parcial) e a fase 2 (preenchimento e escrita).
+	try:
+		documents = [(path, load_json(path)) for path in shard]
+
+		partial: set[tuple[str, str]] = set()
+		partial_features: dict[str, dict[str, set[str]]] = {}
+		for _, data in documents:
+			partial.update(name_entries(data))
+			id_lattes = (data.get("_id") or "").strip()
+			if id_lattes:
+				merge_features(partial_features, id_lattes, researcher_features(data))
+		conn.send(("index", (partial, partial_features)))
+
+		matcher, resolver = conn.recv()
+		summary = new_summary()
+		with log_shard.open("w", encoding="utf-8", newline="") as handle, json_io.GravadorAssincrono() as saver:
+			writer = csv.writer(handle)
+			for path, data in documents:
+				if fill_document(path, data, matcher, writer, summary, resolver):
+					saver.enviar(path, data)
+		summary["files_unchanged"] = len(saver.inalterados)
+		conn.send(("summary", (summary, saver.gravados)))
+	except Exception as exc:
+		conn.send(("error", f"{type(exc).__name__}: {exc}"))
+	finally:
+		conn.close()
+
+
+def _receive(conn, expected: str):
+	kind, payload = conn.recv()
+	if kind == "error":
+		raise RuntimeError(f"Worker failed: {payload}")
+	if kind != expected:
+		raise RuntimeError(f"Unexpected message from worker: {kind}")
+	return payload
+
+
+def fill_missing_ids_parallel(
+	json_files: list[Path],
+	log_path: Path,
+	workers: int,
+	entries: set[tuple[str, str]] | None = None,
+	written: list[Path] | None = None,
+	threshold: float = 0.85,
+	fuzzy: bool = True,
+	features: dict[str, dict[str, set[str]]] | None = None,
+	disambiguate: bool = True,
+) -> dict:
+	"""
+	Versao paralela de build_name_index + fill_missing_ids.
+
+	Os arquivos sao divididos em `workers` shards contiguos. Fase 1: cada
+	processo le o seu shard e devolve um indice parcial, que e mesclado aqui.
+	Fase 2: cada processo recebe o matcher completo, preenche e grava os seus
+	JSONs e escreve um pedaco do log CSV. Os pedacos sao concatenados na ordem
+	dos shards, entao o log e o resumo ficam iguais aos da execucao serial.
+
+	Se `entries` ja vier pronto (indice persistido), os indices parciais sao
+	descartados e o matcher da fase 2 e montado a partir de `entries`; o mesmo
+	vale para `features` e o AmbiguityResolver.
+	"""
+	workers = max(1, min(workers, len(json_files)))
+	size = -(-len(json_files) // workers)
+	shards = [json_files[i:i + size] for i in range(0, len(json_files), size)]
+	log_shards = [log_path.with_name(f"{log_path.name}.part{i}") for i in range(len(shards))]
+
+	processes = []
+	connections = []
+	try:
+		for shard, log_shard in zip(shards, log_shards):
+			parent_conn, child_conn = multiprocessing.Pipe()
+			process = multiprocessing.Process(target=_shard_worker, args=(shard, child_conn, log_shard))
+			process.start()
+			child_conn.close()
+			processes.append(process)
+			connections.append(parent_conn)
+
+		merged: set[tuple[str, str]] = set()
+		merged_features: dict[str, dict[str, set[str]]] = {}
+		for conn in connections:
+			partial, partial_features = _receive(conn, "index")
+			merged.update(partial)
+			for id_lattes, feature in partial_features.items():
+				merge_features(merged_features, id_lattes, feature)
+		matcher = CollaboratorMatcher(merged if entries is None else entries, threshold, fuzzy)
+		resolver = None
+		if disambiguate:
+			resolver = build_resolver(matcher, merged_features if features is None else features)
+		for conn in connections:
+			conn.send((matcher, resolver))
+
+		summary = new_summary()
+		for conn in connections:
+			shard_summary, shard_written = _receive(conn, "summary")
+			for key, value in shard_summary.items():
+				summary[key] += value
+			if written is not None:
+				written.extend(shard_written)
+
+		with log_path.open("w", encoding="utf-8", newline="") as handle:
+			csv.writer(handle).writerow(LOG_HEADER)
+			for log_shard in log_shards:
+				with log_shard.open("r", encoding="utf-8", newline="") as part:
+					shutil.copyfileobj(part, handle)
+	finally:
+		for process in processes:
+			if process.is_alive():
+				process.terminate()
+			process.join()
+		for log_shard in log_shards:
+			log_shard.unlink(missing_ok=True)
+
+	return summary
+
+
+def print_summary(summary: dict, log_path: Path) -> None:
+	print("Done.")
+	print(
+		"Processed: {files_processed} | Updated: {files_updated} (unchanged on disk: {files_unchanged}) | "
+		"Missing: {collaborators_missing} | Filled: {filled} (fuzzy: {filled_fuzzy}, resolved: {resolved}) | "
+		"Ambiguous: {ambiguous} | No match: {no_match}".format(**summary)
+	)
+	print(f"Log: {log_path}")
+
+
 def main() -> None:
 	parser = argparse.ArgumentParser(
 		description="Fill missing collaborator id_lattes using listaNomesCitacao across JSON files."
@@ -181,29 +842,93 @@ def main() -> None:
 		default="JSONs",
 		help="Path to the folder containing JSON files (default: JSONs).",
 	)
+	parser.add_argument(
+		"--corpus-db",
+		help="SQLite corpus written by parser.py --formato sqlite; used instead of --folder.",
+	)
 	parser.add_argument(
 		"--log",
 		default="filled_idlattes_log.csv",
 		help="CSV path for logging filled IDs (default: filled_idlattes_log.csv).",
 	)
+	parser.add_argument(
+		"--workers",
+		type=int,
+		default=1,
+		help="Number of worker processes; 1 runs serially (default: 1).",
+	)
+	parser.add_argument(
+		"--index-db",
+		help="SQLite file with the persistent name index; only new or changed JSONs are re-read.",
+	)
+	parser.add_argument(
+		"--threshold",
+		type=float,
+		default=0.85,
+		help="Minimum similarity (0-1) for an accent/punctuation-insensitive match (default: 0.85).",
+	)
+	parser.add_argument(
+		"--no-fuzzy",
+		action="store_true",
+		help="Only fill exact normalized-name matches.",
+	)
+	parser.add_argument(
+		"--no-disambiguation",
+		action="store_true",
+		help="Leave ambiguous names empty instead of resolving them with co-authorship, DOI and area evidence.",
+	)
 	args = parser.parse_args()
 
+	log_path = Path(args.log).expanduser().resolve()
+	fuzzy = not args.no_fuzzy
+	disambiguate = not args.no_disambiguation
+
+	if args.corpus_db:
+		corpus = CorpusSQLite(Path(args.corpus_db).expanduser().resolve())
+		summary = fill_missing_ids_corpus(corpus, log_path, args.threshold, fuzzy, disambiguate)
+		corpus.close()
+		print_summary(summary, log_path)
+		return
+
 	folder = Path(args.folder).expanduser().resolve()
-	json_files = sorted(folder.glob("*.json"))
+	json_files = json_io.listar_jsons(folder)
 	if not json_files:
 		raise SystemExit(f"No JSON files found in {folder}")
 
-	name_to_ids = build_name_index(json_files)
-	log_path = Path(args.log).expanduser().resolve()
-	summary = fill_missing_ids(json_files, name_to_ids, log_path)
+	store = None
+	entries = None
+	features = None
+	matcher = None
+	if args.index_db:
+		store = NameIndexStore(Path(args.index_db).expanduser().resolve())
+		index_stats = store.update(json_files)
+		print(
+			"Index: re-read {reread} | removed {removed} | unchanged {unchanged}".format(**index_stats)
+		)
+		entries = store.entries()
+		matcher = CollaboratorMatcher(entries, args.threshold, fuzzy)
+		if disambiguate:
+			# So as evidencias dos ids que podem empatar, como em build_resolver
+			features = store.features(matcher.ambiguous_ids())
 
-	print("Done.")
-	print(
-		"Processed: {files_processed} | Updated: {files_updated} | "
-		"Missing: {collaborators_missing} | Filled: {filled} | "
-		"Ambiguous: {ambiguous} | No match: {no_match}".format(**summary)
-	)
-	print(f"Log: {log_path}")
+	written: list[Path] = []
+	if args.workers > 1:
+		summary = fill_missing_ids_parallel(
+			json_files, log_path, args.workers, entries, written, args.threshold, fuzzy,
+			features, disambiguate,
+		)
+	else:
+		if matcher is None:
+			entries, features = collect_corpus_index(json_files)
+			matcher = CollaboratorMatcher(entries, args.threshold, fuzzy)
+		resolver = build_resolver(matcher, features) if disambiguate else None
+		summary = fill_missing_ids(json_files, matcher, log_path, written, resolver)
+
+	if store is not None:
+		store.refresh_stats(written)
+		store.close()
+
+	print_summary(summary, log_path)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,205 @@
+"""
+Grafo de colaboração montado a partir dos JSONs já preenchidos pelo
+filling_idlattes.py.
+
+Cada currículo liga o seu dono aos colaboradores dos artigos (listaPB) e aos
+alunos das orientações que têm id_lattes. Um mesmo artigo aparece no
+currículo de cada coautor, então o peso de uma aresta é o maior número de
+trabalhos em comum visto de um dos dois lados, e não a soma. O ano guardado
+é o da colaboração mais recente (0 quando não há ano).
+
+O grafo é gravado em formato CSR (indptr, indices, pesos, anos e ids em
+arquivos .npy, carregados com mmap), com consultas de grau, vizinhos e
+componentes conexas; os mesmos vetores formam a matriz de adjacência do
+scipy.sparse usada pelas rotinas de scipy.sparse.csgraph.
+
+Uso:
+    python grafo_coautoria.py construir [--entrada curriculos_json] [--saida grafo]
+    python grafo_coautoria.py vizinhos <id_lattes> [--saida grafo]
+    python grafo_coautoria.py componentes [--saida grafo]
+"""
+
+import argparse
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+import json_io
+from normalizacao import ANO
+
+SECOES_ORIENTACAO = ['orientacoes_concluidas', 'orientacoes_em_andamento']
+
+
+def _ano(texto):
+    anos = ANO.findall(texto or '')
+    return int(anos[-1]) if anos else 0
+
+
+def colaboracoes(dados):
+    """Gera (id do colaborador, ano) para cada artigo ou orientação do currículo com id_lattes preenchido."""
+    dono = (dados.get('_id') or '').strip()
+    for artigo in dados.get('listaPB') or []:
+        ano = _ano(artigo.get('texto_completo'))
+        # Um colaborador citado duas vezes no mesmo artigo conta uma vez
+        ids = {(colaborador.get('id_lattes') or '').strip() for colaborador in artigo.get('colaboradores') or []}
+        for id_lattes in ids:
+            if id_lattes and id_lattes != dono:
+                yield id_lattes, ano
+
+    for secao in SECOES_ORIENTACAO:
+        for orientacao in dados.get(secao) or []:
+            id_lattes = (orientacao.get('id_lattes') or '').strip()
+            if id_lattes and id_lattes != dono:
+                yield id_lattes, _ano(orientacao.get('ano'))
+
+
+class GrafoCoautoria:
+
+    def __init__(self, ids, indptr, indices, pesos, anos):
+        self.ids = ids
+        self.indptr = indptr
+        self.indices = indices
+        self.pesos = pesos
+        self.anos = anos
+        self._posicoes = {id_lattes: posicao for posicao, id_lattes in enumerate(ids.tolist())}
+
+    @classmethod
+    def construir(cls, caminhos_json):
+        """Lê os JSONs um de cada vez; só as contagens por par de vértices ficam na memória."""
+        posicoes = {}
+        contagens = Counter()
+        ultimos_anos = {}
+
+        def vertice(id_lattes):
+            if id_lattes not in posicoes:
+                posicoes[id_lattes] = len(posicoes)
+            return posicoes[id_lattes]
+
+        for caminho in caminhos_json:
+            dados = json_io.carregar(caminho)
+            dono = (dados.get('_id') or '').strip()
+            if not dono:
+                continue
+
+            origem = vertice(dono)
+            for id_lattes, ano in colaboracoes(dados):
+                par = (origem, vertice(id_lattes))
+                contagens[par] += 1
+                if ano > ultimos_anos.get(par, 0):
+                    ultimos_anos[par] = ano
+
+        # Junta as duas direções: peso = maior contagem, ano = mais recente
+        arestas = {}
+        for (origem, destino), contagem in contagens.items():
+            chave = (min(origem, destino), max(origem, destino))
+            peso, ano = arestas.get(chave, (0, 0))
+            arestas[chave] = (max(peso, contagem), max(ano, ultimos_anos.get((origem, destino), 0)))
+
+        total = len(posicoes)
+        origens = np.fromiter((u for u, _ in arestas), dtype=np.int32, count=len(arestas))
+        destinos = np.fromiter((v for _, v in arestas), dtype=np.int32, count=len(arestas))
+        pesos = np.fromiter((peso for peso, _ in arestas.values()), dtype=np.int32, count=len(arestas))
+        anos = np.fromiter((ano for _, ano in arestas.values()), dtype=np.int16, count=len(arestas))
+
+        # Cada aresta aparece nas duas linhas do CSR
+        linhas = np.concatenate([origens, destinos])
+        colunas = np.concatenate([destinos, origens])
+        ordem = np.lexsort((colunas, linhas))
+        indptr = np.zeros(total + 1, dtype=np.int64)
+        np.cumsum(np.bincount(linhas, minlength=total), out=indptr[1:])
+
+        ids = np.array(sorted(posicoes, key=posicoes.get), dtype=str)
+        return cls(ids, indptr, colunas[ordem], np.concatenate([pesos, pesos])[ordem], np.concatenate([anos, anos])[ordem])
+
+    def salvar(self, pasta):
+        pasta = Path(pasta)
+        pasta.mkdir(parents=True, exist_ok=True)
+        for nome in ('ids', 'indptr', 'indices', 'pesos', 'anos'):
+            np.save(pasta / f'{nome}.npy', getattr(self, nome))
+
+    @classmethod
+    def carregar(cls, pasta, mmap=True):
+        pasta = Path(pasta)
+        modo = 'r' if mmap else None
+        return cls(
+            np.load(pasta / 'ids.npy'),
+            *(np.load(pasta / f'{nome}.npy', mmap_mode=modo) for nome in ('indptr', 'indices', 'pesos', 'anos')),
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    def grau(self, id_lattes):
+        posicao = self._posicoes[id_lattes]
+        return int(self.indptr[posicao + 1] - self.indptr[posicao])
+
+    def vizinhos(self, id_lattes):
+        """Devolve [(id_lattes, peso, ano)] ordenado pelo peso, do maior para o menor."""
+        posicao = self._posicoes[id_lattes]
+        inicio, fim = self.indptr[posicao], self.indptr[posicao + 1]
+        vizinhos = zip(
+            self.ids[self.indices[inicio:fim]].tolist(),
+            self.pesos[inicio:fim].tolist(),
+            self.anos[inicio:fim].tolist(),
+        )
+        return sorted(vizinhos, key=lambda vizinho: (-vizinho[1], vizinho[0]))
+
+    def matriz(self):
+        """Matriz de adjacência (scipy CSR, simétrica) com os pesos, sem copiar os vetores do grafo."""
+        return sparse.csr_matrix((self.pesos, self.indices, self.indptr), shape=(len(self), len(self)), copy=False)
+
+    def componentes(self):
+        """Rótulo (0 a número de componentes - 1) da componente conexa de cada vértice."""
+        _, rotulos = connected_components(self.matriz(), directed=False)
+        return rotulos.astype(np.int32, copy=False)
+
+
+def main():
+    argumentos = argparse.ArgumentParser(
+        description="Grafo de coautoria e orientação (CSR em .npy) a partir dos JSONs preenchidos."
+    )
+    argumentos.add_argument(
+        "--saida",
+        default="grafo",
+        help="Pasta do grafo gravado (padrão: grafo).",
+    )
+    comandos = argumentos.add_subparsers(dest="comando", required=True)
+
+    construir = comandos.add_parser("construir", help="Lê os JSONs e grava o grafo.")
+    construir.add_argument(
+        "--entrada",
+        default="curriculos_json",
+        help="Pasta com os JSONs preenchidos pelo filling_idlattes.py (padrão: curriculos_json).",
+    )
+
+    vizinhos = comandos.add_parser("vizinhos", help="Grau e colaboradores de um ID Lattes.")
+    vizinhos.add_argument("id_lattes")
+
+    comandos.add_parser("componentes", help="Quantidade e tamanho das componentes conexas.")
+    args = argumentos.parse_args()
+
+    if args.comando == "construir":
+        caminhos = json_io.listar_jsons(args.entrada)
+        if not caminhos:
+            raise SystemExit(f"Nenhum JSON encontrado em {args.entrada}")
+        grafo = GrafoCoautoria.construir(caminhos)
+        grafo.salvar(args.saida)
+        print(f"{len(grafo)} vértices, {len(grafo.indices) // 2} arestas")
+        return
+
+    grafo = GrafoCoautoria.carregar(args.saida)
+    if args.comando == "vizinhos":
+        print(f"Grau: {grafo.grau(args.id_lattes)}")
+        for id_lattes, peso, ano in grafo.vizinhos(args.id_lattes):
+            print(f"{id_lattes}  peso {peso}  último ano {ano or '-'}")
+    else:
+        tamanhos = np.bincount(grafo.componentes())
+        tamanhos = np.sort(tamanhos[tamanhos > 0])[::-1]
+        print(f"{len(tamanhos)} componentes; maiores: {', '.join(map(str, tamanhos[:10].tolist()))}")
+
+
+if __name__ == "__main__":
+    main()
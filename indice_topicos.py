@@ -0,0 +1,254 @@
+"""
+Índice invertido de lemas dos currículos (lema -> pesquisadores), em SQLite.
+
+O índice é montado a partir dos tokens em colunas gravados pelo pln.py
+(--saida-tokens) e responde "quem trabalha com X" ordenando os pesquisadores
+por TF-IDF. O peso TF de cada par (lema, pesquisador) é gravado na indexação;
+o IDF é calculado na consulta, então o índice pode ser atualizado aos poucos
+sem recalcular os demais pesquisadores. Cada pesquisador fica associado ao
+.npz de onde veio: quem some dos arquivos (ou fica sem lemas) sai do índice.
+
+Uso:
+    python indice_topicos.py construir [--tokens tokens_npz] [--db topicos.sqlite]
+    python indice_topicos.py consultar "banco de dados" [-k 10] [--db topicos.sqlite]
+"""
+
+import argparse
+import math
+import sqlite3
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from normalizacao import PALAVRA
+
+
+class IndiceTopicos:
+
+    def __init__(self, caminho):
+        self.conexao = sqlite3.connect(str(caminho))
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        self.conexao.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS pesquisadores (
+                id_lattes TEXT PRIMARY KEY,
+                total_lemas INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS termos (
+                lema TEXT NOT NULL,
+                id_lattes TEXT NOT NULL,
+                frequencia INTEGER NOT NULL,
+                peso REAL NOT NULL,
+                PRIMARY KEY (lema, id_lattes)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS termos_id ON termos (id_lattes);
+            CREATE TABLE IF NOT EXISTS arquivos (
+                caminho TEXT PRIMARY KEY,
+                mtime_ns INTEGER NOT NULL,
+                tamanho INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS origens (
+                caminho TEXT NOT NULL,
+                id_lattes TEXT NOT NULL,
+                PRIMARY KEY (caminho, id_lattes)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS origens_id ON origens (id_lattes);
+            """
+        )
+        self.conexao.commit()
+
+    def indexar_pesquisador(self, id_lattes, frequencias):
+        """Substitui os termos de um pesquisador pelos lemas (lema -> contagem) informados."""
+        total = sum(frequencias.values())
+        self.conexao.execute("DELETE FROM termos WHERE id_lattes = ?", (id_lattes,))
+        self.conexao.execute(
+            "INSERT OR REPLACE INTO pesquisadores VALUES (?, ?)", (id_lattes, total)
+        )
+        self.conexao.executemany(
+            "INSERT INTO termos VALUES (?, ?, ?, ?)",
+            [(lema, id_lattes, frequencia, frequencia / total) for lema, frequencia in frequencias.items()],
+        )
+
+    def remover_pesquisador(self, id_lattes):
+        self.conexao.execute("DELETE FROM termos WHERE id_lattes = ?", (id_lattes,))
+        self.conexao.execute("DELETE FROM pesquisadores WHERE id_lattes = ?", (id_lattes,))
+
+    def indexar_tokens(self, arrays):
+        """
+        Indexa uma tabela de tokens (pln.TabelaTokens.para_arrays / pln.carregar_tokens)
+        e devolve o conjunto de id_lattes presentes nela.
+        """
+        # Normaliza cada string uma única vez; índices de strings que não são palavras ficam None
+        lemas = [
+            lema.lower() if PALAVRA.search(lema) else None
+            for lema in arrays['strings'].tolist()
+        ]
+
+        frequencias = defaultdict(Counter)
+        inicio = arrays['doc_inicio']
+        valores = arrays['lemma']
+        for posicao, id_lattes in enumerate(arrays['doc_id'].tolist()):
+            contagem = frequencias[id_lattes]
+            for indice in valores[inicio[posicao]:inicio[posicao + 1]].tolist():
+                if lemas[indice] is not None:
+                    contagem[lemas[indice]] += 1
+
+        for id_lattes, contagem in frequencias.items():
+            if contagem:
+                self.indexar_pesquisador(id_lattes, contagem)
+            else:
+                # Sem nenhum lema: os termos de uma indexação anterior não valem mais
+                self.remover_pesquisador(id_lattes)
+        return set(frequencias)
+
+    def atualizar(self, arquivos_tokens):
+        """
+        Indexa os .npz novos ou alterados desde a última execução e remove do
+        índice os arquivos que não estão mais em `arquivos_tokens`. No fim,
+        os termos de todo pesquisador que não aparece em nenhum dos arquivos
+        são apagados.
+
+        Devolve {'lidos', 'inalterados', 'removidos', 'pesquisadores', 'pesquisadores_removidos'}.
+        """
+        from pln import carregar_tokens
+
+        gravados = dict(
+            (caminho, (mtime_ns, tamanho))
+            for caminho, mtime_ns, tamanho in self.conexao.execute("SELECT * FROM arquivos")
+        )
+        # Arquivos indexados antes da tabela origens não têm origem registrada e são relidos
+        com_origem = {caminho for (caminho,) in self.conexao.execute("SELECT DISTINCT caminho FROM origens")}
+        estatisticas = {'lidos': 0, 'inalterados': 0, 'removidos': 0, 'pesquisadores': 0}
+
+        atuais = {str(caminho) for caminho in arquivos_tokens}
+        for chave in gravados.keys() - atuais:
+            self.conexao.execute("DELETE FROM origens WHERE caminho = ?", (chave,))
+            self.conexao.execute("DELETE FROM arquivos WHERE caminho = ?", (chave,))
+            estatisticas['removidos'] += 1
+
+        for caminho in arquivos_tokens:
+            info = caminho.stat()
+            chave = str(caminho)
+            if gravados.get(chave) == (info.st_mtime_ns, info.st_size) and chave in com_origem:
+                estatisticas['inalterados'] += 1
+                continue
+
+            ids = self.indexar_tokens(carregar_tokens(caminho))
+            estatisticas['pesquisadores'] += len(ids)
+            self.conexao.execute("DELETE FROM origens WHERE caminho = ?", (chave,))
+            self.conexao.executemany("INSERT INTO origens VALUES (?, ?)", [(chave, id_lattes) for id_lattes in ids])
+            self.conexao.execute(
+                "INSERT OR REPLACE INTO arquivos VALUES (?, ?, ?)",
+                (chave, info.st_mtime_ns, info.st_size),
+            )
+            self.conexao.commit()
+            estatisticas['lidos'] += 1
+
+        # Só depois de ler todos os arquivos: um pesquisador pode ter mudado de .npz
+        self.conexao.execute("DELETE FROM termos WHERE id_lattes NOT IN (SELECT id_lattes FROM origens)")
+        estatisticas['pesquisadores_removidos'] = self.conexao.execute(
+            "DELETE FROM pesquisadores WHERE id_lattes NOT IN (SELECT id_lattes FROM origens)"
+        ).rowcount
+        self.conexao.commit()
+        return estatisticas
+
+    def consultar(self, lemas, k=10):
+        """Devolve os k pesquisadores [(id_lattes, pontuação)] com maior TF-IDF para os lemas."""
+        lemas = sorted({lema.lower() for lema in lemas if lema})
+        if not lemas:
+            return []
+
+        total = self.conexao.execute("SELECT COUNT(*) FROM pesquisadores").fetchone()[0]
+        marcadores = ", ".join("?" for _ in lemas)
+        idf = [
+            (lema, math.log(total / documentos))
+            for lema, documentos in self.conexao.execute(
+                f"SELECT lema, COUNT(*) FROM termos WHERE lema IN ({marcadores}) GROUP BY lema", lemas
+            )
+        ]
+        if not idf:
+            return []
+
+        valores = ", ".join("(?, ?)" for _ in idf)
+        parametros = [valor for par in idf for valor in par]
+        return self.conexao.execute(
+            f"""
+            WITH consulta (lema, idf) AS (VALUES {valores})
+            SELECT t.id_lattes, SUM(t.peso * c.idf) AS pontuacao
+            FROM consulta c JOIN termos t ON t.lema = c.lema
+            GROUP BY t.id_lattes
+            ORDER BY pontuacao DESC, t.id_lattes
+            LIMIT ?
+            """,
+            parametros + [k],
+        ).fetchall()
+
+    def consultar_texto(self, texto, k=10, nlp=None):
+        """Lematiza `texto` com o mesmo modelo do pln.py e consulta o índice."""
+        from pln import obter_modelo
+
+        if nlp is None:
+            nlp = obter_modelo(perfil='lemas')
+        doc = nlp(texto)
+        lemas = [token.lemma_ for token in doc if not token.is_stop and not token.is_punct]
+        return self.consultar(lemas, k)
+
+    def close(self):
+        self.conexao.commit()
+        self.conexao.close()
+
+
+def main():
+    argumentos = argparse.ArgumentParser(
+        description="Índice invertido lema -> pesquisador (TF-IDF) em SQLite."
+    )
+    argumentos.add_argument(
+        "--db",
+        default="topicos.sqlite",
+        help="Arquivo SQLite do índice (padrão: topicos.sqlite).",
+    )
+    comandos = argumentos.add_subparsers(dest="comando", required=True)
+
+    construir = comandos.add_parser("construir", help="Indexa os .npz novos ou alterados.")
+    construir.add_argument(
+        "--tokens",
+        default="tokens_npz",
+        help="Pasta com os tokens_NNNNN.npz gravados pelo pln.py (padrão: tokens_npz).",
+    )
+
+    consultar = comandos.add_parser("consultar", help="Lista os pesquisadores mais ligados a um tema.")
+    consultar.add_argument("texto", help="Tema procurado; é lematizado antes da consulta.")
+    consultar.add_argument("-k", type=int, default=10, help="Quantidade de pesquisadores (padrão: 10).")
+    args = argumentos.parse_args()
+
+    indice = IndiceTopicos(args.db)
+    try:
+        if args.comando == "construir":
+            arquivos = sorted(Path(args.tokens).glob("*.npz"))
+            if not arquivos:
+                raise SystemExit(f"Nenhum .npz encontrado em {args.tokens}")
+            estatisticas = indice.atualizar(arquivos)
+            print(
+                "Arquivos lidos: {lidos} | inalterados: {inalterados} | removidos: {removidos} | "
+                "pesquisadores indexados: {pesquisadores} | removidos do índice: {pesquisadores_removidos}"
+                .format(**estatisticas)
+            )
+        else:
+            from pln import obter_modelo
+
+            # A carga do modelo spaCy domina uma consulta isolada; é medida à parte
+            inicio = time.perf_counter()
+            nlp = obter_modelo(perfil='lemas')
+            carga = time.perf_counter() - inicio
+            inicio = time.perf_counter()
+            resultados = indice.consultar_texto(args.texto, args.k, nlp=nlp)
+            duracao = (time.perf_counter() - inicio) * 1000
+            for posicao, (id_lattes, pontuacao) in enumerate(resultados, start=1):
+                print(f"{posicao:3}. {id_lattes}  {pontuacao:.4f}")
+            print(f"{len(resultados)} resultados em {duracao:.1f} ms (carga do modelo {carga:.2f}s)")
+    finally:
+        indice.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+Leitura e escrita de JSON compartilhadas pelo parser, pelo preenchedor de IDs
+e pelo pln.py.
+
+Usa o orjson quando ele está instalado (e o módulo json da biblioteca padrão
+quando não está). A saída é compacta por padrão; `indentar=True` gera JSON
+indentado com 2 espaços para leitura humana. A compressão é escolhida pela
+extensão do arquivo: .json.gz (gzip) ou .json.zst (zstandard, se instalado).
+
+A gravação é atômica (arquivo temporário na mesma pasta + os.replace), então
+um processo interrompido ou um leitor concorrente nunca vê um JSON pela
+metade, e é pulada quando os bytes não mudaram. GravadorAssincrono faz as
+gravações numa thread, em paralelo com o processamento do próximo arquivo.
+
+Uso (benchmark de leitura e gravação num corpus):
+    python json_io.py [--entrada curriculos_json] [--repeticoes 3]
+"""
+
+import argparse
+import gzip
+import json
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+EXTENSOES = ('.json', '.json.gz', '.json.zst')
+
+
+def dumps(dados, indentar=False):
+    """Serializa `dados` em bytes UTF-8 (caracteres não ASCII ficam como estão)."""
+    if orjson is not None:
+        return orjson.dumps(dados, option=orjson.OPT_INDENT_2 if indentar else 0)
+    if indentar:
+        return json.dumps(dados, indent=2, ensure_ascii=False).encode('utf-8')
+    return json.dumps(dados, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def loads(conteudo):
+    if orjson is not None:
+        return orjson.loads(conteudo)
+    return json.loads(conteudo)
+
+
+def _comprimir(conteudo, caminho):
+    nome = str(caminho)
+    if nome.endswith('.gz'):
+        # mtime=0: sem a hora no cabeçalho, os mesmos dados geram os mesmos bytes (ver gravar)
+        return gzip.compress(conteudo, compresslevel=6, mtime=0)
+    if nome.endswith('.zst'):
+        if zstandard is None:
+            raise RuntimeError("O pacote zstandard não está instalado; use .json ou .json.gz.")
+        return zstandard.ZstdCompressor(level=3).compress(conteudo)
+    return conteudo
+
+
+def _descomprimir(conteudo, caminho):
+    nome = str(caminho)
+    if nome.endswith('.gz'):
+        return gzip.decompress(conteudo)
+    if nome.endswith('.zst'):
+        if zstandard is None:
+            raise RuntimeError("O pacote zstandard não está instalado; não é possível ler .json.zst.")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(conteudo)
+    return conteudo
+
+
+def carregar(caminho):
+    with open(caminho, 'rb') as arquivo:
+        return loads(_descomprimir(arquivo.read(), caminho))
+
+
+def serializar(dados, caminho, indentar=False):
+    """Bytes que gravar() escreveria em `caminho` (já comprimidos conforme a extensão)."""
+    conteudo = dumps(dados, indentar)
+    if indentar:
+        conteudo += b'\n'
+    return _comprimir(conteudo, caminho)
+
+
+def _bytes_iguais(caminho, conteudo):
+    # Compara o tamanho antes de ler o arquivo: na maioria das mudanças ele já é diferente
+    try:
+        if os.stat(caminho).st_size != len(conteudo):
+            return False
+        with open(caminho, 'rb') as arquivo:
+            return arquivo.read() == conteudo
+    except FileNotFoundError:
+        return False
+
+
+def gravar(caminho, dados, indentar=False, sincronizar=False):
+    """
+    Grava `dados` em `caminho` de forma atômica; devolve False (sem gravar) se
+    o arquivo já tem exatamente esses bytes. Com `sincronizar`, faz fsync
+    antes da troca, para resistir também a uma queda do sistema.
+    """
+    conteudo = serializar(dados, caminho, indentar)
+    if _bytes_iguais(caminho, conteudo):
+        return False
+    _gravar_bytes(caminho, conteudo, sincronizar)
+    return True
+
+
+def _gravar_bytes(caminho, conteudo, sincronizar=False):
+    # Troca atômica, sem comparar com o arquivo existente
+    caminho = Path(caminho)
+    temporario = caminho.with_name(f".{caminho.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(temporario, 'wb') as arquivo:
+            arquivo.write(conteudo)
+            if sincronizar:
+                arquivo.flush()
+                os.fsync(arquivo.fileno())
+        os.replace(temporario, caminho)
+    except BaseException:
+        temporario.unlink(missing_ok=True)
+        raise
+
+
+class GravadorAssincrono:
+    """
+    Grava JSONs numa thread de fundo, na ordem em que foram enviados.
+
+    Uso:
+        with GravadorAssincrono() as gravador:
+            gravador.enviar(caminho, dados)
+        gravador.gravados, gravador.inalterados
+
+    `dados` não deve ser alterado depois de enviado. A fila tem no máximo
+    `pendentes` itens, para limitar a memória quando o disco é mais lento que
+    o processamento. O primeiro erro de gravação é relançado em fechar().
+    """
+
+    def __init__(self, indentar=False, pendentes=64):
+        self.indentar = indentar
+        self.gravados = []
+        self.inalterados = []
+        self._erro = None
+        self._fila = queue.Queue(maxsize=pendentes)
+        self._thread = threading.Thread(target=self._executar, name="GravadorAssincrono", daemon=True)
+        self._thread.start()
+
+    def _executar(self):
+        while True:
+            item = self._fila.get()
+            if item is None:
+                return
+            caminho, dados = item
+            if self._erro is not None:
+                continue
+            try:
+                if gravar(caminho, dados, self.indentar):
+                    self.gravados.append(caminho)
+                else:
+                    self.inalterados.append(caminho)
+            except Exception as erro:
+                self._erro = erro
+
+    def enviar(self, caminho, dados):
+        if self._erro is not None:
+            raise self._erro
+        self._fila.put((caminho, dados))
+
+    def fechar(self):
+        self._fila.put(None)
+        self._thread.join()
+        if self._erro is not None:
+            raise self._erro
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, rastro):
+        self.fechar()
+
+
+def listar_jsons(pasta):
+    """Arquivos JSON da pasta (comprimidos ou não), em ordem de nome."""
+    pasta = Path(pasta)
+    return sorted(caminho for extensao in EXTENSOES for caminho in pasta.glob('*' + extensao))
+
+
+def _medir(funcao, repeticoes):
+    return min(_cronometrar(funcao) for _ in range(repeticoes))
+
+
+def _cronometrar(funcao):
+    inicio = time.perf_counter()
+    funcao()
+    return time.perf_counter() - inicio
+
+
+def _verificar_gravacao_repetida(dados, pasta):
+    # gravar() só pula arquivos inalterados se os mesmos dados gerarem os mesmos
+    # bytes; com mtime=0 no gzip, uma segunda gravação imediata já mostra isso
+    for extensao in EXTENSOES:
+        if extensao == '.json.zst' and zstandard is None:
+            continue
+        destino = pasta / f"verificacao{extensao}"
+        gravar(destino, dados)
+        if gravar(destino, dados):
+            raise RuntimeError(f"Gravação idêntica de {extensao} não foi pulada: a saída não é determinística.")
+        destino.unlink()
+
+
+def _benchmark(caminhos, repeticoes):
+    documentos = [carregar(caminho) for caminho in caminhos]
+
+    def stdlib_indentado(dados, caminho):
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            json.dump(dados, arquivo, indent=4, ensure_ascii=False)
+
+    def stdlib_ler(caminho):
+        with open(caminho, 'r', encoding='utf-8') as arquivo:
+            return json.load(arquivo)
+
+    casos = [("json indent=4 (antes)", '.json', stdlib_indentado, stdlib_ler)]
+    for extensao in EXTENSOES:
+        if extensao == '.json.zst' and zstandard is None:
+            continue
+        casos.append((f"{'orjson' if orjson else 'json'} compacto {extensao}", extensao, None, carregar))
+
+    print(f"{len(documentos)} currículos, melhor de {repeticoes} rodadas")
+    print(f"{'formato':32} | {'MB em disco':>11} | {'gravação/s':>10} | {'leitura/s':>10}")
+    pasta = Path(tempfile.mkdtemp(prefix='json_io_'))
+    try:
+        _verificar_gravacao_repetida(documentos[0], pasta)
+        for nome, extensao, gravar_caso, ler_caso in casos:
+            destinos = [pasta / f"{posicao}{extensao}" for posicao in range(len(documentos))]
+            if gravar_caso is None:
+                # Sem gravar(): a partir da segunda rodada ela só compararia os bytes
+                def gravar_todos():
+                    for dados, destino in zip(documentos, destinos):
+                        _gravar_bytes(destino, serializar(dados, destino))
+            else:
+                def gravar_todos():
+                    for dados, destino in zip(documentos, destinos):
+                        gravar_caso(dados, destino)
+
+            tempo_gravacao = _medir(gravar_todos, repeticoes)
+            tempo_leitura = _medir(lambda: [ler_caso(destino) for destino in destinos], repeticoes)
+            tamanho = sum(destino.stat().st_size for destino in destinos) / 1024 / 1024
+            print(
+                f"{nome:32} | {tamanho:11.2f} | {len(destinos) / tempo_gravacao:10.0f} | "
+                f"{len(destinos) / tempo_leitura:10.0f}"
+            )
+            for destino in destinos:
+                destino.unlink()
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+def main():
+    argumentos = argparse.ArgumentParser(
+        description="Benchmark de leitura e gravação dos JSONs do corpus (json x orjson, compressão)."
+    )
+    argumentos.add_argument(
+        "--entrada",
+        default="curriculos_json",
+        help="Pasta com os JSONs usados como amostra (padrão: curriculos_json).",
+    )
+    argumentos.add_argument("--repeticoes", type=int, default=3, help="Rodadas por medição (padrão: 3).")
+    args = argumentos.parse_args()
+
+    caminhos = listar_jsons(args.entrada)
+    if not caminhos:
+        raise SystemExit(f"Nenhum JSON encontrado em {args.entrada}")
+    _benchmark(caminhos, args.repeticoes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Padrões de expressões regulares e funções de limpeza de texto compartilhados
+pelo parser (parser.py) e pelo preenchedor de IDs (filling_idlattes.py).
+
+Todos os padrões são compilados uma única vez, na importação do módulo, em vez
+de depender do cache interno do `re` a cada chamada dentro dos laços.
+
+Uso (micro-benchmark):
+    python normalizacao.py [--itens 10000] [--repeticoes 5]
+"""
+
+import argparse
+import re
+import timeit
+import unicodedata
+
+# Espaços, tabs e quebras de linha
+ESPACOS = re.compile(r'\s+')
+PONTO = re.compile(r'\.')
+# Pontuação e espaços sobrando no fim de uma citação
+PONTUACAO_FINAL = re.compile(r'[\.,\s:-]+$')
+# Prefixo de URL dos DOIs ("http://dx.doi.org/10.1000/x" -> "10.1000/x")
+PREFIXO_DOI = re.compile(r'^(?:https?://)?(?:dx\.)?doi\.org/|^doi:\s*', re.IGNORECASE)
+# Palavras (só letras), para contagens rápidas sem tokenizador
+PALAVRA = re.compile(r'[^\W\d_]+')
+# Palavras e números (títulos: "Parte 2" e "Parte 3" são textos diferentes)
+TERMO = re.compile(r'[^\W_]+')
+# Tudo que não é letra, dígito ou vírgula (a vírgula separa sobrenome e prenomes nas citações)
+NAO_ALFANUMERICO = re.compile(r'[^\w,]+')
+
+# Áreas de atuação: "Grande área: ... / Área: ... / Subárea: ..."
+SEPARADOR_AREA = re.compile(r'\s+/\s+Área:\s+')
+SEPARADOR_SUBAREA = re.compile(r'\s+/\s+Subárea:\s+')
+
+# Citações de artigos: autores separados do título por " . " ou ".. "
+SEPARADOR_AUTORES = re.compile(r'(?:\s\.\s|\.\.\s)')
+# Título gravado pelo parser quando a citação não pôde ser dividida
+TITULO_NAO_IDENTIFICADO = "Título não identificado"
+FIM_DE_FRASE = re.compile(r'\.\s')
+
+ORIENTACAO = re.compile(
+    r"^\s*(?P<nome>.+)\.\s+(?P<titulo>.+?)\.\s*(?:In[ií]cio:\s)?(?P<ano>\d{4})",
+    re.IGNORECASE | re.DOTALL
+)
+PERIODO_PROJETO = re.compile(r'^(\d{4}\s*-\s*(?:Atual|\d{4}))')
+# Ano de publicação numa citação (o último ano que aparece no texto)
+ANO = re.compile(r'\b(?:19|20)\d{2}\b')
+
+# Rótulos procurados nos <b> e <h1> do currículo
+ROTULO_ENDERECO = re.compile(r'Endereço Profissional')
+ROTULO_AREAS = re.compile(r'Áreas de atuação')
+ROTULO_NOMES_CITACAO = re.compile(r'Nome em citações bibliográficas')
+
+
+def colapsar_espacos(texto):
+    """Troca qualquer sequência de espaços, tabs e quebras de linha por um espaço."""
+    return ESPACOS.sub(' ', texto)
+
+
+def remover_espacos(texto):
+    """Remove todos os espaços em branco do texto."""
+    return ESPACOS.sub('', texto)
+
+
+def remover_acentos(texto):
+    """Remove os diacríticos: "González" -> "Gonzalez"."""
+    decomposto = unicodedata.normalize('NFKD', texto)
+    return ''.join(caractere for caractere in decomposto if not unicodedata.combining(caractere))
+
+
+def normalizar_doi(doi):
+    """Reduz o link do DOI ao identificador, em minúsculas; devolve '' se não houver DOI."""
+    if not doi:
+        return ''
+    return PREFIXO_DOI.sub('', doi.strip()).lower()
+
+
+def remover_pontuacao_final(texto, substituto='.'):
+    """Troca a pontuação (e os espaços) que sobram no fim do texto por `substituto`."""
+    return PONTUACAO_FINAL.sub(substituto, texto)
+
+
+def dividir_area_subarea(texto_area):
+    """
+    Separa um texto "Grande área: X / Área: Y / Subárea: Z." em (área, subárea).
+
+    Devolve None quando o texto não tem "Área:" e subárea None quando só há a área.
+    """
+    partes = SEPARADOR_AREA.split(texto_area, maxsplit=2)
+    if len(partes) < 2:
+        return None
+
+    #removendo as grande áreas, para termos somente as áreas e subáreas
+    partes2 = SEPARADOR_SUBAREA.split(partes[1].strip())
+
+    # Remove o ponto final que pode sobrar na Área caso não haja subárea
+    area = PONTO.sub('', partes2[0]).strip()
+    if len(partes2) < 2:
+        return area, None
+
+    #Limpando a string de subárea, removendo os \t e \n e os pontos desnecessários
+    subarea = PONTO.sub(' ', colapsar_espacos(partes2[1])).strip()
+    return area, subarea
+
+
+def _textos_exemplo(quantidade):
+    base = [
+        "Grande área: Ciências Exatas e da Terra / Área: Ciência da Computação / Subárea: Banco de\n\t Dados.",
+        "SILVA, J.;  ALVES, P. .  Título   do artigo: estudo. Revista, v. 1, p. 1-10, 2020. , ",
+        "Sahudy   Montenegro\n González",
+    ]
+    return [base[i % len(base)] + str(i) for i in range(quantidade)]
+
+
+def _dividir_area_subarea_sem_compilar(texto_area):
+    # Versão anterior (padrões em string, chamados a cada item), usada como referência no benchmark
+    if not re.search(r'\s+/\s+Área:\s+', texto_area):
+        return None
+    partes = re.split(r'\s+/\s+Área:\s+', texto_area, maxsplit=2)
+    partes2 = re.split(r'\s+/\s+Subárea:\s+', partes[1].strip())
+    area = re.sub(r'\.', '', partes2[0]).strip()
+    if len(partes2) < 2:
+        return area, None
+    subarea = re.sub(r'\s+', ' ', partes2[1])
+    subarea = re.sub(r'\.', ' ', subarea).strip()
+    return area, subarea
+
+
+def _benchmark(itens, repeticoes):
+    textos = _textos_exemplo(itens)
+
+    # Cada par compara a chamada com o padrão em string (cache do `re`) com o padrão pré-compilado
+    casos = [
+        ("colapsar espaços",
+         lambda: [re.sub(r'\s+', ' ', t) for t in textos],
+         lambda: [colapsar_espacos(t) for t in textos]),
+        ("pontuação final",
+         lambda: [re.sub(r'[\.,\s:-]+$', '.', t) for t in textos],
+         lambda: [remover_pontuacao_final(t) for t in textos]),
+        ("área/subárea",
+         lambda: [_dividir_area_subarea_sem_compilar(t) for t in textos],
+         lambda: [dividir_area_subarea(t) for t in textos]),
+        ("normalizar nome",
+         lambda: [re.sub(r'\s+', '', t.upper()) for t in textos],
+         lambda: [remover_espacos(t.upper()) for t in textos]),
+    ]
+
+    print(f"{'operação':20} | {'re.<func>(str)':>15} | {'pré-compilado':>15} | {'ganho':>8}  (ms por {itens} itens)")
+    for nome, inline, compilado in casos:
+        tempo_inline = min(timeit.repeat(inline, number=1, repeat=repeticoes)) * 1000
+        tempo_compilado = min(timeit.repeat(compilado, number=1, repeat=repeticoes)) * 1000
+        ganho = (tempo_inline - tempo_compilado) / tempo_inline * 100 if tempo_inline else 0.0
+        print(f"{nome:20} | {tempo_inline:15.2f} | {tempo_compilado:15.2f} | {ganho:7.1f}%")
+
+
+def main():
+    argumentos = argparse.ArgumentParser(
+        description="Micro-benchmark dos padrões pré-compilados contra o uso de re.<func> com strings."
+    )
+    argumentos.add_argument("--itens", type=int, default=10000, help="Itens por rodada (padrão: 10000).")
+    argumentos.add_argument("--repeticoes", type=int, default=5, help="Rodadas por medição (padrão: 5).")
+    args = argumentos.parse_args()
+
+    _benchmark(args.itens, args.repeticoes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Verificação de paridade entre os backends do LattesParser.
+
+Uso:
+    python paridade_backends.py --entrada <pasta-htmls> [--ids ids.txt] [--workers 4]
+
+Cada currículo é analisado com o backend 'bs4' e com o 'lxml' e os dois
+dicionários são comparados campo a campo. A saída em fluxo (converter_em_fluxo,
+lida de volta com ler_jsonl) de cada backend também é comparada com o bs4.
+O script termina com código 1 se algum currículo produzir resultado diferente.
+"""
+
+import argparse
+import json
+import logging
+import tempfile
+from pathlib import Path
+
+from parser import LattesParser, converter_em_fluxo, ler_jsonl, listar_curriculos
+
+BACKENDS_FLUXO = ('bs4', 'lxml')
+
+
+def parse_silencioso(html_content, backend):
+    # Os extratores registram avisos no logger 'parser'; aqui só interessa o resultado
+    logging.getLogger('parser').disabled = True
+    try:
+        return LattesParser(html_content, backend=backend).parse()
+    finally:
+        logging.getLogger('parser').disabled = False
+
+
+def comparar_dados(dados_a, dados_b):
+    """Devolve a lista de campos cujo valor difere entre os dois dicionários."""
+    campos_diferentes = []
+    for campo in list(dados_a) + [c for c in dados_b if c not in dados_a]:
+        if campo not in dados_a or campo not in dados_b:
+            campos_diferentes.append(campo)
+            continue
+
+        # Compara a serialização para pegar também diferenças de ordem e de tipo
+        valor_a = json.dumps(dados_a[campo], ensure_ascii=False)
+        valor_b = json.dumps(dados_b[campo], ensure_ascii=False)
+        if valor_a != valor_b:
+            campos_diferentes.append(campo)
+
+    if not campos_diferentes and list(dados_a) != list(dados_b):
+        campos_diferentes.append('<ordem dos campos>')
+    return campos_diferentes
+
+
+def comparar_backends(html_content):
+    """Devolve a lista de campos cujo valor difere entre os backends."""
+    return comparar_dados(parse_silencioso(html_content, 'bs4'), parse_silencioso(html_content, 'lxml'))
+
+
+def curriculos_em_fluxo(caminhos, backend, workers=None):
+    """Converte `caminhos` com converter_em_fluxo e devolve {_id: currículo} lido dos JSONL."""
+    with tempfile.TemporaryDirectory(prefix='paridade_fluxo_') as pasta:
+        logging.getLogger('parser').disabled = True
+        try:
+            converter_em_fluxo(caminhos, pasta, workers, backend=backend)
+        finally:
+            logging.getLogger('parser').disabled = False
+        return {
+            dados['_id']: dados
+            for arquivo in sorted(Path(pasta).glob('registros_*.jsonl'))
+            for dados in ler_jsonl(arquivo)
+        }
+
+
+def main():
+    argumentos = argparse.ArgumentParser(
+        description="Compara a saída dos backends bs4 e lxml do LattesParser, em lote e em fluxo."
+    )
+    argumentos.add_argument("--entrada", default="curriculos", help="Pasta com os HTMLs (padrão: curriculos).")
+    argumentos.add_argument("--ids", help="Arquivo com um ID Lattes por linha.")
+    argumentos.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Processos da conversão em fluxo (padrão: número de CPUs).",
+    )
+    args = argumentos.parse_args()
+
+    caminhos = listar_curriculos(args.entrada, args.ids)
+    fluxos = {backend: curriculos_em_fluxo(caminhos, backend, args.workers) for backend in BACKENDS_FLUXO}
+    divergentes = 0
+    for caminho in caminhos:
+        with open(caminho, 'r', encoding='utf-8') as fp:
+            html_content = fp.read()
+        dados_bs4 = parse_silencioso(html_content, 'bs4')
+
+        problemas = []
+        campos = comparar_dados(dados_bs4, parse_silencioso(html_content, 'lxml'))
+        if campos:
+            problemas.append(f"lxml: {', '.join(campos)}")
+        for backend, curriculos in fluxos.items():
+            dados_fluxo = curriculos.get(dados_bs4.get('_id'))
+            if dados_fluxo is None:
+                problemas.append(f"fluxo {backend}: ausente")
+                continue
+            campos = comparar_dados(dados_bs4, dados_fluxo)
+            if campos:
+                problemas.append(f"fluxo {backend}: {', '.join(campos)}")
+
+        if problemas:
+            divergentes += 1
+            print(f"{caminho}: {' | '.join(problemas)}")
+
+    print(f"Currículos comparados: {len(caminhos)} | Divergentes: {divergentes}")
+    if divergentes:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
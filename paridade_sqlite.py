@@ -0,0 +1,79 @@
+"""
+Verificação de ida e volta do corpus SQLite (corpus_sqlite.py).
+
+Uso:
+    python paridade_sqlite.py --entrada <pasta-htmls> [--ids ids.txt] [--backend bs4]
+
+Cada currículo é analisado pelo LattesParser, gravado num corpus SQLite
+temporário e lido de volta; json_io.dumps dos dois dicionários precisa ser
+igual byte a byte. Além do currículo analisado, são verificadas variantes com
+cada seção valendo None e ausente, os casos que o parser produz quando uma
+seção falta ou falha. O script termina com código 1 se alguma divergir.
+"""
+
+import argparse
+import logging
+import tempfile
+from pathlib import Path
+
+import json_io
+from corpus_sqlite import CAMPOS_TABELA, CAMPOS_TEXTO, CorpusSQLite
+from parser import BACKENDS, LattesParser, listar_curriculos
+
+
+def variantes(dados):
+    """Gera (nome, currículo): o próprio currículo e cópias com uma seção None ou ausente."""
+    yield 'original', dados
+    for campo in (*CAMPOS_TEXTO, *CAMPOS_TABELA, 'area_de_atuacao'):
+        yield f'{campo}=None', {**dados, campo: None}
+        yield f'sem {campo}', {chave: valor for chave, valor in dados.items() if chave != campo}
+
+
+def comparar_ida_e_volta(corpus, dados):
+    """Devolve os nomes das variantes de `dados` que não voltam iguais do corpus."""
+    divergentes = []
+    for nome, variante in variantes(dados):
+        corpus.gravar(variante)
+        lido = corpus.ler(variante['_id'])
+        if lido is None or json_io.dumps(lido) != json_io.dumps(variante):
+            divergentes.append(nome)
+    return divergentes
+
+
+def main():
+    argumentos = argparse.ArgumentParser(
+        description="Verifica se os currículos voltam idênticos do corpus SQLite."
+    )
+    argumentos.add_argument("--entrada", default="curriculos", help="Pasta com os HTMLs (padrão: curriculos).")
+    argumentos.add_argument("--ids", help="Arquivo com um ID Lattes por linha.")
+    argumentos.add_argument(
+        "--backend",
+        choices=sorted(BACKENDS),
+        default="bs4",
+        help="Motor de parsing: bs4 (BeautifulSoup) ou lxml (padrão: bs4).",
+    )
+    args = argumentos.parse_args()
+    # Os extratores registram avisos no logger 'parser'; aqui só interessa o resultado
+    logging.getLogger('parser').disabled = True
+
+    caminhos = listar_curriculos(args.entrada, args.ids)
+    divergentes = 0
+    with tempfile.TemporaryDirectory(prefix='paridade_sqlite_') as pasta:
+        corpus = CorpusSQLite(Path(pasta) / 'corpus.sqlite')
+        for caminho in caminhos:
+            with open(caminho, 'r', encoding='utf-8') as fp:
+                dados = LattesParser(fp.read(), backend=args.backend).parse()
+
+            casos = comparar_ida_e_volta(corpus, dados)
+            if casos:
+                divergentes += 1
+                print(f"{caminho}: {', '.join(casos)}")
+        corpus.close()
+
+    print(f"Currículos verificados: {len(caminhos)} | Divergentes: {divergentes}")
+    if divergentes:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,45 +1,322 @@
 from collections import defaultdict
-from bs4 import BeautifulSoup
-import re
-import json
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from functools import partial
+from itertools import groupby
+from pathlib import Path
+from bs4 import BeautifulSoup, Tag
+from lxml import etree
+from cache_parser import CacheParser, hash_conteudo
+from corpus_sqlite import CorpusSQLite
+import json_io
+from normalizacao import (
+    FIM_DE_FRASE,
+    ORIENTACAO,
+    PERIODO_PROJETO,
+    ROTULO_AREAS,
+    ROTULO_ENDERECO,
+    ROTULO_NOMES_CITACAO,
+    SEPARADOR_AUTORES,
+    TITULO_NAO_IDENTIFICADO,
+    colapsar_espacos,
+    dividir_area_subarea,
+    remover_pontuacao_final,
+)
+import argparse
+import cProfile
+import logging
+import math
+import os
+import pstats
+import time
+import tracemalloc
+
+logger = logging.getLogger(__name__)
+
+# Versão da saída de parse(); incremente sempre que o dicionário gerado mudar,
+# para que as entradas antigas do cache de currículos deixem de ser usadas.
+VERSAO_PARSER = '1'
+
+# Extratores na ordem em que parse() os executa e as chaves de self.data que cada um preenche
+EXTRATORES = (
+    ('extract_lattes_id', ('_id',)),
+    ('extract_name', ('nome_completo',)),
+    ('extract_address', ('endereco',)),
+    ('extract_activity', ('area_de_atuacao',)),
+    ('extract_articles', ('listaPB',)),
+    ('extract_productions', ('producao_revistas', 'trabalhos_completos', 'resumos_expandidos', 'resumos_publicados')),
+    ('extract_orientations', ('orientacoes_concluidas', 'orientacoes_em_andamento')),
+    ('extract_projects', ('projetos',)),
+    ('extract_citation_names', ('listaNomesCitacao',)),
+    ('extract_research_lines', ('linhas_pesquisa',)),
+)
+
+
+# Campo de self.data -> extrator que o preenche
+CAMPOS = {chave: extrator for extrator, chaves in EXTRATORES for chave in chaves}
+# Sempre extraídos quando só alguns campos são pedidos: nomeiam o JSON e identificam o currículo no corpus
+CAMPOS_IDENTIFICACAO = ('_id', 'nome_completo')
+
+# Trechos do HTML que marcam o que cada extrator lê. Com `campos`, o HTML é
+# cortado no primeiro title-wrapper depois do último marcador necessário.
+MARCADORES = {
+    'extract_lattes_id': ('font-weight: bold; color: #326C99;',),
+    'extract_name': ('class="nome"',),
+    'extract_address': ('name="Endereco"',),
+    'extract_activity': ('name="AreasAtuacao"',),
+    'extract_articles': ('artigo-completo',),
+    'extract_productions': ('name="TextosJornaisRevistas"', 'name="TrabalhosPublicadosAnaisCongresso"'),
+    'extract_orientations': ('name="Orientacaoemandamento"', 'name="Orientacoesconcluidas"'),
+    'extract_projects': ('name="ProjetosPesquisa"',),
+    'extract_citation_names': ('name="Identificacao"',),
+    'extract_research_lines': ('name="LinhaPesquisa"',),
+}
+# Sem estes marcadores o extrator não acha a seção em lugar nenhum, então a
+# ausência não impede o corte; sem os demais (rótulos procurados pelo texto)
+# o HTML é mantido inteiro.
+MARCADORES_OPCIONAIS = frozenset({
+    'font-weight: bold; color: #326C99;',
+    'artigo-completo',
+    'name="TextosJornaisRevistas"',
+    'name="TrabalhosPublicadosAnaisCongresso"',
+    'name="Orientacaoemandamento"',
+    'name="Orientacoesconcluidas"',
+    'name="ProjetosPesquisa"',
+    'name="LinhaPesquisa"',
+})
+INICIO_SECAO = '<div class="title-wrapper"'
+
+
+def extratores_de(campos=None):
+    """Extratores, na ordem de parse(), que preenchem `campos` (e os de identificação); None = todos."""
+    if campos is None:
+        return [extrator for extrator, _ in EXTRATORES]
+    desconhecidos = set(campos) - CAMPOS.keys()
+    if desconhecidos:
+        raise ValueError(f"Campos desconhecidos: {', '.join(sorted(desconhecidos))}")
+    necessarios = {CAMPOS[campo] for campo in (*CAMPOS_IDENTIFICACAO, *campos)}
+    return [extrator for extrator, _ in EXTRATORES if extrator in necessarios]
+
+
+def chaves_de(campos=None):
+    """Chaves de self.data preenchidas por parse(campos=campos)."""
+    extratores = extratores_de(campos)
+    return {chave for extrator, chaves in EXTRATORES if extrator in extratores for chave in chaves}
+
+
+def truncar_html(html_content, extratores):
+    """
+    Corta o HTML antes da primeira seção (title-wrapper) posterior ao último
+    marcador dos `extratores`, para que a árvore não inclua o resto da página.
+    Devolve o HTML inteiro se faltar um marcador obrigatório.
+    """
+    ultimo = 0
+    for extrator in extratores:
+        for marcador in MARCADORES[extrator]:
+            posicao = html_content.rfind(marcador)
+            if posicao < 0:
+                if marcador in MARCADORES_OPCIONAIS:
+                    continue
+                return html_content
+            ultimo = max(ultimo, posicao)
+
+    corte = html_content.find(INICIO_SECAO, ultimo)
+    return html_content if corte < 0 else html_content[:corte]
+
+
+# Como cada extrator encontra a sua seção no índice; no modo em fluxo, diz em
+# qual title-wrapper ele deve rodar
+SECOES = {
+    'extract_address': ('rotulos', ROTULO_ENDERECO),
+    'extract_activity': ('titulos', ROTULO_AREAS),
+    'extract_citation_names': ('rotulos', ROTULO_NOMES_CITACAO),
+    'extract_productions': ('ancoras', ('TextosJornaisRevistas', 'TrabalhosPublicadosAnaisCongresso')),
+    'extract_orientations': ('ancoras', ('Orientacaoemandamento', 'Orientacoesconcluidas')),
+    'extract_projects': ('ancoras', ('ProjetosPesquisa',)),
+    'extract_research_lines': ('ancoras', ('LinhaPesquisa',)),
+}
+ESTILO_ID_LATTES = 'font-weight: bold; color: #326C99;'
+# Tamanho dos pedaços de HTML entregues ao leitor incremental do lxml
+TAMANHO_BLOCO_FLUXO = 64 * 1024
+
+
+def montar_curriculo(registros):
+    """Remonta o dicionário de parse() a partir dos registros (campo, posição, valor) de registros()."""
+    dados = {}
+    for campo, posicao, valor in registros:
+        if posicao is None:
+            dados[campo] = valor
+        else:
+            dados.setdefault(campo, []).append(valor)
+
+    # Mesma ordem de chaves de parse(); 'artigos' só aparece quando a listaPB falha
+    ordem = [chave for _, chaves in EXTRATORES for chave in chaves]
+    ordem.insert(ordem.index('listaPB') + 1, 'artigos')
+    posicoes = {chave: posicao for posicao, chave in enumerate(ordem)}
+    return {chave: dados[chave] for chave in sorted(dados, key=lambda chave: posicoes.get(chave, len(ordem)))}
+
+
+def _id_primeiro(registros):
+    # Segura os registros até o do _id, para que quem grava saiba a que currículo cada um pertence
+    retidos = []
+    for registro in registros:
+        if retidos is None:
+            yield registro
+        elif registro[0] == '_id':
+            yield registro
+            yield from retidos
+            retidos = None
+        else:
+            retidos.append(registro)
+    if retidos:
+        yield from retidos
+
+
+def _quantidade(valor):
+    if isinstance(valor, (list, dict)):
+        return len(valor)
+    return 1 if valor else 0
+
+
+class EstatisticasParse:
+    """
+    Medições de um currículo: tempo (s) de cada passo ('arvore', 'indice' e
+    cada extrator), itens que cada extrator gerou e, quando o tracemalloc está
+    ativo, o pico de memória (bytes) alocada durante cada passo.
+    """
+
+    def __init__(self):
+        self.tempos = {}
+        self.itens = {}
+        self.memoria = {}
+
+    @contextmanager
+    def medir(self, passo):
+        memoria = tracemalloc.is_tracing()
+        if memoria:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.tempos[passo] = self.tempos.get(passo, 0.0) + time.perf_counter() - inicio
+            if memoria:
+                self.memoria[passo] = max(self.memoria.get(passo, 0), tracemalloc.get_traced_memory()[1] - base)
+
 
 class LattesParser:
+
+    # LattesParser(html, backend='lxml') devolve um LxmlLattesParser
+    def __new__(cls, html_content, backend='bs4', campos=None, fluxo=False):
+        if cls is LattesParser and backend != 'bs4':
+            if backend not in BACKENDS:
+                raise ValueError(f"Backend desconhecido: {backend!r} (opções: {', '.join(BACKENDS)})")
+            cls = BACKENDS[backend]
+        return super().__new__(cls)
     
-    def __init__(self, html_content):
+    # Com `campos`, só os extratores desses campos rodam e a árvore é montada
+    # apenas até a última seção que eles leem (ver truncar_html). `fluxo` só
+    # muda algo no backend lxml (ver LxmlLattesParser.registros).
+    def __init__(self, html_content, backend='bs4', campos=None, fluxo=False):
         
-        self.soup = BeautifulSoup(html_content, 'lxml')
+        self.estatisticas = EstatisticasParse()
+        html_content = self._preparar_html(html_content, campos)
+        with self.estatisticas.medir('arvore'):
+            self.soup = BeautifulSoup(html_content, 'lxml')
         self.data = {}
+        self._indice = None
+
+    def _preparar_html(self, html_content, campos):
+        self.extratores = extratores_de(campos)
+        if campos is None:
+            return html_content
+        return truncar_html(html_content, self.extratores)
+
+    @property
+    def indice(self):
+        if self._indice is None:
+            self._indice = self.build_index()
+        return self._indice
+
+    # Percorre a árvore uma única vez e guarda os nós que os extratores procuram,
+    # evitando uma busca completa no documento para cada seção.
+    def build_index(self):
+        indice = {
+            'nome': None,
+            'id_lattes': None,
+            'ancoras': defaultdict(list),  # <a name="..."> -> lista de âncoras
+            'rotulos': [],                 # (texto do <b>, tag <b>)
+            'titulos': [],                 # (texto do <h1>, tag <h1>)
+            'artigos': [],                 # <div class="artigo-completo">
+        }
+
+        for tag in self.soup.descendants:
+            if not isinstance(tag, Tag):
+                continue
+
+            if tag.name == 'a':
+                nome_ancora = tag.get('name')
+                if nome_ancora is not None:
+                    indice['ancoras'][nome_ancora].append(tag)
+            elif tag.name == 'b':
+                if tag.string is not None:
+                    indice['rotulos'].append((tag.string, tag))
+            elif tag.name == 'div':
+                if 'artigo-completo' in tag.get('class', []):
+                    indice['artigos'].append(tag)
+            elif tag.name == 'h1':
+                if tag.string is not None:
+                    indice['titulos'].append((tag.string, tag))
+            elif tag.name == 'h2':
+                if indice['nome'] is None and 'nome' in tag.get('class', []):
+                    indice['nome'] = tag
+            elif tag.name == 'span':
+                if indice['id_lattes'] is None and tag.get('style') == 'font-weight: bold; color: #326C99;':
+                    indice['id_lattes'] = tag
+
+        return indice
+
+    def find_anchor(self, nome):
+        ancoras = self.indice['ancoras'].get(nome)
+        return ancoras[0] if ancoras else None
+
+    def find_label(self, padrao, secao='rotulos'):
+        for texto, tag in self.indice[secao]:
+            if padrao.search(texto):
+                return tag
+        return None
         
     # Extrai o nome completo do pesquisador.
     def extract_name(self):
         try:
-            nome_tag = self.soup.find('h2', class_='nome')
+            nome_tag = self.indice['nome']
             
             if nome_tag:
                 self.data['nome_completo'] = nome_tag.text.strip()
             else:
                 self.data['nome_completo'] = None 
         except Exception as e:
-            print(f"Erro ao extrair nome: {e}")
+            logger.warning("Erro ao extrair nome: %s", e)
             self.data['nome_completo'] = None
 
     # Extrai o ID Lattes de 16 dígitos.
     def extract_lattes_id(self):
         try:
-            id_tag = self.soup.find('span', style='font-weight: bold; color: #326C99;')
+            id_tag = self.indice['id_lattes']
             
             if id_tag:
                 self.data['_id'] = id_tag.text.strip()
             else:
                 self.data['_id'] = None
         except Exception as e:
-            print(f"Erro ao extrair ID Lattes: {e}")
+            logger.warning("Erro ao extrair ID Lattes: %s", e)
             self.data['_id'] = None
     
     # Extrai o endereço profissional.
     def extract_address(self):
         try:
-            endereco_tag = self.soup.find('b', string=re.compile(r'Endereço Profissional'))
+            endereco_tag = self.find_label(ROTULO_ENDERECO)
             if not endereco_tag:
                 self.data['endereco'] = None
                 return
@@ -53,21 +330,23 @@ class LattesParser:
                     br.replace_with(', ')
                 
                 texto = endereco_cell.get_text(separator=' ', strip=True)
-                # Remove o excesso de espaços e tabs do HTML original
-                texto = re.sub(r'\s+', ' ', texto)
-                texto = texto.replace(':,', ':').replace(', ,', ',')
-                
-                self.data['endereco'] = texto.strip()
+                self.data['endereco'] = self.limpar_endereco(texto)
             else:
                 self.data['endereco'] = None
 
         except Exception as e:
-            print(f"Erro ao extrair endereço: {e}")
+            logger.warning("Erro ao extrair endereço: %s", e)
             self.data['endereco'] = None
+
+    def limpar_endereco(self, texto):
+        # Remove o excesso de espaços e tabs do HTML original
+        texto = colapsar_espacos(texto)
+        texto = texto.replace(':,', ':').replace(', ,', ',')
+        return texto.strip()
     
     def extract_activity(self):
         try:
-            activity_tag = self.soup.find('h1', string=re.compile(r'Áreas de atuação'))
+            activity_tag = self.find_label(ROTULO_AREAS, secao='titulos')
             
             if not activity_tag:
                 raise ValueError("Rótulo 'Áreas de atuação' não encontrado.")
@@ -81,54 +360,36 @@ class LattesParser:
                 activity_pai = pai_tag
                 
             activities = activity_pai.find_all('div', class_='layout-cell-9')
-            
-            # cria um dicionário de listas, para não haver substituição dos valores das chaves
-            areas = defaultdict(list)
-            for area in activities:
-                #pegando as grande áreas, Áreas e as subáreas 
-                texto_area = area.get_text(strip = True)
-                palavra_chave = r'\s+/\s+Área:\s+'
-                
-                # Verifica se a palavra-chave "Área:" existe antes de tentar cortar
-                if not re.search(palavra_chave, texto_area):
-                    continue
-                
-                partes = re.split(palavra_chave, texto_area, maxsplit=2)
-                
-                #removendo as grande áreas, para termos somente as áreas e subáreas
-                segunda_parte = partes[1].strip()
-                
-                #extraindo as subáreas
-                palavra_chave2 = r'\s+/\s+Subárea:\s+'
-                partes2 = re.split(palavra_chave2, segunda_parte)
-                
-                chave_area = partes2[0]
-                
-                # Remove o ponto final que pode sobrar na Área caso não haja subárea
-                chave_area = re.sub(r'\.', '', chave_area).strip()
-                
-                # Verifica se a divisão encontrou uma subárea 
-                if len(partes2) > 1:
-                    valor_subarea = partes2[1]
-                    
-                    #Limpando a string de subárea, removendo os \t e \n e os pontos desnecessários
-                    valor_subarea = re.sub(r'\s+', ' ', valor_subarea)
-                    valor_subarea = re.sub(r'\.', ' ', valor_subarea)
-                    valor_subarea = valor_subarea.strip()
-                    
-                    #Adicionando ao dicionário de listas (evitando duplicatas)
-                    if valor_subarea not in areas[chave_area]:
-                        areas[chave_area].append(valor_subarea)
-                else:
-                    # Se não houver subárea, apenas registra a chave da Área sem nenhum valor na lista
-                    if chave_area not in areas:
-                        areas[chave_area] = []
-                
-            self.data['area_de_atuacao'] = dict(areas)
+            textos_areas = [area.get_text(strip = True) for area in activities]
+            self.data['area_de_atuacao'] = self.agrupar_areas(textos_areas)
             
         except Exception as e:
-            print(f"Erro ao extrair as áreas de atuação: {e}")
+            logger.warning("Erro ao extrair as áreas de atuação: %s", e)
             self.data['area_de_atuacao'] = None
+
+    # Recebe os textos "Grande área: ... / Área: ... / Subárea: ..." e agrupa as subáreas por área
+    def agrupar_areas(self, textos_areas):
+        # cria um dicionário de listas, para não haver substituição dos valores das chaves
+        areas = defaultdict(list)
+        for texto_area in textos_areas:
+            # Ignora os textos sem a palavra-chave "Área:"
+            divisao = dividir_area_subarea(texto_area)
+            if divisao is None:
+                continue
+
+            chave_area, valor_subarea = divisao
+            
+            # Verifica se a divisão encontrou uma subárea 
+            if valor_subarea is not None:
+                #Adicionando ao dicionário de listas (evitando duplicatas)
+                if valor_subarea not in areas[chave_area]:
+                    areas[chave_area].append(valor_subarea)
+            else:
+                # Se não houver subárea, apenas registra a chave da Área sem nenhum valor na lista
+                if chave_area not in areas:
+                    areas[chave_area] = []
+
+        return dict(areas)
             
     def processar_citacao_artigo(self, html_cell):
         for info in html_cell.find_all('span', class_='informacao-artigo'):
@@ -141,13 +402,17 @@ class LattesParser:
             img.decompose()
             
         texto_completo = html_cell.get_text(separator=' ', strip=True)
-        texto_completo = re.sub(r'\s+', ' ', texto_completo)
-        texto_limpo = re.sub(r'[\.,\s:-]+$', '.', texto_completo)
+        return self.dividir_citacao(texto_completo)
+
+    # Separa a citação em colaboradores, título e texto completo
+    def dividir_citacao(self, texto_completo):
+        texto_completo = colapsar_espacos(texto_completo)
+        texto_limpo = remover_pontuacao_final(texto_completo)
         
-        partes = re.split(r'(?:\s\.\s|\.\.\s)', texto_limpo, maxsplit=1)
+        partes = SEPARADOR_AUTORES.split(texto_limpo, maxsplit=1)
         
         colaboradores = []
-        titulo_artigo = "Título não identificado"
+        titulo_artigo = TITULO_NAO_IDENTIFICADO
         
         if len(partes) > 1:
             bloco_autores = partes[0].strip()
@@ -158,7 +423,7 @@ class LattesParser:
                 if nome_limpo:
                     colaboradores.append({"nome": nome_limpo, "id_lattes": ""})
             
-            partes_resto = re.split(r'\.\s', resto, maxsplit=1)
+            partes_resto = FIM_DE_FRASE.split(resto, maxsplit=1)
             if partes_resto:
                 titulo_artigo = partes_resto[0].strip()
         else:
@@ -168,32 +433,16 @@ class LattesParser:
     
     def extract_articles(self):
         try:
-            articles_tags = self.soup.find_all('div', class_='artigo-completo')
+            articles_tags = self.indice['artigos']
             
             if not articles_tags:
                 raise ValueError("Rótulo 'artigo completo' não encontrado.")
 
             lista_artigos = []
             for artigo in articles_tags:
-                artigo_tag = artigo.find('div', class_='layout-cell-11')
-                
-                if not artigo_tag:
-                    continue
-
-                doi_tag = artigo_tag.find('a', class_='icone-doi')
-                link_doi = doi_tag['href'] if doi_tag else None
-                
-                # CORREÇÃO 1 e 2: Passamos a tag HTML inteira (artigo_tag) e recebemos as 3 variáveis
-                colaboradores, titulo, texto_limpo = self.processar_citacao_artigo(artigo_tag)
-                
-                dados_artigo = {
-                    'doi': link_doi,
-                    'titulo': titulo,
-                    'colaboradores': colaboradores,
-                    'texto_completo': texto_limpo
-                }
-                    
-                lista_artigos.append(dados_artigo)
+                dados_artigo = self.montar_artigo(artigo)
+                if dados_artigo is not None:
+                    lista_artigos.append(dados_artigo)
             
             # Preenche a listaPB corretamente e garante que a chave 'artigos' não fique solta/nula
             self.data['listaPB'] = lista_artigos
@@ -201,15 +450,35 @@ class LattesParser:
                 del self.data['artigos']
                 
         except Exception as e:
-            print(f"Erro ao extrair artigos publicados: {e}")
+            logger.warning("Erro ao extrair artigos publicados: %s", e)
             self.data['listaPB'] = []
             self.data['artigos'] = None
+
+    # Monta o item da listaPB de um <div class="artigo-completo"> (None se não houver a célula do texto)
+    def montar_artigo(self, artigo):
+        artigo_tag = artigo.find('div', class_='layout-cell-11')
+        
+        if not artigo_tag:
+            return None
+
+        doi_tag = artigo_tag.find('a', class_='icone-doi')
+        link_doi = doi_tag['href'] if doi_tag else None
+        
+        # CORREÇÃO 1 e 2: Passamos a tag HTML inteira (artigo_tag) e recebemos as 3 variáveis
+        colaboradores, titulo, texto_limpo = self.processar_citacao_artigo(artigo_tag)
+        
+        return {
+            'doi': link_doi,
+            'titulo': titulo,
+            'colaboradores': colaboradores,
+            'texto_completo': texto_limpo
+        }
             
     #adicionar linhas de pesquisas
     def extract_research_lines(self):
         linhas_pesquisa = []
         try:
-            ancora_linhas = self.soup.find('a', {'name': 'LinhaPesquisa'})
+            ancora_linhas = self.find_anchor('LinhaPesquisa')
                
             container_secao = ancora_linhas.find_parent('div', class_='title-wrapper')
                 
@@ -219,22 +488,22 @@ class LattesParser:
                         
             for celula in celulas_pesquisa:
                 texto_bruto = celula.get_text(separator=' ', strip=True)
-                texto_limpo = re.sub(r'\s+', ' ', texto_bruto)
+                texto_limpo = colapsar_espacos(texto_bruto)
                 
                 if texto_limpo and texto_limpo not in linhas_pesquisa:
                     linhas_pesquisa.append(texto_limpo)
                     
         except Exception as e:
-            print(f"Não foi possível extrair linhas de pesquisa. Erro: {e}")
+            logger.warning("Não foi possível extrair linhas de pesquisa. Erro: %s", e)
             
         self.data['linhas_pesquisa'] = linhas_pesquisa
         
     def extract_generic_productions(self, target):
         # Quando passa a tag name no argumento target
         if isinstance(target, str):
-            encontrado = self.soup.find('a', attrs={'name': target})
+            encontrado = self.find_anchor(target)
             if not encontrado:
-                print(f"Aviso: Seção '{target}' não encontrada.")
+                logger.info("Seção '%s' não encontrada.", target)
                 return []
             
             producao_tag = encontrado.find_parent('b')
@@ -254,7 +523,7 @@ class LattesParser:
             
             if 'layout-cell-11' in classes_producoes: 
                 texto_producao = sibling.get_text(strip = True)
-                texto_limpo = re.sub(r'\s+', ' ', texto_producao)
+                texto_limpo = colapsar_espacos(texto_producao)
                 textos_producoes.append(texto_limpo)
             
             sibling = sibling.find_next_sibling('div')
@@ -269,7 +538,7 @@ class LattesParser:
         revistas = self.extract_generic_productions('TextosJornaisRevistas') 
         self.data['producao_revistas'] = revistas
         
-        todas_ancoras = self.soup.find_all('a', attrs={'name':'TrabalhosPublicadosAnaisCongresso'})
+        todas_ancoras = self.indice['ancoras'].get('TrabalhosPublicadosAnaisCongresso', [])
         
         for ancora in todas_ancoras:
             tag_b = ancora.find_parent('b')
@@ -299,7 +568,7 @@ class LattesParser:
                 lista_orientacoes = []
                 
                 # 1. Encontra a âncora
-                anchor = self.soup.find('a', attrs={'name': tag_html})
+                anchor = self.find_anchor(tag_html)
                 
                 if anchor:
                     for sibling in anchor.find_next_siblings():
@@ -309,40 +578,37 @@ class LattesParser:
                         
                         if sibling.name == 'div' and 'layout-cell-11' in sibling.get('class', []):
                             texto = sibling.get_text(strip=True)
-                            texto = re.sub(r'\s+', ' ', texto) # Limpa espaços
-                            
-                            match = re.search(
-                                r"^\s*(?P<nome>.+)\.\s+(?P<titulo>.+?)\.\s*(?:In[ií]cio:\s)?(?P<ano>\d{4})",
-                                texto,
-                                re.IGNORECASE | re.DOTALL
-                            )
-                            
-                            if match:
-                                dados = {
-                                    'aluno': match.group('nome').strip(),
-                                    'titulo': match.group('titulo').strip(),
-                                    'ano': match.group('ano').strip(),
-                                }
-                            else:
-                                # Fallback caso a regex falhe
-                                dados = {
-                                    'aluno': texto, 'titulo': '', 'ano': ''
-                                }
-                            
-                            lista_orientacoes.append(dados)
+                            lista_orientacoes.append(self.montar_orientacao(texto))
                 
                 self.data[chave_dic] = lista_orientacoes
 
         except Exception as e:
-            print(f"Erro ao extrair as orientações: {e}")
+            logger.warning("Erro ao extrair as orientações: %s", e)
             self.data['orientacoes_concluidas'] = []
             self.data['orientacoes_em_andamento'] = []
+
+    # Separa aluno, título e ano do texto de uma orientação
+    def montar_orientacao(self, texto):
+        texto = colapsar_espacos(texto) # Limpa espaços
+        
+        match = ORIENTACAO.search(texto)
+        
+        if match:
+            return {
+                'aluno': match.group('nome').strip(),
+                'titulo': match.group('titulo').strip(),
+                'ano': match.group('ano').strip(),
+            }
+
+        # Fallback caso a regex falhe
+        return {
+            'aluno': texto, 'titulo': '', 'ano': ''
+        }
             
     
     def extract_projects(self):
         try:
-            projects_list = []
-            projects_tag = self.soup.find('a', attrs={'name': 'ProjetosPesquisa'})
+            projects_tag = self.find_anchor('ProjetosPesquisa')
             
             if projects_tag:
                 data_cell = projects_tag.find_next('div', class_='data-cell')
@@ -351,168 +617,1211 @@ class LattesParser:
                     # Pega todos os textos do projeto
                     items = data_cell.find_all('div', class_='layout-cell-pad-5')
                     
-                    current_project = None
-                    
-                    for item in items:
-                        text = item.get_text(strip=True)
-                        text = re.sub(r'\s+', ' ', text)
-                        
-                        # Verifica se é o ano
-                        match_ano = re.search(r'^(\d{4}\s*-\s*(?:Atual|\d{4}))', text)
-                        
-                        if match_ano:
-                            if current_project:
-                                projects_list.append(current_project)
-                            
-                            periodo = match_ano.group(1).strip()
-                            
-                            resto = text[match_ano.end():].strip(" .")
-                            titulo = resto if len(resto) > 2 else ""
-                            
-                            current_project = {
-                                'periodo': periodo,
-                                'titulo': titulo
-                            }
-                        
-                        # Se não for o ano pode ser o titulo
-                        elif current_project and not current_project['titulo']:
-                            keywords_ignoradas = ["Descrição:", "Situação:", "Integrantes:", "Coordenador:", "Financiador(es):"]
-                            
-                            # Só salva se não for metadado e tiver texto suficiente
-                            if len(text) > 2 and not any(k in text for k in keywords_ignoradas):
-                                current_project['titulo'] = text.strip(" .")
-
-                    # Salva o ultimo projeto
-                    if current_project:
-                        projects_list.append(current_project)
-                    
-                    self.data['projetos'] = projects_list
+                    textos = [item.get_text(strip=True) for item in items]
+                    self.data['projetos'] = self.agrupar_projetos(textos)
             else:
-                print("Projetos de pesquisa não encontrados")
+                logger.info("Projetos de pesquisa não encontrados")
                 self.data['projetos'] = []
            
         except Exception as e:
-            print(f"Erro ao extrair os projetos: {e}")
+            logger.warning("Erro ao extrair os projetos: %s", e)
             self.data['projetos'] = None
+
+    # Agrupa os textos da seção de projetos: cada período inicia um novo projeto
+    def agrupar_projetos(self, textos):
+        projects_list = []
+        current_project = None
+        
+        for text in textos:
+            text = colapsar_espacos(text)
+            
+            # Verifica se é o ano
+            match_ano = PERIODO_PROJETO.search(text)
+            
+            if match_ano:
+                if current_project:
+                    projects_list.append(current_project)
+                
+                periodo = match_ano.group(1).strip()
+                
+                resto = text[match_ano.end():].strip(" .")
+                titulo = resto if len(resto) > 2 else ""
+                
+                current_project = {
+                    'periodo': periodo,
+                    'titulo': titulo
+                }
+            
+            # Se não for o ano pode ser o titulo
+            elif current_project and not current_project['titulo']:
+                keywords_ignoradas = ["Descrição:", "Situação:", "Integrantes:", "Coordenador:", "Financiador(es):"]
+                
+                # Só salva se não for metadado e tiver texto suficiente
+                if len(text) > 2 and not any(k in text for k in keywords_ignoradas):
+                    current_project['titulo'] = text.strip(" .")
+
+        # Salva o ultimo projeto
+        if current_project:
+            projects_list.append(current_project)
+
+        return projects_list
         
     def extract_citation_names(self):
         try:
-            nomes_tag = self.soup.find('b', string=re.compile(r'Nome em citações bibliográficas'))
+            nomes_tag = self.find_label(ROTULO_NOMES_CITACAO)
             if nomes_tag:
                 parent_div = nomes_tag.find_parent('div', class_='layout-cell-3')
                 sibling_div = parent_div.find_next_sibling('div', class_='layout-cell-9')
                 nomes_brutos = sibling_div.get_text(strip=True)
-                nomes_limpos = re.sub(r'\s+', ' ', nomes_brutos)
-                
-                # Separa os nomes por ponto e vírgula e limpa os espaços
-                lista_nomes = [nome.strip() for nome in nomes_limpos.split(';') if nome.strip()]
-                # Usando set para termos uma lista de elementos unicos
-                self.data['listaNomesCitacao'] = sorted(list(set(lista_nomes)))
+                self.data['listaNomesCitacao'] = self.separar_nomes_citacao(nomes_brutos)
                 
             else:
                 self.data['listaNomesCitacao'] = []
         except Exception as e:
-            print(f"Erro ao extrair nomes de citação: {e}")
-            self.data['listaNomesCitacao'] = []   
+            logger.warning("Erro ao extrair nomes de citação: %s", e)
+            self.data['listaNomesCitacao'] = []
+
+    def separar_nomes_citacao(self, nomes_brutos):
+        nomes_limpos = colapsar_espacos(nomes_brutos)
+        
+        # Separa os nomes por ponto e vírgula e limpa os espaços
+        lista_nomes = [nome.strip() for nome in nomes_limpos.split(';') if nome.strip()]
+        # Usando set para termos uma lista de elementos unicos
+        return sorted(list(set(lista_nomes)))
     
-    # Método principal que orquestra todas as extrações.
-    def parse(self):
+    # Método principal que orquestra todas as extrações; o tempo e a quantidade
+    # de itens de cada extrator ficam em self.estatisticas. Com `campos`, só os
+    # extratores desses campos (e de _id e nome_completo) são executados.
+    def parse(self, campos=None):
        
-        print("Iniciando análise do Lattes...")
-        self.extract_lattes_id()
-        self.extract_name()
-        self.extract_address()
-        self.extract_activity()
-        self.extract_articles()
-        self.extract_productions()
-        self.extract_orientations()
-        self.extract_projects()
-        self.extract_citation_names()
-        self.extract_research_lines()
+        extratores = self._extratores_pedidos(campos)
+
+        logger.debug("Iniciando análise do Lattes...")
+        with self.estatisticas.medir('indice'):
+            self._indice = self.build_index()
+
+        for extrator, chaves in EXTRATORES:
+            if extrator not in extratores:
+                continue
+            with self.estatisticas.medir(extrator):
+                getattr(self, extrator)()
+            self.estatisticas.itens[extrator] = sum(_quantidade(self.data.get(chave)) for chave in chaves)
         
-        print("Análise concluída.")
+        logger.debug("Análise concluída.")
         return self.data
 
+    def _extratores_pedidos(self, campos):
+        extratores = self.extratores if campos is None else extratores_de(campos)
+        if not set(extratores) <= set(self.extratores):
+            raise ValueError("O HTML foi cortado para outros campos; crie o parser com campos= incluindo estes.")
+        return extratores
 
-if __name__ == "__main__":
-    
-    lista_ids = [
-    "9826346918182685",
-    "4706525645223041",
-    "5212303626376503",
-    "0038936541518854",
-    "9754332336954137",
-    "5119417295487126",
-    "6923877786371495",
-    "6743301470746932",
-    "6847311664433673",
-    "9403804691367376",
-    "3532058764024942",
-    "5321313558714462",
-    "4579286987089372",
-    "1957942090126269",
-    "8498467320034486",
-    "9933650905615452",
-    "0461451015026948",
-    "1624091546521389",
-    "9542083518570573",
-    "6881990637613409",
-    "8251270609012225",
-    "0391758954520783",
-    "3486202914688351",
-    "8516223928904348",
-    "7020467292690112",
-    "5333709865535244",
-    "5236549058240153",
-    "4990968421738051",
-    "5444380855577045",
-    "0422652925722673",
-    "4746829076971556",
-    "7287108960864123",
-    "0677617028146410",
-    "1705430650855494",
-    "2896049826673626",
-    "1413071683140519",
-    "5839043594908917",
-    "2870655742911951",
-    "6652079760634274",
-    "5449448657729439",
-    "7670383899259509",
-    "0769819544839146",
-    "0309287112277751",
-    "7570230588831120",
-    "5185829124608696",
-    "8528111459865939",
-    "0920196032137472",
-    "9170893104155674",
-    "9632409046763256",
-    "6446047463034654",
-    "3687551763124327",
-    "7952918513827867",
-    "0616238673458322",
-    "0987355219242506"
-]
-    for id in lista_ids:
-        html_file_path = 'curriculos/' + id
+    # Versão de parse() para currículos muito grandes: gera registros (campo,
+    # posição, valor) seção a seção, tirando cada campo de self.data assim que
+    # sai, e libera a árvore ao final. Campos de lista geram um registro por
+    # item (posição 0, 1, ...); os demais, um registro com posição None. O
+    # registro do _id sempre vem primeiro. montar_curriculo() refaz o dicionário.
+    def registros(self, campos=None):
+        return _id_primeiro(self._registros(self._extratores_pedidos(campos)))
 
+    def _registros(self, extratores):
+        # No BeautifulSoup a árvore já está inteira na memória; só os dados saem aos poucos
         try:
-            with open(html_file_path, 'r', encoding='utf-8') as fp:
-                html_content = fp.read()
-            
-            lattes_parser = LattesParser(html_content)
-            dados_do_curriculo = lattes_parser.parse()
-            
-            for campo, valor in dados_do_curriculo.items(): 
-                print(campo, valor)
-            
-            with open('curriculos_json/' + dados_do_curriculo['nome_completo']+'.json', 'w', encoding='utf-8') as json_file:
-                json.dump(dados_do_curriculo, json_file, indent=4, ensure_ascii=False)
+            with self.estatisticas.medir('indice'):
+                self._indice = self.build_index()
+            for extrator, _ in EXTRATORES:
+                if extrator in extratores:
+                    yield from self._executar(extrator)
+        finally:
+            self.liberar()
+
+    def _executar(self, extrator):
+        with self.estatisticas.medir(extrator):
+            getattr(self, extrator)()
+        self.estatisticas.itens[extrator] = sum(_quantidade(valor) for valor in self.data.values())
+        for campo in list(self.data):
+            valor = self.data.pop(campo)
+            if isinstance(valor, list) and valor:
+                for posicao, item in enumerate(valor):
+                    yield campo, posicao, item
+            else:
+                yield campo, None, valor
+
+    # Desfaz a árvore: no BeautifulSoup os nós se referenciam em ciclos e, em
+    # lotes longos, esperar o coletor de lixo fragmenta a memória
+    def liberar(self):
+        self._indice = None
+        if getattr(self, 'soup', None) is not None:
+            self.soup.decompose()
+            self.soup = None
+
+
+def analisar(html_content, backend='bs4', arquivo_perfil=None, medir_memoria=False, campos=None):
+    """
+    Monta o parser, executa parse() e devolve (dados, estatísticas). `campos`
+    restringe a extração a esses campos (ver LattesParser).
+
+    Com `medir_memoria`, o tracemalloc registra o pico de memória de cada passo
+    (a análise fica bem mais lenta). Com `arquivo_perfil`, a montagem da árvore
+    e a extração passam pelo cProfile e o perfil é gravado nesse arquivo
+    (leia com pstats ou snakeviz).
+    """
+    iniciar_tracemalloc = medir_memoria and not tracemalloc.is_tracing()
+    if iniciar_tracemalloc:
+        tracemalloc.start()
+    perfilador = cProfile.Profile() if arquivo_perfil else None
+    if perfilador is not None:
+        perfilador.enable()
+    try:
+        analisador = LattesParser(html_content, backend=backend, campos=campos)
+        dados = analisador.parse()
+    finally:
+        if perfilador is not None:
+            perfilador.disable()
+            perfilador.dump_stats(arquivo_perfil)
+        if iniciar_tracemalloc:
+            tracemalloc.stop()
+    return dados, analisador.estatisticas
+
+
+def _percentil(valores, fracao):
+    # Percentil pelo posto mais próximo; `valores` já ordenados
+    return valores[max(0, math.ceil(fracao * len(valores)) - 1)]
+
+
+def resumir_estatisticas(estatisticas):
+    """
+    Agrega as EstatisticasParse de um lote: para cada passo, quantidade de
+    execuções, tempo total, p50 e p95 (s), média de itens e, se medido, p95 do
+    pico de memória (bytes).
+    """
+    tempos = defaultdict(list)
+    itens = defaultdict(list)
+    memoria = defaultdict(list)
+    for estatistica in estatisticas:
+        for passo, segundos in estatistica.tempos.items():
+            tempos[passo].append(segundos)
+        for passo, quantidade in estatistica.itens.items():
+            itens[passo].append(quantidade)
+        for passo, pico in estatistica.memoria.items():
+            memoria[passo].append(pico)
+
+    resumo = {}
+    for passo, valores in tempos.items():
+        valores.sort()
+        resumo[passo] = {
+            'execucoes': len(valores),
+            'total': sum(valores),
+            'p50': _percentil(valores, 0.5),
+            'p95': _percentil(valores, 0.95),
+            'itens': sum(itens[passo]) / len(itens[passo]) if itens[passo] else None,
+            'memoria_p95': _percentil(sorted(memoria[passo]), 0.95) if memoria[passo] else None,
+        }
+    return resumo
+
+
+def tabela_estatisticas(resumo):
+    """Texto com uma linha por passo do resumo de resumir_estatisticas()."""
+    linhas = [
+        f"{'passo':24} | {'execuções':>9} | {'total (s)':>9} | {'p50 (ms)':>8} | {'p95 (ms)':>8} | "
+        f"{'itens/CV':>8} | {'pico p95 (KB)':>13}"
+    ]
+    for passo, medidas in resumo.items():
+        itens = '-' if medidas['itens'] is None else f"{medidas['itens']:.1f}"
+        memoria = '-' if medidas['memoria_p95'] is None else f"{medidas['memoria_p95'] / 1024:.0f}"
+        linhas.append(
+            f"{passo:24} | {medidas['execucoes']:9} | {medidas['total']:9.2f} | {medidas['p50'] * 1000:8.2f} | "
+            f"{medidas['p95'] * 1000:8.2f} | {itens:>8} | {memoria:>13}"
+        )
+    return '\n'.join(linhas)
+
+
+# Tags cujo conteúdo o BeautifulSoup não considera texto em get_text()
+_TAGS_SEM_TEXTO = ('script', 'style', 'template')
+# Tags em que o BeautifulSoup preserva os textos formados só por espaços
+_TAGS_PRESERVAM_ESPACOS = ('pre', 'textarea')
+_ESPACOS_ASCII = str.maketrans('', '', '\x20\x0a\x09\x0c\x0d')
+
+
+def _tem_classe(el, classe):
+    return classe in (el.get('class') or '').split()
+
+
+def _e_tag(el, nome=None, classe=None):
+    # Ignora comentários e instruções de processamento, que no lxml também são nós
+    if not isinstance(el.tag, str):
+        return False
+    if nome is not None and el.tag != nome:
+        return False
+    return classe is None or _tem_classe(el, classe)
+
+
+def _normalizar_texto(texto, preservar):
+    # Ao montar a árvore, o BeautifulSoup reduz textos só de espaços a '\n' ou ' '
+    if preservar or texto.translate(_ESPACOS_ASCII):
+        return texto
+    return '\n' if '\n' in texto else ' '
+
+
+def _textos(el, preservar=False):
+    # Percorre os textos na mesma ordem e com a mesma divisão do `.strings` do BeautifulSoup
+    preservar = preservar or el.tag in _TAGS_PRESERVAM_ESPACOS
+    if el.text is not None and el.tag not in _TAGS_SEM_TEXTO:
+        yield _normalizar_texto(el.text, preservar)
+    for filho in el:
+        if _e_tag(filho):
+            yield from _textos(filho, preservar)
+        if filho.tail is not None:
+            yield _normalizar_texto(filho.tail, preservar)
+
+
+def _get_text(el, separator='', strip=False):
+    textos = _textos(el)
+    if strip:
+        textos = (texto.strip() for texto in textos)
+        textos = (texto for texto in textos if texto)
+    return separator.join(textos)
+
+
+def _substituir(el, novo):
+    # O replace() do lxml leva junto o texto que segue a tag (tail); ele precisa ficar na árvore
+    pai = el.getparent()
+    if pai is None:
+        return
+    novo.tail = el.tail
+    pai.replace(el, novo)
+
+
+def _replace_with_text(el, texto):
+    # Equivale ao replace_with(texto) do BeautifulSoup: o texto fica como um nó separado
+    no_texto = etree.Element('texto-substituido')
+    no_texto.text = texto
+    _substituir(el, no_texto)
+
+
+def _decompose(el):
+    # Um comentário vazio ocupa o lugar da tag para que os textos vizinhos continuem separados,
+    # como acontece após o decompose() do BeautifulSoup
+    _substituir(el, etree.Comment(''))
+
+    # O decompose() também desfaz os vínculos entre os nós removidos
+    for no in list(el.iter()):
+        for filho in list(no):
+            no.remove(filho)
+
+
+def _string(el):
+    # Equivalente ao `.string` do BeautifulSoup: só existe quando a tag tem um único filho
+    filhos = list(el)
+    if el.text:
+        return None if filhos else el.text
+    if len(filhos) != 1 or filhos[0].tail:
+        return None
+    if not _e_tag(filhos[0]):
+        return filhos[0].text
+    return _string(filhos[0])
+
+
+def _find_parent(el, nome, classe=None):
+    for ancestral in el.iterancestors(nome):
+        if classe is None or _tem_classe(ancestral, classe):
+            return ancestral
+    return None
+
+
+def _find_next_sibling(el, nome, classe=None):
+    for irmao in el.itersiblings():
+        if _e_tag(irmao, nome, classe):
+            return irmao
+    return None
+
+
+def _find_all(el, nome, classe=None):
+    return [filho for filho in el.iterdescendants(nome) if classe is None or _tem_classe(filho, classe)]
+
+
+def _find(el, nome, classe=None):
+    for filho in el.iterdescendants(nome):
+        if classe is None or _tem_classe(filho, classe):
+            return filho
+    return None
+
+
+def _find_next(el, nome, classe=None):
+    # Como o find_next do BeautifulSoup: descendentes e depois tudo que vem a seguir no documento
+    encontrado = _find(el, nome, classe)
+    if encontrado is not None:
+        return encontrado
+
+    no = el
+    while no is not None:
+        for irmao in no.itersiblings():
+            if _e_tag(irmao, nome, classe):
+                return irmao
+            encontrado = _find(irmao, nome, classe) if _e_tag(irmao) else None
+            if encontrado is not None:
+                return encontrado
+        no = no.getparent()
+    return None
+
+
+def _descartar(el):
+    # Tira da árvore um nó já processado no modo em fluxo
+    el.clear()
+    pai = el.getparent()
+    if pai is not None:
+        pai.remove(el)
+
+
+class LxmlLattesParser(LattesParser):
+    """
+    Mesmo parser, mas operando diretamente sobre a árvore do lxml, sem montar a
+    árvore de objetos do BeautifulSoup. O dicionário devolvido por parse() é
+    idêntico ao do backend 'bs4' (ver paridade_backends.py).
+    """
+
+    def __init__(self, html_content, backend='lxml', campos=None, fluxo=False):
+        self.estatisticas = EstatisticasParse()
+        html_content = self._preparar_html(html_content, campos)
+        self.data = {}
+        self._indice = None
+        if fluxo:
+            # A árvore é montada aos poucos por registros()
+            self._html = html_content
+            self.root = None
+            return
+
+        with self.estatisticas.medir('arvore'):
+            parser_html = etree.HTMLParser()
+            parser_html.feed(html_content)
+            self.root = parser_html.close()
+        if self.root is None:
+            self.root = etree.Element('html')
+
+    def parse(self, campos=None):
+        if self.root is None:
+            self.data = montar_curriculo(self.registros(campos))
+            return self.data
+        return super().parse(campos)
+
+    def liberar(self):
+        self._indice = None
+        if self.root is not None:
+            self.root.clear()
+
+    def _registros(self, extratores):
+        if self.root is not None:
+            yield from super()._registros(extratores)
+            return
+
+        # Modo em fluxo: o HTML entra em pedaços no leitor incremental do lxml e
+        # cada artigo-completo ou title-wrapper é processado e descartado assim
+        # que termina, então a árvore nunca tem mais que uma seção.
+        pendentes = list(extratores)
+        self._artigos_vistos = 0
+        self._artigos_emitidos = 0
+        leitor = etree.HTMLPullParser(events=('end',))
+        html_content, self._html = self._html, None
+        try:
+            for inicio in range(0, len(html_content), TAMANHO_BLOCO_FLUXO):
+                with self.estatisticas.medir('arvore'):
+                    leitor.feed(html_content[inicio:inicio + TAMANHO_BLOCO_FLUXO])
+                for _, elemento in leitor.read_events():
+                    yield from self._processar_elemento(elemento, pendentes)
+
+            with self.estatisticas.medir('arvore'):
+                try:
+                    raiz = leitor.close()
+                except etree.XMLSyntaxError:
+                    # HTML vazio; o HTMLParser de parse() devolve None nesse caso
+                    raiz = None
+            for _, elemento in leitor.read_events():
+                yield from self._processar_elemento(elemento, pendentes)
+            self.root = raiz if raiz is not None else etree.Element('html')
+
+            if self._artigos_vistos and 'extract_articles' in pendentes:
+                pendentes.remove('extract_articles')
+                self.estatisticas.itens['extract_articles'] = self._artigos_emitidos
+                if not self._artigos_emitidos:
+                    yield 'listaPB', None, []
+
+            # O que não apareceu em nenhuma seção roda sobre o que sobrou da
+            # árvore, com o mesmo resultado de parse() para seções ausentes
+            self._indexar(self.root)
+            for extrator in list(pendentes):
+                pendentes.remove(extrator)
+                yield from self._executar(extrator)
+        finally:
+            self.liberar()
+
+    def _indexar(self, elemento):
+        self.root = elemento
+        with self.estatisticas.medir('indice'):
+            self._indice = self.build_index()
+
+    def _processar_elemento(self, elemento, pendentes):
+        if not isinstance(elemento.tag, str):
+            return
+
+        if elemento.tag == 'div' and _tem_classe(elemento, 'artigo-completo'):
+            self._artigos_vistos += 1
+            if 'extract_articles' in pendentes:
+                with self.estatisticas.medir('extract_articles'):
+                    artigo = self.montar_artigo(elemento)
+                if artigo is not None:
+                    yield 'listaPB', self._artigos_emitidos, artigo
+                    self._artigos_emitidos += 1
+            _descartar(elemento)
+
+        elif elemento.tag == 'h2' and 'extract_name' in pendentes and _tem_classe(elemento, 'nome'):
+            self._indexar(elemento)
+            pendentes.remove('extract_name')
+            yield from self._executar('extract_name')
+
+        elif elemento.tag == 'span' and 'extract_lattes_id' in pendentes and elemento.get('style') == ESTILO_ID_LATTES:
+            self._indexar(elemento)
+            pendentes.remove('extract_lattes_id')
+            yield from self._executar('extract_lattes_id')
+
+        elif elemento.tag == 'div' and _tem_classe(elemento, 'title-wrapper'):
+            self._indexar(elemento)
+            for extrator in [extrator for extrator in pendentes if extrator in SECOES and self._tem_secao(extrator)]:
+                pendentes.remove(extrator)
+                yield from self._executar(extrator)
+            _descartar(elemento)
+
+    def _tem_secao(self, extrator):
+        onde, alvo = SECOES[extrator]
+        if onde == 'ancoras':
+            return any(self.indice['ancoras'].get(nome) for nome in alvo)
+        return self.find_label(alvo, onde) is not None
+
+    def build_index(self):
+        indice = {
+            'nome': None,
+            'id_lattes': None,
+            'ancoras': defaultdict(list),
+            'rotulos': [],
+            'titulos': [],
+            'artigos': [],
+        }
+
+        for tag in self.root.iter():
+            if not isinstance(tag.tag, str):
+                continue
+
+            if tag.tag == 'a':
+                nome_ancora = tag.get('name')
+                if nome_ancora is not None:
+                    indice['ancoras'][nome_ancora].append(tag)
+            elif tag.tag == 'b':
+                texto = _string(tag)
+                if texto is not None:
+                    indice['rotulos'].append((texto, tag))
+            elif tag.tag == 'div':
+                if _tem_classe(tag, 'artigo-completo'):
+                    indice['artigos'].append(tag)
+            elif tag.tag == 'h1':
+                texto = _string(tag)
+                if texto is not None:
+                    indice['titulos'].append((texto, tag))
+            elif tag.tag == 'h2':
+                if indice['nome'] is None and _tem_classe(tag, 'nome'):
+                    indice['nome'] = tag
+            elif tag.tag == 'span':
+                if indice['id_lattes'] is None and tag.get('style') == 'font-weight: bold; color: #326C99;':
+                    indice['id_lattes'] = tag
+
+        return indice
+
+    def extract_name(self):
+        try:
+            nome_tag = self.indice['nome']
+            self.data['nome_completo'] = _get_text(nome_tag).strip() if nome_tag is not None else None
+        except Exception as e:
+            logger.warning("Erro ao extrair nome: %s", e)
+            self.data['nome_completo'] = None
+
+    def extract_lattes_id(self):
+        try:
+            id_tag = self.indice['id_lattes']
+            self.data['_id'] = _get_text(id_tag).strip() if id_tag is not None else None
+        except Exception as e:
+            logger.warning("Erro ao extrair ID Lattes: %s", e)
+            self.data['_id'] = None
+
+    def extract_address(self):
+        try:
+            endereco_tag = self.find_label(ROTULO_ENDERECO)
+            if endereco_tag is None:
+                self.data['endereco'] = None
+                return
+
+            endereco_pai = _find_parent(endereco_tag, 'div', 'layout-cell-3')
+            endereco_cell = _find_next_sibling(endereco_pai, 'div', 'layout-cell-9')
+
+            if endereco_cell is not None:
+                for br in _find_all(endereco_cell, 'br'):
+                    _replace_with_text(br, ', ')
+
+                texto = _get_text(endereco_cell, separator=' ', strip=True)
+                self.data['endereco'] = self.limpar_endereco(texto)
+            else:
+                self.data['endereco'] = None
+
+        except Exception as e:
+            logger.warning("Erro ao extrair endereço: %s", e)
+            self.data['endereco'] = None
+
+    def extract_activity(self):
+        try:
+            activity_tag = self.find_label(ROTULO_AREAS, secao='titulos')
+
+            if activity_tag is None:
+                raise ValueError("Rótulo 'Áreas de atuação' não encontrado.")
+
+            pai_tag = _find_parent(activity_tag, 'div', 'title-wrapper')
+
+            activity_pai = _find(pai_tag, 'div', 'data-cell')
+            if activity_pai is None:
+                activity_pai = pai_tag
+
+            activities = _find_all(activity_pai, 'div', 'layout-cell-9')
+            textos_areas = [_get_text(area, strip=True) for area in activities]
+            self.data['area_de_atuacao'] = self.agrupar_areas(textos_areas)
+
+        except Exception as e:
+            logger.warning("Erro ao extrair as áreas de atuação: %s", e)
+            self.data['area_de_atuacao'] = None
+
+    def processar_citacao_artigo(self, html_cell):
+        for info in _find_all(html_cell, 'span', 'informacao-artigo'):
+            _decompose(info)
+
+        for citado in _find_all(html_cell, 'span', 'citado'):
+            _decompose(citado)
+
+        for img in _find_all(html_cell, 'img'):
+            _decompose(img)
+
+        texto_completo = _get_text(html_cell, separator=' ', strip=True)
+        return self.dividir_citacao(texto_completo)
+
+    def extract_articles(self):
+        try:
+            articles_tags = self.indice['artigos']
+
+            if not articles_tags:
+                raise ValueError("Rótulo 'artigo completo' não encontrado.")
+
+            lista_artigos = []
+            for artigo in articles_tags:
+                dados_artigo = self.montar_artigo(artigo)
+                if dados_artigo is not None:
+                    lista_artigos.append(dados_artigo)
+
+            self.data['listaPB'] = lista_artigos
+            if 'artigos' in self.data:
+                del self.data['artigos']
+
+        except Exception as e:
+            logger.warning("Erro ao extrair artigos publicados: %s", e)
+            self.data['listaPB'] = []
+            self.data['artigos'] = None
+
+    def montar_artigo(self, artigo):
+        artigo_tag = _find(artigo, 'div', 'layout-cell-11')
+
+        if artigo_tag is None:
+            return None
+
+        doi_tag = _find(artigo_tag, 'a', 'icone-doi')
+        link_doi = doi_tag.attrib['href'] if doi_tag is not None else None
+
+        colaboradores, titulo, texto_limpo = self.processar_citacao_artigo(artigo_tag)
+
+        return {
+            'doi': link_doi,
+            'titulo': titulo,
+            'colaboradores': colaboradores,
+            'texto_completo': texto_limpo
+        }
+
+    def extract_research_lines(self):
+        linhas_pesquisa = []
+        try:
+            ancora_linhas = self.find_anchor('LinhaPesquisa')
+            container_secao = _find_parent(ancora_linhas, 'div', 'title-wrapper')
+            data_cell = _find(container_secao, 'div', 'data-cell')
+
+            for celula in _find_all(data_cell, 'div', 'layout-cell-9'):
+                texto_bruto = _get_text(celula, separator=' ', strip=True)
+                texto_limpo = colapsar_espacos(texto_bruto)
+
+                if texto_limpo and texto_limpo not in linhas_pesquisa:
+                    linhas_pesquisa.append(texto_limpo)
 
-        except FileNotFoundError:
-            print(f"Erro: Arquivo '{html_file_path}' não encontrado.")
         except Exception as e:
-            print(f"Um erro inesperado ocorreu: {e}")
+            logger.warning("Não foi possível extrair linhas de pesquisa. Erro: %s", e)
+
+        self.data['linhas_pesquisa'] = linhas_pesquisa
+
+    def extract_generic_productions(self, target):
+        if isinstance(target, str):
+            encontrado = self.find_anchor(target)
+            if encontrado is None:
+                logger.info("Seção '%s' não encontrada.", target)
+                return []
+
+            producao_tag = _find_parent(encontrado, 'b')
+            producao_pai = _find_parent(producao_tag, 'div', 'cita-artigos')
+            sibling = _find_next_sibling(producao_pai, 'div')
+        else:
+            sibling = _find_next_sibling(target, 'div')
+
+        textos_producoes = []
+        while sibling is not None:
+            classes_producoes = (sibling.get('class') or '').split()
+
+            if 'cita-artigos' in classes_producoes or 'inst_back' in classes_producoes:
+                break
+
+            if 'layout-cell-11' in classes_producoes:
+                texto_producao = _get_text(sibling, strip=True)
+                textos_producoes.append(colapsar_espacos(texto_producao))
+
+            sibling = _find_next_sibling(sibling, 'div')
+
+        return textos_producoes
+
+    def extract_productions(self):
+        self.data['producao_revistas'] = self.extract_generic_productions('TextosJornaisRevistas')
+
+        for ancora in self.indice['ancoras'].get('TrabalhosPublicadosAnaisCongresso', []):
+            tag_b = _find_parent(ancora, 'b')
+            if tag_b is None:
+                continue
+
+            titulo = _get_text(tag_b, strip=True)
+            titulo_pai = _find_parent(tag_b, 'div', 'cita-artigos')
+
+            if "Trabalhos completos" in titulo:
+                self.data['trabalhos_completos'] = self.extract_generic_productions(titulo_pai)
+            elif "Resumos expandidos" in titulo:
+                self.data['resumos_expandidos'] = self.extract_generic_productions(titulo_pai)
+            elif "Resumos publicados" in titulo:
+                self.data['resumos_publicados'] = self.extract_generic_productions(titulo_pai)
+
+    def extract_orientations(self):
+        try:
+            tipos = [
+                ('Orientacoesconcluidas', 'orientacoes_concluidas'),
+                ('Orientacaoemandamento', 'orientacoes_em_andamento')
+            ]
+
+            for tag_html, chave_dic in tipos:
+                lista_orientacoes = []
+                anchor = self.find_anchor(tag_html)
+
+                if anchor is not None:
+                    for sibling in anchor.itersiblings():
+                        if not _e_tag(sibling):
+                            continue
+
+                        if sibling.tag == 'a' and sibling.get('name') is not None:
+                            break
+
+                        if sibling.tag == 'div' and _tem_classe(sibling, 'layout-cell-11'):
+                            texto = _get_text(sibling, strip=True)
+                            lista_orientacoes.append(self.montar_orientacao(texto))
+
+                self.data[chave_dic] = lista_orientacoes
+
+        except Exception as e:
+            logger.warning("Erro ao extrair as orientações: %s", e)
+            self.data['orientacoes_concluidas'] = []
+            self.data['orientacoes_em_andamento'] = []
+
+    def extract_projects(self):
+        try:
+            projects_tag = self.find_anchor('ProjetosPesquisa')
+
+            if projects_tag is not None:
+                data_cell = _find_next(projects_tag, 'div', 'data-cell')
+
+                if data_cell is not None:
+                    items = _find_all(data_cell, 'div', 'layout-cell-pad-5')
+                    textos = [_get_text(item, strip=True) for item in items]
+                    self.data['projetos'] = self.agrupar_projetos(textos)
+            else:
+                logger.info("Projetos de pesquisa não encontrados")
+                self.data['projetos'] = []
+
+        except Exception as e:
+            logger.warning("Erro ao extrair os projetos: %s", e)
+            self.data['projetos'] = None
+
+    def extract_citation_names(self):
+        try:
+            nomes_tag = self.find_label(ROTULO_NOMES_CITACAO)
+            if nomes_tag is not None:
+                parent_div = _find_parent(nomes_tag, 'div', 'layout-cell-3')
+                sibling_div = _find_next_sibling(parent_div, 'div', 'layout-cell-9')
+                nomes_brutos = _get_text(sibling_div, strip=True)
+                self.data['listaNomesCitacao'] = self.separar_nomes_citacao(nomes_brutos)
+            else:
+                self.data['listaNomesCitacao'] = []
+        except Exception as e:
+            logger.warning("Erro ao extrair nomes de citação: %s", e)
+            self.data['listaNomesCitacao'] = []
+
+
+BACKENDS = {
+    'bs4': LattesParser,
+    'lxml': LxmlLattesParser,
+}
+
+
+# Conexões de leitura do cache, abertas uma vez em cada processo do pool
+_caches_abertos = {}
+
+
+def _abrir_cache_leitura(caminho_cache):
+    if caminho_cache not in _caches_abertos:
+        _caches_abertos[caminho_cache] = CacheParser(caminho_cache, VERSAO_PARSER, somente_leitura=True)
+    return _caches_abertos[caminho_cache]
+
+
+def _processar_arquivo(
+    caminho, backend='bs4', caminho_cache=None, forcar=False, pasta_perfis=None, medir_memoria=False, campos=None
+):
+    # Executado nos processos do pool: devolve
+    # (caminho, dados, erro, hash do HTML, veio do cache, estatísticas do parse ou None)
+    try:
+        with open(caminho, 'r', encoding='utf-8') as fp:
+            html_content = fp.read()
+
+        hash_html = None
+        if caminho_cache:
+            hash_html = hash_conteudo(html_content)
+            if not forcar:
+                dados = _abrir_cache_leitura(caminho_cache).buscar(Path(caminho).name, hash_html)
+                if dados is not None:
+                    if campos is not None:
+                        chaves = chaves_de(campos)
+                        dados = {chave: valor for chave, valor in dados.items() if chave in chaves}
+                    return caminho, dados, None, hash_html, True, None
+
+        arquivo_perfil = Path(pasta_perfis) / f"{Path(caminho).name}.prof" if pasta_perfis else None
+        dados, estatisticas = analisar(html_content, backend, arquivo_perfil, medir_memoria, campos)
+        return caminho, dados, None, hash_html, False, estatisticas
+    except Exception as e:
+        return caminho, None, f"{type(e).__name__}: {e}", None, False, None
+
+
+def _processar_lote(
+    caminhos, backend='bs4', caminho_cache=None, forcar=False, pasta_perfis=None, medir_memoria=False, campos=None
+):
+    return [
+        _processar_arquivo(caminho, backend, caminho_cache, forcar, pasta_perfis, medir_memoria, campos)
+        for caminho in caminhos
+    ]
+
+
+def ler_ids(arquivo_ids):
+    """IDs Lattes de um arquivo com um ID por linha (linhas vazias e começadas por # são ignoradas)."""
+    with open(arquivo_ids, 'r', encoding='utf-8') as fp:
+        return [linha.strip() for linha in fp if linha.strip() and not linha.startswith('#')]
+
+
+def listar_curriculos(pasta_entrada, arquivo_ids=None):
+    """
+    Lista os HTMLs a converter: todos os arquivos de `pasta_entrada` ou,
+    quando `arquivo_ids` é informado, apenas os IDs listados nele (um por linha).
+    """
+    pasta_entrada = Path(pasta_entrada)
+    if arquivo_ids:
+        return [pasta_entrada / id_lattes for id_lattes in ler_ids(arquivo_ids)]
+
+    return sorted(caminho for caminho in pasta_entrada.iterdir() if caminho.is_file())
+
+
+def salvar_json(dados, pasta_saida, indentar=False, extensao='.json', mesclar=False):
+    nome = dados.get('nome_completo')
+    if not nome:
+        raise ValueError("Currículo sem 'nome_completo'; não é possível nomear o JSON.")
+
+    # Compacto por padrão; a extensão (.json.gz, .json.zst) escolhe a compressão
+    caminho_json = Path(pasta_saida) / (nome + extensao)
+    if mesclar and caminho_json.exists():
+        # Extração parcial: atualiza só os campos extraídos e mantém os demais
+        dados = {**json_io.carregar(caminho_json), **dados}
+    json_io.gravar(caminho_json, dados, indentar)
+    return caminho_json
+
+
+def _linha_jsonl(id_lattes, campo, posicao, valor):
+    return json_io.dumps({'id_lattes': id_lattes, 'campo': campo, 'posicao': posicao, 'valor': valor}) + b'\n'
+
+
+def _processar_lote_em_fluxo(caminhos, arquivo_saida, backend='lxml', campos=None):
+    # Executado nos processos do pool: cada lote grava o seu JSONL registro a
+    # registro e devolve só (caminho, erro, estatísticas), sem os dados
+    arquivo_saida = Path(arquivo_saida)
+    temporario = arquivo_saida.with_name(f".{arquivo_saida.name}.tmp")
+    resultados = []
+    with open(temporario, 'wb') as saida:
+        for caminho in caminhos:
+            id_lattes = None
+            try:
+                with open(caminho, 'r', encoding='utf-8') as fp:
+                    analisador = LattesParser(fp.read(), backend=backend, campos=campos, fluxo=True)
+                for campo, posicao, valor in analisador.registros():
+                    if campo == '_id':
+                        id_lattes = valor
+                    saida.write(_linha_jsonl(id_lattes, campo, posicao, valor))
+                resultados.append((caminho, None, analisador.estatisticas))
+            except Exception as e:
+                erro = f"{type(e).__name__}: {e}"
+                # Marca o currículo incompleto para que ler_jsonl() o ignore
+                saida.write(_linha_jsonl(id_lattes, '_erro', None, erro))
+                resultados.append((caminho, erro, None))
+    os.replace(temporario, arquivo_saida)
+    return resultados
+
+
+def ler_jsonl(caminho):
+    """Gera os currículos (dicionários de parse()) de um registros_NNNNN.jsonl, pulando os que falharam."""
+    with open(caminho, 'rb') as arquivo:
+        registros = (json_io.loads(linha) for linha in arquivo)
+        # Cada currículo começa no registro do seu _id, ou num _erro sem id_lattes
+        # (falha antes de o _id ser extraído)
+        numero = 0
+
+        def curriculo(registro):
+            nonlocal numero
+            if registro['campo'] == '_id' or (registro['campo'] == '_erro' and registro['id_lattes'] is None):
+                numero += 1
+            return numero
+
+        for _, grupo in groupby(registros, key=curriculo):
+            grupo = list(grupo)
+            erros = [registro['valor'] for registro in grupo if registro['campo'] == '_erro']
+            if erros:
+                logger.warning("Currículo %s ignorado (%s): %s", grupo[0]['id_lattes'], caminho, erros[0])
+                continue
+            yield montar_curriculo((registro['campo'], registro['posicao'], registro['valor']) for registro in grupo)
+
+
+def converter_em_fluxo(caminhos, pasta_saida, workers=None, chunksize=8, backend='lxml', campos=None):
+    """
+    Versão de converter_curriculos() com memória limitada: cada lote de
+    `chunksize` currículos vira um <pasta_saida>/registros_NNNNN.jsonl,
+    gravado registro a registro (ver LattesParser.registros) pelo próprio
+    processo que analisa. Com o backend lxml a árvore também é montada e
+    descartada seção a seção. Uma linha é {id_lattes, campo, posicao, valor};
+    ler_jsonl() devolve os currículos. Os registros_*.jsonl de uma execução
+    anterior são apagados; o cache de currículos não é usado.
+    """
+    pasta_saida = Path(pasta_saida)
+    pasta_saida.mkdir(parents=True, exist_ok=True)
+    for antigo in pasta_saida.glob('registros_*.jsonl'):
+        antigo.unlink()
+    if campos is not None:
+        extratores_de(campos)
+
+    resumo = {'total': len(caminhos), 'convertidos': 0, 'falhas': [], 'cache_hits': 0, 'cache_misses': 0}
+    estatisticas = []
+    lotes = [caminhos[i:i + chunksize] for i in range(0, len(caminhos), chunksize)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futuros = [
+            executor.submit(
+                _processar_lote_em_fluxo, lote, pasta_saida / f"registros_{numero:05d}.jsonl", backend, campos
+            )
+            for numero, lote in enumerate(lotes)
+        ]
+        for futuro in as_completed(futuros):
+            for caminho, erro, estatistica in futuro.result():
+                if erro is None:
+                    resumo['convertidos'] += 1
+                    estatisticas.append(estatistica)
+                else:
+                    resumo['falhas'].append((str(caminho), erro))
+
+    resumo['estatisticas'] = resumir_estatisticas(estatisticas)
+    return resumo
+
+
+def _mesclar_no_corpus(corpus, dados):
+    existente = corpus.ler(dados['_id']) if dados.get('_id') else None
+    corpus.gravar({**existente, **dados} if existente else dados)
+
+
+def converter_curriculos(
+    caminhos,
+    pasta_saida,
+    workers=None,
+    chunksize=8,
+    backend='bs4',
+    caminho_cache=None,
+    forcar=False,
+    max_idade_dias=None,
+    max_mb=None,
+    formato='json',
+    indentar=False,
+    extensao='.json',
+    pasta_perfis=None,
+    medir_memoria=False,
+    campos=None,
+):
+    """
+    Converte os HTMLs em JSON distribuindo `LattesParser.parse()` entre
+    processos. Os arquivos são enviados em lotes de `chunksize` e cada lote é
+    gravado assim que termina. Devolve um resumo com as falhas por arquivo.
+
+    Com `formato='sqlite'`, em vez de um JSON por currículo os dados vão para
+    as tabelas de `<pasta_saida>/corpus.sqlite` (ver corpus_sqlite.py). Os
+    JSONs são compactos, a menos que `indentar` seja True, e `extensao`
+    ('.json', '.json.gz' ou '.json.zst') define a compressão.
+
+    Com `caminho_cache`, currículos cujo HTML não mudou desde a última execução
+    são lidos do cache em vez de analisados de novo (`forcar` ignora o cache).
+
+    `resumo['estatisticas']` traz o tempo por extrator agregado no lote (ver
+    resumir_estatisticas). Com `pasta_perfis`, cada currículo analisado gera
+    um <id>.prof do cProfile nessa pasta; `medir_memoria` liga o tracemalloc.
+
+    Com `campos`, só esses campos (além de _id e nome_completo) são extraídos e
+    atualizados no JSON ou no corpus já existente; os demais são preservados.
+    Resultados parciais não são guardados no cache.
+    """
+    if campos is not None:
+        # Valida os campos antes de distribuir o trabalho
+        extratores_de(campos)
+    Path(pasta_saida).mkdir(parents=True, exist_ok=True)
+    if pasta_perfis:
+        Path(pasta_perfis).mkdir(parents=True, exist_ok=True)
+    resumo = {'total': len(caminhos), 'convertidos': 0, 'falhas': [], 'cache_hits': 0, 'cache_misses': 0}
+    estatisticas = []
+
+    cache = CacheParser(caminho_cache, VERSAO_PARSER) if caminho_cache else None
+    usados = []
+
+    corpus = None
+    if formato == 'sqlite':
+        corpus = CorpusSQLite(Path(pasta_saida) / 'corpus.sqlite')
+        gravar = corpus.gravar if campos is None else partial(_mesclar_no_corpus, corpus)
+    else:
+        gravar = partial(
+            salvar_json, pasta_saida=pasta_saida, indentar=indentar, extensao=extensao, mesclar=campos is not None
+        )
+
+    lotes = [caminhos[i:i + chunksize] for i in range(0, len(caminhos), chunksize)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futuros = [
+            executor.submit(_processar_lote, lote, backend, caminho_cache, forcar, pasta_perfis, medir_memoria, campos)
+            for lote in lotes
+        ]
+
+        for futuro in as_completed(futuros):
+            for caminho, dados, erro, hash_html, do_cache, estatistica in futuro.result():
+                if estatistica is not None:
+                    estatisticas.append(estatistica)
+                if erro is None:
+                    try:
+                        gravar(dados)
+                    except Exception as e:
+                        erro = f"{type(e).__name__}: {e}"
+
+                if cache is not None and hash_html is not None:
+                    if do_cache:
+                        resumo['cache_hits'] += 1
+                        usados.append(Path(caminho).name)
+                    else:
+                        resumo['cache_misses'] += 1
+                        if dados is not None and campos is None:
+                            cache.guardar(Path(caminho).name, hash_html, dados)
+
+                if erro is None:
+                    resumo['convertidos'] += 1
+                else:
+                    resumo['falhas'].append((str(caminho), erro))
+
+            if cache is not None:
+                cache.commit()
+            if corpus is not None:
+                corpus.commit()
+
+    if corpus is not None:
+        corpus.close()
+    if cache is not None:
+        cache.registrar_uso(usados)
+        if max_idade_dias is not None:
+            resumo['cache_expirados'] = cache.remover_expirados(max_idade_dias)
+        if max_mb is not None:
+            resumo['cache_expirados'] = resumo.get('cache_expirados', 0) + cache.limitar_tamanho(int(max_mb * 1024 * 1024))
+        cache.close()
+
+    resumo['estatisticas'] = resumir_estatisticas(estatisticas)
+    return resumo
+
+
+def main():
+    argumentos = argparse.ArgumentParser(
+        description="Converte os currículos Lattes (HTML) de uma pasta em JSON, em paralelo."
+    )
+    argumentos.add_argument(
+        "--entrada",
+        default="curriculos",
+        help="Pasta com os HTMLs dos currículos (padrão: curriculos).",
+    )
+    argumentos.add_argument(
+        "--ids",
+        help="Arquivo com um ID Lattes por linha; restringe a conversão a esses IDs.",
+    )
+    argumentos.add_argument(
+        "--saida",
+        default="curriculos_json",
+        help="Pasta onde os JSONs serão gravados (padrão: curriculos_json).",
+    )
+    argumentos.add_argument(
+        "--formato",
+        choices=["json", "sqlite", "jsonl"],
+        default="json",
+        help=(
+            "json: um arquivo por currículo; sqlite: tabelas em <saida>/corpus.sqlite; jsonl: registros "
+            "gravados em fluxo em <saida>/registros_NNNNN.jsonl, com memória limitada (padrão: json)."
+        ),
+    )
+    argumentos.add_argument(
+        "--indentar",
+        action="store_true",
+        help="Grava os JSONs indentados (legíveis); o padrão é JSON compacto.",
+    )
+    argumentos.add_argument(
+        "--compressao",
+        choices=["nenhuma", "gz", "zst"],
+        default="nenhuma",
+        help="Comprime cada JSON (.json.gz ou .json.zst; zst requer o pacote zstandard).",
+    )
+    argumentos.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Número de processos (padrão: número de CPUs).",
+    )
+    argumentos.add_argument(
+        "--chunksize",
+        type=int,
+        default=8,
+        help="Quantidade de currículos enviada a cada processo por vez (padrão: 8).",
+    )
+    argumentos.add_argument(
+        "--backend",
+        choices=sorted(BACKENDS),
+        default="bs4",
+        help="Motor de parsing: bs4 (BeautifulSoup) ou lxml (padrão: bs4).",
+    )
+    argumentos.add_argument(
+        "--cache",
+        help="Arquivo SQLite do cache de currículos já analisados (desativado se omitido).",
+    )
+    argumentos.add_argument(
+        "--force",
+        action="store_true",
+        help="Analisa todos os currículos de novo, ignorando o cache (o cache é atualizado).",
+    )
+    argumentos.add_argument(
+        "--cache-max-idade",
+        type=float,
+        help="Remove do cache as entradas não usadas há mais desta quantidade de dias.",
+    )
+    argumentos.add_argument(
+        "--cache-max-mb",
+        type=float,
+        help="Tamanho máximo dos dados no cache, em MB; remove as entradas menos usadas.",
+    )
+    argumentos.add_argument(
+        "--campos",
+        nargs="+",
+        choices=sorted(CAMPOS),
+        help="Extrai só estes campos (além de _id e nome_completo) e os atualiza na saída existente.",
+    )
+    argumentos.add_argument(
+        "--estatisticas",
+        action="store_true",
+        help="Mostra ao final o tempo de cada extrator no lote (total, p50 e p95).",
+    )
+    argumentos.add_argument(
+        "--perfil",
+        help="Pasta onde gravar um perfil do cProfile por currículo; mostra ao final as funções mais custosas.",
+    )
+    argumentos.add_argument(
+        "--memoria",
+        action="store_true",
+        help="Mede com o tracemalloc o pico de memória de cada extrator (mais lento).",
+    )
+    argumentos.add_argument(
+        "--log",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        default="WARNING",
+        help="Nível das mensagens do parser; INFO inclui as seções ausentes (padrão: WARNING).",
+    )
+    args = argumentos.parse_args()
+    logging.basicConfig(level=args.log, format="%(levelname)s %(name)s: %(message)s")
+
+    caminhos = listar_curriculos(args.entrada, args.ids)
+    if not caminhos:
+        raise SystemExit(f"Nenhum currículo encontrado em {args.entrada}")
+
+    if args.formato == 'jsonl':
+        resumo = converter_em_fluxo(
+            caminhos, args.saida, args.workers, max(1, args.chunksize), args.backend, campos=args.campos
+        )
+    else:
+        resumo = converter_curriculos(
+            caminhos,
+            args.saida,
+            args.workers,
+            max(1, args.chunksize),
+            args.backend,
+            caminho_cache=args.cache,
+            forcar=args.force,
+            max_idade_dias=args.cache_max_idade,
+            max_mb=args.cache_max_mb,
+            formato=args.formato,
+            indentar=args.indentar,
+            extensao='.json' if args.compressao == 'nenhuma' else f'.json.{args.compressao}',
+            pasta_perfis=args.perfil,
+            medir_memoria=args.memoria,
+            campos=args.campos,
+        )
+
+    print("Concluído.")
+    print(f"Total: {resumo['total']} | Convertidos: {resumo['convertidos']} | Falhas: {len(resumo['falhas'])}")
+    if args.cache:
+        print(
+            f"Cache: {resumo['cache_hits']} hits | {resumo['cache_misses']} misses"
+            f" | {resumo.get('cache_expirados', 0)} entradas removidas"
+        )
+    for caminho, erro in resumo['falhas']:
+        print(f"  {caminho}: {erro}")
+
+    if (args.estatisticas or args.memoria) and resumo['estatisticas']:
+        print()
+        print(tabela_estatisticas(resumo['estatisticas']))
+    perfis = sorted(Path(args.perfil).glob('*.prof')) if args.perfil else []
+    if perfis:
+        perfil = pstats.Stats(*map(str, perfis))
+        # Sem isso o pstats lista cada um dos arquivos antes da tabela
+        perfil.files = []
+        print(f"\nPerfil somado de {len(perfis)} currículos ({args.perfil}):")
+        perfil.strip_dirs().sort_stats('cumulative').print_stats(25)
+
+
+if __name__ == "__main__":
+    main()
 
     #verificar o pq q tem alguns curriculos com null na area de atuação
     #verificar se já há alguma conexão entre os curriculos
-    #verificar em qual lingua está escrita as palavras para fazer o pln
\ No newline at end of file
+    #verificar em qual lingua está escrita as palavras para fazer o pln
@@ -1,78 +1,496 @@
+"""
+Análise de linguagem natural (spaCy) dos currículos convertidos pelo parser.
+
+Uso (corpus inteiro, modelo carregado uma única vez):
+    python pln.py [--entrada curriculos_json] [--batch-size 64] [--n-process 4]
+                  [--perfil completo|lemas|tokens] [--desativar ner ...] [--rotear-idioma]
+                  [--saida-tokens tokens_npz] [--curriculos-por-lote 500]
+    python pln.py --corpus-db curriculos_json/corpus.sqlite ...
+
+Os modelos ficam num registro do módulo: cada combinação de modelo e
+componentes é carregada na primeira vez que é pedida e reaproveitada depois,
+por todas as instâncias de plnLattes e por processar_corpus.
+
+Os tokens podem ser gravados em colunas (TabelaTokens, um .npz por lote de
+currículos) para que as análises seguintes não precisem rodar o spaCy de novo.
+"""
+
+import argparse
+import time
+from collections import deque
+from itertools import groupby
+from pathlib import Path
+
+import numpy as np
 from spacy import load, displacy
+from spacy.attrs import DEP, IS_PUNCT, IS_STOP, LEMMA, ORTH, POS
 from spacy.language import Language
 from spacy_language_detection import LanguageDetector
-import json
+
+import json_io
+from corpus_sqlite import CorpusSQLite
+from normalizacao import PALAVRA
+
+MODELO_PADRAO = 'pt_core_news_sm'
+
+# Componentes deixados de fora em cada perfil (passados ao spacy.load como `exclude`).
+# 'lemas' mantém o tagger morfológico porque o lematizador do português depende das classes gramaticais.
+PERFIS = {
+    'completo': (),
+    'lemas': ('parser', 'ner', 'senter'),
+    'tokens': ('tok2vec', 'morphologizer', 'tagger', 'parser', 'attribute_ruler', 'lemmatizer', 'ner', 'senter'),
+}
+
+# Modelo usado para cada idioma detectado por detectar_idioma
+MODELOS_IDIOMA = {
+    'pt': MODELO_PADRAO,
+    'en': 'en_core_web_sm',
+}
+
+# Palavras funcionais frequentes de cada idioma. "in" fica de fora do inglês porque
+# as citações em português também têm "In: Anais do ...".
+STOPWORDS_PT = frozenset(
+    'a o as os de da do das dos em na no nas nos um uma para por com sem sobre entre '
+    'e ou que se ao aos à às pela pelo pelas pelos como sua seu suas seus uso estudo análise'.split()
+)
+STOPWORDS_EN = frozenset(
+    'the of and for with on to from by an is are at as this that its using based '
+    'study analysis towards approach into'.split()
+)
+# Letras que só aparecem no português
+LETRAS_PT = frozenset('ãõçáéíóúâêôà')
+
+# (modelo, componentes excluídos, detector de idioma) -> Language
+_MODELOS = {}
+# Mesma chave -> segundos gastos carregando o modelo
+TEMPOS_CARGA = {}
+
+
+# Registrada uma única vez, na importação: registrar a fábrica dentro do construtor
+# falhava na segunda instância e não existia nos processos do nlp.pipe(n_process > 1)
+@Language.factory("language_detector")
+def create_language_detector(nlp, name):
+    return LanguageDetector()
+
+
+def obter_modelo(nome=MODELO_PADRAO, perfil='completo', desativar=(), detector_idioma=False):
+    """
+    Devolve o pipeline do registro, carregando-o na primeira chamada.
+
+    `perfil` escolhe um conjunto de componentes de PERFIS e `desativar` exclui
+    componentes extras. Com `detector_idioma`, o language_detector é
+    adicionado depois do parser (ou no fim, se o parser foi excluído).
+    """
+    excluir = tuple(sorted(set(PERFIS[perfil]) | set(desativar)))
+    chave = (nome, excluir, detector_idioma)
+    if chave not in _MODELOS:
+        inicio = time.perf_counter()
+        nlp = load(nome, exclude=list(excluir))
+        if detector_idioma:
+            if 'parser' in nlp.pipe_names:
+                nlp.add_pipe('language_detector', after="parser")
+            else:
+                nlp.add_pipe('language_detector', last=True)
+        _MODELOS[chave] = nlp
+        TEMPOS_CARGA[chave] = time.perf_counter() - inicio
+    return _MODELOS[chave]
+
+# Campos do JSON cujos itens são textos livres
+SECOES_TEXTO = [
+    'producao_revistas',
+    'trabalhos_completos',
+    'resumos_expandidos',
+    'resumos_publicados',
+    'linhas_pesquisa',
+]
+
+
+# Campos lidos por textos_por_secao (projeção usada na leitura do corpus SQLite)
+CAMPOS_PLN = ('endereco', 'area_de_atuacao', 'listaPB', *SECOES_TEXTO, 'projetos')
+
+
+def textos_por_secao(dados):
+    """
+    Lista os textos do currículo como pares (campo, texto), um por item de seção,
+    na mesma ordem usada por plnLattes.transformar_curriculo_txt.
+    """
+    textos = []
+    endereco = dados.get('endereco')
+    if endereco:
+        textos.append(('endereco', endereco))
+
+    for area, especialidades in (dados.get('area_de_atuacao') or {}).items():
+        textos.append(('area_de_atuacao', area))
+        textos.extend(('area_de_atuacao', especialidade) for especialidade in especialidades)
+
+    # O parser grava None nas seções ausentes ou que falharam
+    for artigo in dados.get('listaPB') or []:
+        conteudo = artigo.get('texto_completo', '')
+        if conteudo:
+            textos.append(('listaPB', conteudo))
+
+    for campo in SECOES_TEXTO:
+        textos.extend((campo, texto) for texto in dados.get(campo) or [] if texto)
+
+    for projeto in dados.get('projetos') or []:
+        titulo = projeto.get('titulo', '')
+        ano = projeto.get('periodo', '')
+        textos.append(('projetos', f"{titulo}; {ano}"))
+
+    return textos
+
+
+def detectar_idioma(texto):
+    """
+    Detector barato ('pt' ou 'en'): conta palavras funcionais de cada idioma,
+    sem passar o texto pelo spaCy. Empates e textos sem pistas ficam em 'pt'.
+    """
+    pontos_pt = 0
+    pontos_en = 0
+    for palavra in PALAVRA.findall(texto.lower()):
+        if palavra in STOPWORDS_PT:
+            pontos_pt += 1
+        elif palavra in STOPWORDS_EN:
+            pontos_en += 1
+        elif not LETRAS_PT.isdisjoint(palavra):
+            pontos_pt += 1
+    return 'en' if pontos_en > pontos_pt else 'pt'
+
+
+def _pipe_por_idioma(itens, batch_size, n_process, perfil, desativar, max_pendentes=None):
+    # Um nlp.pipe por idioma, reaproveitado enquanto houver itens do idioma (com
+    # n_process > 1, cada nlp.pipe sobe os seus processos e envia o modelo a
+    # eles). Os itens (texto, contexto) são lidos sob demanda e repartidos em
+    # filas por idioma; os (Doc, contexto) saem na ordem original dos itens.
+    #
+    # Para encher um lote de um idioma raro, o pipe dele lê adiante e guarda os
+    # itens dos outros idiomas. No máximo `max_pendentes` itens lidos ficam à
+    # espera: ao atingir o limite, a entrada do pipe faminto termina, o spaCy
+    # processa o lote incompleto e um pipe novo é aberto quando o idioma voltar.
+    if max_pendentes is None:
+        max_pendentes = 4 * batch_size * max(n_process, 1)
+    itens = iter(itens)
+    filas = {}
+    ordem = deque()
+    pipes = {}
+
+    def avancar():
+        if len(ordem) >= max_pendentes:
+            return False
+        item = next(itens, None)
+        if item is None:
+            return False
+        idioma = detectar_idioma(item[0])
+        filas.setdefault(idioma, deque()).append(item)
+        ordem.append(idioma)
+        return True
+
+    def entrada(idioma):
+        # Alimenta o pipe do idioma; lê adiante (guardando os itens dos outros idiomas) até achar um dele
+        fila = filas[idioma]
+        while fila or avancar():
+            if fila:
+                yield fila.popleft()
+
+    def abrir(idioma):
+        nlp = obter_modelo(MODELOS_IDIOMA[idioma], perfil, desativar)
+        pipes[idioma] = nlp.pipe(entrada(idioma), as_tuples=True, batch_size=batch_size, n_process=n_process)
+
+    while ordem or avancar():
+        idioma = ordem.popleft()
+        if idioma not in pipes:
+            abrir(idioma)
+        # O próximo Doc do idioma é o do item mais antigo ainda pendente dele, ou seja, este
+        doc = next(pipes[idioma], None)
+        if doc is None:
+            # A entrada do pipe terminou no limite de pendentes e ele já devolveu tudo o que leu;
+            # o item atual continua na fila do idioma
+            abrir(idioma)
+            doc = next(pipes[idioma])
+        yield doc
+
+
+def _itens_do_corpus(curriculos):
+    # Gera (texto, (posição do currículo, id, campo)) sem carregar o corpus inteiro na memória
+    for posicao, curriculo in enumerate(curriculos):
+        dados = curriculo if isinstance(curriculo, dict) else json_io.carregar(curriculo)
+        id_lattes = dados.get('_id') or str(posicao)
+        textos = textos_por_secao(dados)
+        if not textos:
+            # Currículo sem texto: um item vazio para que ele ainda apareça no resultado
+            textos = [(None, '')]
+        for campo, texto in textos:
+            yield texto, (posicao, id_lattes, campo)
+
+
+def processar_corpus(
+    curriculos, nlp=None, batch_size=64, n_process=1, perfil='completo', desativar=(),
+    rotear_idioma=False, max_pendentes=None,
+):
+    """
+    Passa os textos de vários currículos pelo spaCy com nlp.pipe.
+
+    `curriculos` é um iterável de dicts (JSON já carregado) ou de caminhos de
+    JSON. O modelo vem do registro (`perfil` e `desativar`) ou de `nlp` e os
+    textos de cada seção entram no pipe em lotes de `batch_size`, em
+    `n_process` processos. Gera, na ordem de entrada, um par
+    (id_lattes, {campo: [Doc, ...]}) por currículo.
+
+    Com `rotear_idioma`, cada item tem o idioma detectado por detectar_idioma
+    e vai para o modelo de MODELOS_IDIOMA (`nlp` é ignorado), com um nlp.pipe
+    por idioma; o idioma de cada Doc fica em doc.lang_. No máximo
+    `max_pendentes` textos (padrão: 4 * batch_size * n_process) ficam lidos à
+    espera de um idioma raro completar o lote; no limite, o lote vai
+    incompleto e o pipe desse idioma é reaberto.
+    """
+    if rotear_idioma:
+        docs = _pipe_por_idioma(
+            _itens_do_corpus(curriculos), batch_size, n_process, perfil, desativar, max_pendentes
+        )
+    else:
+        if nlp is None:
+            nlp = obter_modelo(perfil=perfil, desativar=desativar)
+        docs = nlp.pipe(
+            _itens_do_corpus(curriculos),
+            as_tuples=True,
+            batch_size=batch_size,
+            n_process=n_process,
+        )
+    # nlp.pipe preserva a ordem, então os Docs de um currículo chegam em sequência
+    for (_, id_lattes), grupo in groupby(docs, key=lambda item: item[1][:2]):
+        secoes = {}
+        for doc, (_, _, campo) in grupo:
+            if campo is not None:
+                secoes.setdefault(campo, []).append(doc)
+        yield id_lattes, secoes
+
+
+# Colunas de TabelaTokens; cada valor é um índice na tabela de strings
+COLUNAS_TOKENS = ('orth', 'lemma', 'pos', 'dep')
+
+
+class TabelaTokens:
+    """
+    Tokens de vários Docs em formato colunar.
+
+    Cada coluna de COLUNAS_TOKENS é um vetor int32 com um índice em `strings`
+    por token; os tokens do documento i ficam em doc_inicio[i]:doc_inicio[i + 1].
+    Com `filtrar`, stop words e pontuação são descartadas (como fazia plnCurriculo).
+    """
+
+    def __init__(self, filtrar=True):
+        self.filtrar = filtrar
+        self.strings = []
+        self._indices = {}
+        self.colunas = {coluna: [] for coluna in COLUNAS_TOKENS}
+        self.doc_inicio = [0]
+        self.doc_id = []
+        self.doc_campo = []
+        self.doc_idioma = []
+
+    def __len__(self):
+        return len(self.doc_id)
+
+    def _indice(self, vocab, valor):
+        # Os hashes do spaCy não dependem do modelo, então docs pt e en dividem a tabela
+        if valor not in self._indices:
+            self._indices[valor] = len(self.strings)
+            self.strings.append(vocab.strings[valor])
+        return self._indices[valor]
+
+    def adicionar(self, doc, id_lattes='', campo=''):
+        atributos = doc.to_array([ORTH, LEMMA, POS, DEP, IS_STOP, IS_PUNCT]).reshape(-1, 6)
+        # Pipelines sem lematizador (perfil 'tokens', spacy.blank) deixam o lema vazio: usa o texto
+        sem_lema = atributos[:, 1] == 0
+        atributos[sem_lema, 1] = atributos[sem_lema, 0]
+        if self.filtrar:
+            atributos = atributos[(atributos[:, 4] == 0) & (atributos[:, 5] == 0)]
+
+        valores, inversos = np.unique(atributos[:, :4].ravel(), return_inverse=True)
+        indices = np.array([self._indice(doc.vocab, int(valor)) for valor in valores], dtype=np.int32)
+        locais = indices[inversos].reshape(-1, len(COLUNAS_TOKENS))
+
+        for posicao, coluna in enumerate(COLUNAS_TOKENS):
+            self.colunas[coluna].append(locais[:, posicao])
+        self.doc_inicio.append(self.doc_inicio[-1] + len(locais))
+        self.doc_id.append(id_lattes)
+        self.doc_campo.append(campo)
+        self.doc_idioma.append(doc.lang_)
+
+    def para_arrays(self):
+        arrays = {
+            coluna: np.concatenate(partes) if partes else np.zeros(0, dtype=np.int32)
+            for coluna, partes in self.colunas.items()
+        }
+        arrays['doc_inicio'] = np.array(self.doc_inicio, dtype=np.int64)
+        arrays['doc_id'] = np.array(self.doc_id, dtype=str)
+        arrays['doc_campo'] = np.array(self.doc_campo, dtype=str)
+        arrays['doc_idioma'] = np.array(self.doc_idioma, dtype=str)
+        arrays['strings'] = np.array(self.strings, dtype=str)
+        return arrays
+
+    def salvar(self, caminho):
+        np.savez_compressed(caminho, **self.para_arrays())
+
+
+def carregar_tokens(caminho):
+    """Lê um .npz gravado por TabelaTokens.salvar como um dict de arrays."""
+    with np.load(caminho) as arquivo:
+        return {nome: arquivo[nome] for nome in arquivo.files}
+
+
+def documentos_tokenizados(arrays, coluna='lemma'):
+    """Gera (id_lattes, campo, [strings da coluna]) para cada documento de uma tabela de tokens."""
+    strings = arrays['strings']
+    inicio = arrays['doc_inicio']
+    valores = arrays[coluna]
+    for posicao, (id_lattes, campo) in enumerate(zip(arrays['doc_id'], arrays['doc_campo'])):
+        yield str(id_lattes), str(campo), strings[valores[inicio[posicao]:inicio[posicao + 1]]].tolist()
+
+
+def gravar_tokens_em_lotes(resultados, pasta_saida, curriculos_por_lote=500, filtrar=True):
+    """
+    Repassa os resultados de processar_corpus e grava, a cada
+    `curriculos_por_lote` currículos, um tokens_NNNNN.npz em `pasta_saida`.
+    """
+    pasta_saida = Path(pasta_saida)
+    pasta_saida.mkdir(parents=True, exist_ok=True)
+
+    lote = 0
+    curriculos = 0
+    tabela = TabelaTokens(filtrar)
+    for id_lattes, secoes in resultados:
+        for campo, docs in secoes.items():
+            for doc in docs:
+                tabela.adicionar(doc, id_lattes, campo)
+        curriculos += 1
+        yield id_lattes, secoes
+
+        if curriculos == curriculos_por_lote:
+            tabela.salvar(pasta_saida / f"tokens_{lote:05d}.npz")
+            lote += 1
+            curriculos = 0
+            tabela = TabelaTokens(filtrar)
+
+    if curriculos:
+        tabela.salvar(pasta_saida / f"tokens_{lote:05d}.npz")
+
 
 class plnLattes:
-    def __init__(self, dados_json):
+    def __init__(self, dados_json, perfil='completo', desativar=()):
         self.dados = dados_json
-        self.nlp = load('pt_core_news_sm') 
+        self.perfil = perfil
+        self.desativar = desativar
+
+    @property
+    def nlp(self):
+        # O modelo só é carregado no primeiro uso e é compartilhado entre as instâncias
+        return obter_modelo(perfil=self.perfil, desativar=self.desativar, detector_idioma=True)
 
-        # Função que o spaCy vai usar para criar o detector
-        @Language.factory("language_detector")
-        def create_language_detector(nlp, name):
-            return LanguageDetector()
 
-        # Adicionando o language_detector após o parser
-        self.nlp.add_pipe('language_detector', after="parser")
-        
     def transformar_curriculo_txt(self):
-        texto_analise = [ 
-            self.dados.get('endereco', '')
-        ]
-        
-        areas = self.dados.get('area de atuacao', {})
-        for area, especialidades in areas.items(): 
-            texto_analise.append(area)
-            texto_analise.extend(especialidades)
-            
-        artigos = self.dados.get('artigos', [])
-        for artigo in artigos:
-            conteudo = artigo.get('texto_completo', '')
-            texto_analise.append(conteudo)
-        
-        producao = self.dados.get('producao_revistas', [])
-        texto_analise.extend(producao)
-        
-        trabalhos = self.dados.get('trabalhos_completos', [])
-        texto_analise.extend(trabalhos)
-        
-        resumos_ex = self.dados.get('resumos_expandidos', [])
-        texto_analise.extend(resumos_ex)
-        
-        resumos_publi = self.dados.get('resumos_publicados', [])
-        texto_analise.extend(resumos_publi)
-
-        projetos = self.dados.get('projetos', [])
-        
-        for projeto in projetos:
-            titulo = projeto.get('titulo', '')
-            ano = projeto.get('periodo', '')
-            
-            texto_projeto = f"{titulo}; {ano}"
-            
-            texto_analise.append(texto_projeto)
-            
+        texto_analise = [texto for _, texto in textos_por_secao(self.dados)]
         #print(texto_analise)
         #Para retonar uma string separada por espaços ao invés de uma lista
         return " ".join(texto_analise)
             
     def plnCurriculo(self, texto_curriculo):
-        doc = self.nlp(texto_curriculo)
-        for token in doc:
-            if not token.is_stop and not token.is_punct:  
-                print('{:15} | {:15} | {:15} | {:15} | {} '.format(token.text, token.pos_, token.lemma_, token.dep_, token.is_stop))
-       
-     
-            
+        """Devolve os tokens (sem stop words e pontuação) no formato de TabelaTokens.para_arrays."""
+        tabela = TabelaTokens()
+        tabela.adicionar(self.nlp(texto_curriculo), self.dados.get('_id', ''), 'curriculo')
+        return tabela.para_arrays()
+
+
+def main():
+    argumentos = argparse.ArgumentParser(
+        description="Processa com o spaCy todos os JSONs de uma pasta, carregando o modelo uma única vez."
+    )
+    argumentos.add_argument(
+        "--entrada",
+        default="curriculos_json",
+        help="Pasta com os JSONs gerados pelo parser (padrão: curriculos_json).",
+    )
+    argumentos.add_argument(
+        "--corpus-db",
+        help="Corpus SQLite gerado por parser.py --formato sqlite; usado no lugar de --entrada.",
+    )
+    argumentos.add_argument(
+        "--batch-size",
+        type=int,
+        default=64,
+        help="Textos por lote do nlp.pipe (padrão: 64).",
+    )
+    argumentos.add_argument(
+        "--n-process",
+        type=int,
+        default=1,
+        help="Processos do nlp.pipe; -1 usa todos os núcleos (padrão: 1).",
+    )
+    argumentos.add_argument(
+        "--perfil",
+        choices=sorted(PERFIS),
+        default="completo",
+        help="Componentes carregados: completo, lemas (sem parser/ner) ou tokens (só o tokenizador).",
+    )
+    argumentos.add_argument(
+        "--desativar",
+        nargs="*",
+        default=(),
+        help="Componentes extras a excluir do pipeline (ex.: ner parser).",
+    )
+    argumentos.add_argument(
+        "--rotear-idioma",
+        action="store_true",
+        help="Detecta o idioma de cada item e usa o modelo pt ou en correspondente.",
+    )
+    argumentos.add_argument(
+        "--saida-tokens",
+        help="Pasta onde gravar os tokens em colunas (um tokens_NNNNN.npz por lote).",
+    )
+    argumentos.add_argument(
+        "--curriculos-por-lote",
+        type=int,
+        default=500,
+        help="Currículos por arquivo .npz (padrão: 500).",
+    )
+    args = argumentos.parse_args()
+
+    if args.corpus_db:
+        # Só as colunas usadas por textos_por_secao são lidas
+        curriculos = CorpusSQLite(args.corpus_db).curriculos(CAMPOS_PLN)
+    else:
+        curriculos = json_io.listar_jsons(args.entrada)
+        if not curriculos:
+            raise SystemExit(f"Nenhum JSON encontrado em {args.entrada}")
+
+    nlp = None
+    if not args.rotear_idioma:
+        nlp = obter_modelo(perfil=args.perfil, desativar=args.desativar)
+        print(f"Modelo {MODELO_PADRAO}: {', '.join(nlp.pipe_names) or '(só tokenizador)'}")
+
+    carga_antes = sum(TEMPOS_CARGA.values())
+    tempos = []
+    inicio = time.perf_counter()
+    resultados = processar_corpus(
+        curriculos, nlp, args.batch_size, args.n_process, args.perfil, args.desativar, args.rotear_idioma
+    )
+    if args.saida_tokens:
+        resultados = gravar_tokens_em_lotes(resultados, args.saida_tokens, args.curriculos_por_lote)
+    for id_lattes, secoes in resultados:
+        agora = time.perf_counter()
+        tempos.append(agora - inicio)
+        inicio = agora
+        tokens = sum(len(doc) for docs in secoes.values() for doc in docs)
+        print(f"{id_lattes}: {len(secoes)} seções, {tokens} tokens, {tempos[-1] * 1000:.1f} ms")
+
+    # Com o roteamento, os modelos são carregados durante o laço; esse tempo sai da média
+    tempo_carga = sum(TEMPOS_CARGA.values())
+    total = sum(tempos) - (tempo_carga - carga_antes)
+    print(
+        f"{len(tempos)} currículos em {total:.2f}s "
+        f"({total / max(len(tempos), 1) * 1000:.1f} ms por currículo, carga do modelo {tempo_carga:.2f}s)"
+    )
+
+
 if __name__ == "__main__":
-    
-    with open('Sahudy.json', 'r', encoding='utf-8') as json_file:
-        curriculo = json.load(json_file)
-    
-    pln = plnLattes(curriculo)
-    print(pln.nlp.pipe_names)
-    texto_curriculo = pln.transformar_curriculo_txt()
-    #pln.plnCurriculo(texto_curriculo)
-    
-    
\ No newline at end of file
+    main()
@@ -0,0 +1,257 @@
+"""
+Similaridade entre pesquisadores para recomendar colaboradores.
+
+Cada currículo vira um vetor esparso de características com hashing (sem
+vocabulário em memória): áreas e subáreas de `area_de_atuacao`, palavras de
+`linhas_pesquisa` e, se houver, os lemas gravados pelo pln.py (--saida-tokens).
+Os vetores recebem pesos TF-IDF, são normalizados (norma L2) e guardados como
+uma matriz CSR em arquivos .npy, carregados com mmap. Os vizinhos mais
+próximos são calculados por similaridade de cosseno em blocos de linhas, de
+modo que só um bloco da matriz de similaridades fica na memória por vez.
+
+Uso:
+    python similaridade.py construir [--entrada curriculos_json] [--tokens tokens_npz] [--saida similaridade]
+    python similaridade.py vizinhos <id_lattes> [-k 10] [--saida similaridade]
+    python similaridade.py todos [-k 10] [--bloco 512] [--saida similaridade]
+"""
+
+import argparse
+import math
+import time
+import zlib
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+
+import json_io
+from normalizacao import PALAVRA, remover_acentos
+
+DIMENSOES_PADRAO = 2 ** 20
+
+# Peso de cada tipo de característica antes do IDF
+PESO_AREA = 2.0
+PESO_LINHA = 1.0
+PESO_LEMA = 1.0
+
+
+def indice_hash(caracteristica, dimensoes=DIMENSOES_PADRAO):
+    # crc32 em vez de hash(): o resultado não muda entre execuções (PYTHONHASHSEED)
+    return zlib.crc32(caracteristica.encode('utf-8')) % dimensoes
+
+
+def caracteristicas_curriculo(dados, lemas=None):
+    """Devolve {característica: peso} de um currículo; `lemas` é um Counter opcional de lemas."""
+    contagens = Counter()
+    for area, subareas in (dados.get('area_de_atuacao') or {}).items():
+        for valor in (area, *subareas):
+            contagens[('area=' + remover_acentos(valor).upper(), PESO_AREA)] += 1
+
+    for linha in dados.get('linhas_pesquisa') or []:
+        for palavra in PALAVRA.findall(linha.lower()):
+            if len(palavra) > 2:
+                contagens[('linha=' + palavra, PESO_LINHA)] += 1
+
+    for lema, frequencia in (lemas or {}).items():
+        contagens[('lema=' + lema, PESO_LEMA)] += frequencia
+
+    # TF sublinear: um termo repetido muitas vezes não domina o vetor
+    return {
+        caracteristica: peso * (1 + math.log(frequencia))
+        for (caracteristica, peso), frequencia in contagens.items()
+    }
+
+
+def lemas_por_pesquisador(arquivos_tokens):
+    """Soma os lemas (palavras, em minúsculas) de cada pesquisador nos .npz do pln.py."""
+    from pln import carregar_tokens, documentos_tokenizados
+
+    lemas = defaultdict(Counter)
+    for caminho in arquivos_tokens:
+        for id_lattes, _, lemas_doc in documentos_tokenizados(carregar_tokens(caminho)):
+            lemas[id_lattes].update(lema.lower() for lema in lemas_doc if PALAVRA.search(lema))
+    return lemas
+
+
+class MatrizSimilaridade:
+
+    def __init__(self, ids, matriz):
+        self.ids = ids
+        self.matriz = matriz
+        self._posicoes = {id_lattes: posicao for posicao, id_lattes in enumerate(ids.tolist())}
+
+    @classmethod
+    def construir(cls, caminhos_json, arquivos_tokens=(), dimensoes=DIMENSOES_PADRAO):
+        lemas = lemas_por_pesquisador(arquivos_tokens) if arquivos_tokens else {}
+
+        ids = []
+        indptr = [0]
+        indices = []
+        valores = []
+        for caminho in caminhos_json:
+            dados = json_io.carregar(caminho)
+            id_lattes = dados.get('_id') or Path(caminho).stem
+
+            linha = Counter()
+            for caracteristica, peso in caracteristicas_curriculo(dados, lemas.get(id_lattes)).items():
+                # Colisões de hash dentro do mesmo currículo são somadas
+                linha[indice_hash(caracteristica, dimensoes)] += peso
+            ids.append(id_lattes)
+            indices.extend(linha.keys())
+            valores.extend(linha.values())
+            indptr.append(len(indices))
+
+        matriz = sparse.csr_matrix(
+            (
+                np.array(valores, dtype=np.float32),
+                np.array(indices, dtype=np.int32),
+                np.array(indptr, dtype=np.int64),
+            ),
+            shape=(len(ids), dimensoes),
+        )
+        matriz.sort_indices()
+        return cls(np.array(ids, dtype=str), _tfidf_normalizado(matriz))
+
+    def salvar(self, pasta):
+        pasta = Path(pasta)
+        pasta.mkdir(parents=True, exist_ok=True)
+        np.save(pasta / 'ids.npy', self.ids)
+        np.save(pasta / 'data.npy', self.matriz.data)
+        np.save(pasta / 'indices.npy', self.matriz.indices)
+        np.save(pasta / 'indptr.npy', self.matriz.indptr)
+        np.save(pasta / 'shape.npy', np.array(self.matriz.shape, dtype=np.int64))
+
+    @classmethod
+    def carregar(cls, pasta, mmap=True):
+        pasta = Path(pasta)
+        modo = 'r' if mmap else None
+        matriz = sparse.csr_matrix(
+            (
+                np.load(pasta / 'data.npy', mmap_mode=modo),
+                np.load(pasta / 'indices.npy', mmap_mode=modo),
+                np.load(pasta / 'indptr.npy', mmap_mode=modo),
+            ),
+            shape=tuple(np.load(pasta / 'shape.npy').tolist()),
+            copy=False,
+        )
+        return cls(np.load(pasta / 'ids.npy'), matriz)
+
+    def vizinhos(self, id_lattes, k=10):
+        """Devolve os k pesquisadores [(id_lattes, cosseno)] mais parecidos com `id_lattes`."""
+        posicao = self._posicoes[id_lattes]
+        indices, pontuacoes = self._top_k(posicao, posicao + 1, k)
+        return [
+            (self.ids[indice].item(), float(pontuacao))
+            for indice, pontuacao in zip(indices[0], pontuacoes[0])
+        ]
+
+    def todos_vizinhos(self, k=10, bloco=512):
+        """
+        Top-k de todos os pesquisadores, calculado em blocos de `bloco` linhas.
+
+        Devolve (indices, pontuacoes): matrizes (n, k) com as posições em `ids` e os cossenos.
+        """
+        total = self.matriz.shape[0]
+        k = min(k, max(total - 1, 0))
+        indices = np.empty((total, k), dtype=np.int32)
+        pontuacoes = np.empty((total, k), dtype=np.float32)
+        for inicio in range(0, total, bloco):
+            fim = min(inicio + bloco, total)
+            indices[inicio:fim], pontuacoes[inicio:fim] = self._top_k(inicio, fim, k)
+        return indices, pontuacoes
+
+    def _top_k(self, inicio, fim, k):
+        # Linhas normalizadas: o produto escalar já é o cosseno
+        similaridades = (self.matriz[inicio:fim] @ self.matriz.T).toarray()
+        linhas = np.arange(fim - inicio)
+        similaridades[linhas, linhas + inicio] = -np.inf
+
+        k = min(k, similaridades.shape[1] - 1)
+        if k <= 0:
+            return np.empty((fim - inicio, 0), dtype=np.int32), np.empty((fim - inicio, 0), dtype=np.float32)
+        candidatos = np.argpartition(-similaridades, k - 1, axis=1)[:, :k]
+        valores = np.take_along_axis(similaridades, candidatos, axis=1)
+        ordem = np.argsort(-valores, axis=1, kind='stable')
+        return (
+            np.take_along_axis(candidatos, ordem, axis=1),
+            np.take_along_axis(valores, ordem, axis=1),
+        )
+
+
+def _tfidf_normalizado(matriz):
+    total = matriz.shape[0]
+    documentos = np.bincount(matriz.indices, minlength=matriz.shape[1])
+    idf = (np.log((1 + total) / (1 + documentos)) + 1).astype(np.float32)
+    matriz.data *= idf[matriz.indices]
+
+    linhas = np.repeat(np.arange(total), np.diff(matriz.indptr))
+    normas = np.sqrt(np.bincount(linhas, weights=matriz.data.astype(np.float64) ** 2, minlength=total))
+    normas[normas == 0] = 1.0
+    matriz.data /= normas[linhas].astype(np.float32)
+    return matriz
+
+
+def main():
+    argumentos = argparse.ArgumentParser(
+        description="Vetores TF-IDF esparsos dos currículos e vizinhos mais próximos por cosseno."
+    )
+    argumentos.add_argument(
+        "--saida",
+        default="similaridade",
+        help="Pasta da matriz gravada (padrão: similaridade).",
+    )
+    comandos = argumentos.add_subparsers(dest="comando", required=True)
+
+    construir = comandos.add_parser("construir", help="Monta e grava a matriz de características.")
+    construir.add_argument(
+        "--entrada",
+        default="curriculos_json",
+        help="Pasta com os JSONs gerados pelo parser (padrão: curriculos_json).",
+    )
+    construir.add_argument(
+        "--tokens",
+        help="Pasta com os tokens_NNNNN.npz do pln.py; sem ela, só áreas e linhas de pesquisa são usadas.",
+    )
+    construir.add_argument(
+        "--dimensoes",
+        type=int,
+        default=DIMENSOES_PADRAO,
+        help=f"Tamanho do espaço de hashing (padrão: {DIMENSOES_PADRAO}).",
+    )
+
+    vizinhos = comandos.add_parser("vizinhos", help="Pesquisadores mais parecidos com um ID Lattes.")
+    vizinhos.add_argument("id_lattes")
+    vizinhos.add_argument("-k", type=int, default=10, help="Quantidade de vizinhos (padrão: 10).")
+
+    todos = comandos.add_parser("todos", help="Top-k de todos os pesquisadores (grava vizinhos.npy).")
+    todos.add_argument("-k", type=int, default=10, help="Quantidade de vizinhos (padrão: 10).")
+    todos.add_argument("--bloco", type=int, default=512, help="Linhas por bloco (padrão: 512).")
+    args = argumentos.parse_args()
+
+    inicio = time.perf_counter()
+    if args.comando == "construir":
+        caminhos = json_io.listar_jsons(args.entrada)
+        if not caminhos:
+            raise SystemExit(f"Nenhum JSON encontrado em {args.entrada}")
+        arquivos_tokens = sorted(Path(args.tokens).glob("*.npz")) if args.tokens else ()
+        modelo = MatrizSimilaridade.construir(caminhos, arquivos_tokens, args.dimensoes)
+        modelo.salvar(args.saida)
+        print(
+            f"{len(modelo.ids)} pesquisadores, {modelo.matriz.nnz} valores não nulos "
+            f"({time.perf_counter() - inicio:.2f}s)"
+        )
+    elif args.comando == "vizinhos":
+        modelo = MatrizSimilaridade.carregar(args.saida)
+        for posicao, (id_lattes, cosseno) in enumerate(modelo.vizinhos(args.id_lattes, args.k), start=1):
+            print(f"{posicao:3}. {id_lattes}  {cosseno:.4f}")
+    else:
+        modelo = MatrizSimilaridade.carregar(args.saida)
+        indices, pontuacoes = modelo.todos_vizinhos(args.k, args.bloco)
+        np.save(Path(args.saida) / 'vizinhos.npy', indices)
+        np.save(Path(args.saida) / 'vizinhos_pontuacoes.npy', pontuacoes)
+        print(f"Top-{indices.shape[1]} de {len(modelo.ids)} pesquisadores em {time.perf_counter() - inicio:.2f}s")
+
+
+if __name__ == "__main__":
+    main()